@@ -1,36 +1,241 @@
 #!/usr/bin/env bash
+# wgx:needs-profile
 
 task::_check_python_runtime() {
   if ! command -v python3 >/dev/null 2>&1; then
     die "Python 3 is required for parsing .wgx/profile.yml but is not installed. See README section \"Laufzeitabhängigkeiten\" / \"Runtime dependencies\"."
   fi
-  if [[ ${WGX_DEBUG:-0} != 0 ]]; then
-    if ! python3 -c "import yaml" >/dev/null 2>&1; then
-      echo "WGX: PyYAML not available; using built-in minimal YAML parser." >&2
+  # Mit WGX_DEBUG meldet profile::load das tatsächlich genutzte Parser-Backend.
+}
+
+task::_load_profile() {
+  if ! profile::has_manifest; then
+    die $'No tracked wgx profile found. Commit one of:\n  • .wgx/profile.yml          (preferred for production config)\n  • .wgx/profile.example.yml  (placeholder for CI)'
+  fi
+
+  task::_check_python_runtime
+
+  if ! profile::ensure_loaded; then
+    die "Failed to parse .wgx/profile.yml. Please check its syntax."
+  fi
+
+  if ! profile::ensure_version; then
+    die "Profile requirements not met (see warnings above)."
+  fi
+}
+
+task::_executable() {
+  local candidate
+  if [[ -n ${WGX_DIR:-} ]]; then
+    candidate="${WGX_DIR%/}/wgx"
+    if [[ -x $candidate ]]; then
+      printf '%s' "$candidate"
+      return 0
     fi
   fi
+  command -v wgx 2>/dev/null
+}
+
+# Runs several tasks through modules/task_runner.py: each one as its own
+# `wgx task NAME` process group, so every task still goes through
+# profile::run_task exactly as a single invocation would. With a workflow the
+# tasks are its steps and WGX_WORKFLOW_NEEDS is passed as the run's graph.
+task::_run_many() {
+  local jobs="$1" fail_fast="$2" group="$3" workflow="$4"
+  shift 4
+
+  if ! [[ $jobs =~ ^[0-9]+$ ]]; then
+    warn "--jobs erwartet eine nicht-negative ganze Zahl."
+    return 2
+  fi
+  if [[ -n $workflow ]] && (($#)); then
+    warn "--workflow nimmt keine weiteren Task-Namen: $*"
+    return 2
+  fi
+  if [[ -z $workflow ]] && (($# == 0)); then
+    warn "Keine Tasks angegeben."
+    return 2
+  fi
+
+  local name key
+  for name in "$@"; do
+    if [[ $name == -* ]]; then
+      warn "Mit --jobs werden keine Argumente an Tasks weitergereicht: $name"
+      return 2
+    fi
+  done
+
+  local target_root="${WGX_TARGET_ROOT:-$PWD}"
+  if [[ ! -d "$target_root" ]]; then
+    die "Target root not found: $target_root"
+  fi
+
+  task::_load_profile
+
+  local graph="" step
+  if [[ -n $workflow ]]; then
+    if [[ -z ${WGX_WORKFLOW_NEEDS[$workflow]+x} ]]; then
+      warn "Workflow not defined: $workflow"
+      return 1
+    fi
+    graph="${WGX_WORKFLOW_NEEDS[$workflow]}"
+    set --
+    while read -r step _; do
+      [[ -n $step ]] && set -- "$@" "$step"
+    done <<<"$graph"
+    if (($# == 0)); then
+      warn "Workflow $workflow hat keine Schritte."
+      return 1
+    fi
+  fi
+
+  local missing=0
+  for name in "$@"; do
+    profile::_task_key_into key "$name"
+    if [[ -z ${WGX_TASK_CMDS[$key]:-} ]]; then
+      warn "Task not defined: $name"
+      missing=1
+    fi
+  done
+  ((missing == 0)) || return 1
+
+  local executable
+  if ! executable="$(task::_executable)"; then
+    die "wgx executable not found."
+  fi
+
+  local -a options=()
+  ((fail_fast)) && options+=(--fail-fast)
+  ((group)) && options+=(--group)
+  if [[ -n $workflow ]]; then
+    python3 "$(profile::_module_dir)/task_runner.py" "${options[@]}" --graph \
+      "$jobs" "$target_root" "$executable" "$@" <<<"$graph"
+    return
+  fi
+  python3 "$(profile::_module_dir)/task_runner.py" "${options[@]}" \
+    "$jobs" "$target_root" "$executable" "$@"
+}
+
+# Reruns one task through modules/task_watch.py whenever the files it reads
+# change: its inputs: globs minus its outputs:, or without inputs every file
+# `git ls-files` lists. Each run is again a plain `wgx task NAME`.
+task::_watch() {
+  local key="$1" target_root="$2" name="$3"
+  shift 3
+
+  local executable
+  if ! executable="$(task::_executable)"; then
+    die "wgx executable not found."
+  fi
+
+  local -a options=()
+  local glob
+  while IFS= read -r glob; do
+    [[ -n $glob ]] && options+=(--input "$glob")
+  done <<<"${WGX_TASK_INPUTS[$key]:-}"
+  while IFS= read -r glob; do
+    [[ -n $glob ]] && options+=(--output "$glob")
+  done <<<"${WGX_TASK_OUTPUTS[$key]:-}"
+
+  python3 "$(profile::_module_dir)/task_watch.py" "${options[@]}" \
+    "$target_root" "$executable" "$name" "$@"
 }
 
 cmd_task() {
   if [[ "${1:-}" == "-h" || "${1:-}" == "--help" || $# -eq 0 ]]; then
     cat <<'USAGE'
 Usage:
-  wgx task <name> [--] [args...]
+  wgx task [--no-cache|--force] <name> [--] [args...]
+  wgx task --watch <name> [--] [args...]
+  wgx task [--jobs N] [--fail-fast] [--group] <name> <name>...
+  wgx task --workflow <workflow> [--jobs N] [--fail-fast] [--group]
 
 Description:
-  Führt genau einen Task aus, der im Profil des Ziel-Repositories deklariert
-  ist. Der Runner protokolliert oder versendet dabei keine impliziten Events;
+  Führt einen Task aus, der im Profil des Ziel-Repositories deklariert ist.
+  Der Runner protokolliert oder versendet dabei keine impliziten Events;
   beobachtbare Nebenwirkungen stammen ausschließlich aus dem deklarierten Task.
 
+  Mit --jobs, --fail-fast oder --group vor den Namen laufen mehrere Tasks,
+  jeder in eigener Prozessgruppe, höchstens N gleichzeitig. Die Ausgabe jeder
+  Zeile trägt den Task-Namen als Präfix; am Ende folgt eine Tabelle mit Status,
+  Exit-Code und Dauer. Exit-Status ist der des ersten fehlgeschlagenen Tasks
+  in Argument-Reihenfolge.
+
+  --workflow führt die Schritte von wgx.workflows.<workflow>.steps aus. Ein
+  Schritt wartet auf die Tasks in seinem needs-Feld, ohne needs auf den
+  vorherigen Schritt; needs: [] startet ihn sofort. Schritte, deren needs
+  fehlschlagen, werden ausgelassen. Die Tabelle nennt zusätzlich den
+  kritischen Pfad, also die Kette, die die Gesamtdauer bestimmt hat.
+
+  Tasks mit inputs: (Globs) werden übersprungen, wenn ein früherer
+  erfolgreicher Lauf dieselbe Kommandozeile, dieselbe Umgebung und dieselben
+  Eingabedateien hatte; deklarierte outputs: werden dann aus dem Cache
+  (.wgx/cache/tasks) wiederhergestellt. DRYRUN=1 zeigt cache=hit|miss.
+
+  --watch führt den Task aus und danach erneut, sobald sich eine seiner
+  inputs: ändert (ohne inputs: jede von git ls-files gelistete Datei).
+  Änderungen werden per inotify erkannt, sonst per Polling (WGX_WATCH_POLL=1
+  erzwingt es), und erst nach WGX_WATCH_DEBOUNCE_MS (200) Ruhe ausgewertet.
+  Ein noch laufender Lauf wird dabei abgebrochen. Ctrl-C beendet.
+
 Example:
   wgx task test -- --verbose
+  wgx task --jobs 3 lint guard smoke
+  wgx task --workflow ci --jobs 4
+  wgx task --watch test
 
 Options:
+  --jobs N      Höchstens N Tasks gleichzeitig (0 = Anzahl der CPUs, Standard 1).
+  --fail-fast   Nach dem ersten Fehlschlag laufende Tasks beenden, übrige auslassen.
+  --group       Ausgabe je Task gesammelt nach dessen Ende statt zeilenweise.
+  --workflow W  Schritte des Workflows W entlang ihrer needs ausführen.
+  --no-cache    Task-Cache weder lesen noch schreiben (WGX_TASK_CACHE=0).
+  --force       Task trotz Cache-Treffer ausführen und Ergebnis neu speichern.
+  --watch       Task bei jeder Änderung seiner Eingaben erneut ausführen.
   -h, --help    Diese Hilfe anzeigen.
 USAGE
     return 0
   fi
 
+  local jobs="" fail_fast=0 group=0 multi=0 workflow="" watch=0
+  while (($#)); do
+    case "$1" in
+    --jobs)
+      shift || true
+      jobs="${1:-}"
+      multi=1
+      ;;
+    --jobs=*)
+      jobs="${1#--jobs=}"
+      multi=1
+      ;;
+    --workflow)
+      shift || true
+      workflow="${1:-}"
+      multi=1
+      ;;
+    --workflow=*)
+      workflow="${1#--workflow=}"
+      multi=1
+      ;;
+    --fail-fast) fail_fast=1 multi=1 ;;
+    --no-cache) export WGX_TASK_CACHE=0 ;;
+    --force) export WGX_TASK_CACHE=refresh ;;
+    --group) group=1 multi=1 ;;
+    --watch) watch=1 ;;
+    *) break ;;
+    esac
+    shift || true
+  done
+  if ((multi && watch)); then
+    warn "--watch beobachtet genau einen Task; nicht kombinierbar mit --jobs/--workflow."
+    return 2
+  fi
+  if ((multi)); then
+    task::_run_many "${jobs:-1}" "$fail_fast" "$group" "$workflow" "$@"
+    return
+  fi
+
   local name="$1"
   shift || true
 
@@ -48,28 +253,21 @@ USAGE
     die "Target root not found: $target_root"
   fi
 
-  if ! profile::has_manifest; then
-    die $'No tracked wgx profile found. Commit one of:\n  • .wgx/profile.yml          (preferred for production config)\n  • .wgx/profile.example.yml  (placeholder for CI)'
-  fi
-
-  task::_check_python_runtime
-
-  if ! profile::ensure_loaded; then
-    die "Failed to parse .wgx/profile.yml. Please check its syntax."
-  fi
-
-  if ! profile::ensure_version; then
-    die "Profile requirements not met (see warnings above)."
-  fi
+  task::_load_profile
 
   local key spec
-  key="$(profile::_normalize_task_name "$name")"
+  profile::_task_key_into key "$name"
   spec="$(profile::_task_spec "$key")"
   if [[ -z $spec ]]; then
     warn "Task not defined: $name"
     return 1
   fi
 
+  if ((watch)); then
+    task::_watch "$key" "$target_root" "$name" "${forwarded[@]}"
+    return
+  fi
+
   local rc had_errexit=0
   if [[ $- == *e* ]]; then
     had_errexit=1
@@ -1,18 +1,23 @@
 #!/usr/bin/env bash
+# wgx:needs-profile
 
 cmd_tasks() {
-  local json=0 safe_only=0 include_groups=0
+  local json=0 safe_only=0 include_groups=0 show_env=0
   while (($#)); do
     case "$1" in
     --json) json=1 ;;
     --safe) safe_only=1 ;;
     --groups) include_groups=1 ;;
+    --env) show_env=1 ;;
     -h | --help)
       cat <<'USAGE'
 Usage: wgx tasks [--json] [--safe] [--groups]
+       wgx tasks --env [--json]
   --json    Output machine readable JSON
   --safe    Only include tasks marked as safe
   --groups  Include group metadata (JSON) or group headings (text)
+  --env     Show the environment tasks run with (envDefaults < env <
+            envOverrides, ${VAR} expanded) instead of the task list
 USAGE
       return 0
       ;;
@@ -29,13 +34,21 @@ USAGE
     return 1
   fi
 
+  if ((show_env)); then
+    if ((json)); then
+      profile::env_json
+    elif ((${#WGX_ENV_EXPORTS[@]})); then
+      printf '%s\n' "${WGX_ENV_EXPORTS[@]}"
+    fi
+    return 0
+  fi
+
   if ((json)); then
     profile::tasks_json "$safe_only" "$include_groups"
     return $?
   fi
 
-  local -a _task_names=()
-  mapfile -t _task_names < <(profile::_task_keys)
+  local -a _task_names=("${WGX_TASK_KEYS[@]}")
   if ((${#_task_names[@]} == 0)); then
     warn "No tasks defined in manifest."
     return 0
@@ -47,11 +60,11 @@ USAGE
     local -a _order=()
     local name group safe
     for name in "${_task_names[@]}"; do
-      safe="$(profile::_task_safe "$name")"
+      safe="${WGX_TASK_SAFE[$name]:-0}"
       if ((safe_only)) && [[ "$safe" != "1" ]]; then
         continue
       fi
-      group="$(profile::_task_group "$name")"
+      group="${WGX_TASK_GROUP[$name]:-}"
       [[ -n $group ]] || group="default"
       _groups["$group"]+="$name"$'\n'
       if [[ -z ${_order_seen[$group]:-} ]]; then
@@ -76,7 +89,7 @@ USAGE
   local -a filtered=()
   local task safe
   for task in "${_task_names[@]}"; do
-    safe="$(profile::_task_safe "$task")"
+    safe="${WGX_TASK_SAFE[$task]:-0}"
     if ((safe_only)) && [[ "$safe" != "1" ]]; then
       continue
     fi
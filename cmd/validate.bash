@@ -1,4 +1,5 @@
 #!/usr/bin/env bash
+# wgx:needs-profile
 #
 # wgx validate — prüft das .wgx/profile.* Manifest und führt deklarierte
 # Validierungsprofile über repository-eigene Kommandos aus.
@@ -12,6 +13,7 @@ validate::_usage() {
 Usage:
   wgx validate [--json]
   wgx validate --profile quick|full [--json] [--timeout SECONDS] [--dry-run] [--output PATH]
+               [--remote-cache URL] [--log-dir DIR] [--jobs N] [--no-reuse]
 
 Validiert das Manifest (.wgx/profile.*) im aktuellen Repository. Mit --profile
 werden zusätzlich die im Manifest deklarierten repository-eigenen Checks des
@@ -51,6 +53,25 @@ Optionen:
   --timeout SEC    Zeitlimit je Check (Standard: quick 120, full 900)
   --dry-run        Nur die aufgelöste Check-Reihenfolge zeigen, nichts ausführen
   --output PATH    Receipt zusätzlich in eine Datei schreiben
+  --remote-cache URL
+                   Geteilter Ergebnis-Cache (file:///pfad oder http://host:port,
+                   Standard: $WGX_REMOTE_CACHE). Bestandene Checks mit gleichem
+                   Arbeitsbaum, Kommando und Env werden übernommen statt
+                   ausgeführt; Receipts zeigen "cache": "remote".
+  --log-dir DIR    Ausgabe der Checks als DIR/<task>.log ablegen (Standard: je
+                   Lauf ein Verzeichnis unter <Cache>/validate/logs, die letzten
+                   WGX_VALIDATE_LOG_RUNS=20 bleiben). Das Receipt nennt Pfad und
+                   sha256 jedes Logs und bei nicht bestandenen Checks die
+                   letzten WGX_VALIDATE_TAIL_KB (16) KiB, redigiert.
+  --jobs N         Höchstens N Checks gleichzeitig (0 = Anzahl der CPUs).
+                   Standard: wgx.validate.<profil>.jobs, sonst die CPUs. Das
+                   Receipt listet die Checks unabhängig davon in Plan-Reihenfolge;
+                   mit serial: true markierte Checks laufen allein.
+  --no-reuse       Alle Checks ausführen (auch WGX_VALIDATE_REUSE=0). Sonst
+                   übernimmt wgx einen früheren Pass, wenn Eingaben
+                   (Blob-Hashes der inputs:, ohne inputs: der ganze
+                   Arbeitsbaum), Kommando, Env und Umgebung gleich sind; das
+                   Receipt nennt ihn mit "reused_from".
   -h, --help       Diese Hilfe
 
 Exit-Status: 0 wenn Manifest gültig ist und alle Checks bestehen, sonst >0.
@@ -116,14 +137,14 @@ validate::_resolve() {
   while IFS= read -r name; do
     [[ -n $name ]] || continue
     seen["$name"]=1
-    skip="$(profile::validate_skip_reason "$name")"
+    skip="${WGX_VALIDATE_SKIP[$name]:-}"
     if [[ -n $skip ]]; then
       kind="${skip%%:*}"
       reason="${skip#*:}"
       printf 'skip\t%s\t%s\t%s\n' "$name" "$kind" "$reason"
       continue
     fi
-    spec="$(profile::_task_spec "$name")"
+    spec="${WGX_TASK_CMDS[$name]:-}"
     if [[ -z $spec ]]; then
       printf 'skip\t%s\t%s\t%s\n' "$name" "undeclared" "profile lists a task the manifest does not define"
       continue
@@ -136,7 +157,7 @@ validate::_resolve() {
   while IFS= read -r name; do
     [[ -n $name ]] || continue
     [[ -n ${seen[$name]+x} ]] && continue
-    skip="$(profile::validate_skip_reason "$name")"
+    skip="${WGX_VALIDATE_SKIP[$name]:-}"
     [[ -n $skip ]] || continue
     kind="${skip%%:*}"
     reason="${skip#*:}"
@@ -160,33 +181,69 @@ validate::_executable() {
   command -v wgx 2>/dev/null
 }
 
-validate::_run_check() {
-  # Run the existing `wgx run` front door in a fresh process group. The Python
-  # helper uses a monotonic timeout and terminates ordinary descendants,
-  # including pipelines and background jobs.
-  local name="$1" timeout_seconds="$2"
-  local executable module_dir repo_root result
-  module_dir="$(validate::_module_dir)"
-  repo_root="$(validate::_repo_root)"
-
-  if ! executable="$(validate::_executable)"; then
-    printf 'failed 127 0'
-    return 0
+# Per-run log directory below the cache root; older runs beyond
+# WGX_VALIDATE_LOG_RUNS (default 20) are removed.
+validate::_default_log_dir() {
+  local root keep dir
+  root="$(profile::_cache_root)/validate/logs" || return 1
+  keep="${WGX_VALIDATE_LOG_RUNS:-20}"
+  [[ $keep =~ ^[0-9]+$ ]] || keep=20
+  mkdir -p "$root" || return 1
+  local -a runs=()
+  mapfile -t runs < <(find "$root" -mindepth 1 -maxdepth 1 -type d -name 'run-*' | LC_ALL=C sort -r)
+  if ((keep > 0)); then
+    for dir in "${runs[@]:keep-1}"; do
+      rm -rf -- "$dir"
+    done
   fi
-  if ! result="$(python3 "${module_dir}/validate_runner.py" \
-    "$timeout_seconds" "$repo_root" "$executable" "$name")"; then
-    printf 'failed 125 0'
-    return 0
+  printf '%s/run-%s-%s' "$root" "$(date -u +%Y%m%dT%H%M%SZ)" "$$"
+}
+
+# Write the resolved plan for `validate_runner.py --plan`: NUL-separated
+# 6-field records as for the receipt, header first, then one run/skip record
+# per plan line in plan order.
+validate::_write_plan() {
+  local file="$1" repo_root="$2" profile="$3" manifest_ok="$4" errors="$5" missing="$6"
+  local remote_url="$7" tree="$8" log_dir="$9" reuse_dir="${10}"
+  shift 10
+  local line kind name skip_kind reason serial item manifest_sha=""
+  local -A alone=()
+  while IFS= read -r name; do
+    alone["$name"]=1
+  done < <(profile::validate_profile_serial "$profile")
+
+  validate::_record "$file" "profile" "$profile" "" "" "" ""
+  validate::_record "$file" "repository" "$(basename "$repo_root")" "$(validate::_commit "$repo_root")" \
+    "$(validate::_dirty "$repo_root")" "" ""
+  validate::_record "$file" "manifest" "$manifest_ok" "$errors" "$missing" "" ""
+  [[ -n $log_dir ]] && validate::_record "$file" "logs" "$log_dir" "" "" "" ""
+  if [[ -n $reuse_dir ]]; then
+    # The store is shared by all repositories; the manifest is part of the key.
+    [[ -n $PROFILE_FILE ]] && manifest_sha="$(profile::_sha256 "$PROFILE_FILE")"
+    validate::_record "$file" "reuse" "$reuse_dir" "${manifest_sha%% *}" "" "" ""
   fi
-  if [[ $result =~ ^(passed|failed|timeout)[[:space:]]+([0-9]+)[[:space:]]+([0-9]+)$ ]]; then
-    printf '%s %s %s' "${BASH_REMATCH[1]}" "${BASH_REMATCH[2]}" "${BASH_REMATCH[3]}"
-  else
-    printf 'failed 125 0'
+  if [[ -n $remote_url && -n $tree ]]; then
+    validate::_record "$file" "remote" "$remote_url" "$tree" "" "" ""
   fi
+  for item in "${WGX_ENV_EXPORTS[@]}"; do
+    validate::_record "$file" "env" "$item" "" "" "" ""
+  done
+  for line in "$@"; do
+    IFS=$'\t' read -r kind name skip_kind reason <<<"$line"
+    if [[ $kind == skip ]]; then
+      validate::_record "$file" "skip" "$name" "$skip_kind" "$reason" "" ""
+      continue
+    fi
+    serial=0
+    [[ -n ${alone[$name]+x} ]] && serial=1
+    validate::_record "$file" "run" "$name" "$(profile::_task_spec "$name")" \
+      "${WGX_TASK_LIMITS[$name]:-}" "$serial" "${WGX_TASK_INPUTS[$name]:-}"
+  done
 }
 
 validate::_profile_run() {
-  local profile="$1" json="$2" timeout_seconds="$3" dry_run="$4" output="$5"
+  local profile="$1" json="$2" timeout_seconds="$3" dry_run="$4" output="$5" remote_url="${6:-}"
+  local log_dir="${7:-}" jobs="${8:-}" reuse="${9:-1}"
 
   if ! profile::validate_profile_declared "$profile"; then
     if ((json)); then
@@ -207,62 +264,75 @@ validate::_profile_run() {
   mapfile -t plan < <(validate::_resolve "$profile")
 
   if ((dry_run)); then
-    local line kind name
+    local line kind name cache_state repo_root
+    # shellcheck disable=SC2034 # read by profile::_task_cache_check through namerefs
+    local -a envs=("${WGX_ENV_EXPORTS[@]}") no_args=()
+    repo_root="$(validate::_repo_root)"
     for line in "${plan[@]}"; do
       IFS=$'\t' read -r kind name _ _ <<<"$line"
-      printf '%s\t%s\n' "$kind" "$name"
+      cache_state=""
+      if [[ $kind == run ]]; then
+        WGX_TARGET_ROOT="$repo_root" profile::_task_cache_check cache_state "$name" \
+          "$(profile::_task_spec "$name")" envs no_args "$repo_root"
+      fi
+      if [[ -n $cache_state ]]; then
+        printf '%s\t%s\tcache=%s\n' "$kind" "$name" "${cache_state%% *}"
+      else
+        printf '%s\t%s\n' "$kind" "$name"
+      fi
     done
     return 0
   fi
 
-  local records
-  records="$(mktemp "${TMPDIR:-/tmp}/wgx-validate-records.XXXXXX")"
-  local started_at
-  started_at="$(validate::_now)"
-
-  local line kind name skip_kind reason result_line status exit_code duration
-  local failures=0
-  for line in "${plan[@]}"; do
-    IFS=$'\t' read -r kind name skip_kind reason <<<"$line"
-    case "$kind" in
-    skip)
-      validate::_record "$records" "skip" "$name" "$skip_kind" "$reason" "" ""
-      if [[ $skip_kind == "undeclared" ]]; then
-        failures=$((failures + 1))
-      fi
-      ;;
-    run)
-      ((json)) || printf '→ %s\n' "$name" >&2
-      result_line="$(validate::_run_check "$name" "$timeout_seconds")"
-      read -r status exit_code duration <<<"$result_line"
-      validate::_record "$records" "check" "$name" "$status" "$exit_code" "$duration" \
-        "$(profile::_task_spec "$name")"
-      [[ $status == "passed" ]] || failures=$((failures + 1))
-      ((json)) || printf '  %s (%s ms)\n' "$status" "$duration" >&2
-      ;;
-    esac
-  done
-
-  local finished_at repo_root repo_name commit dirty receipt module_dir
-  finished_at="$(validate::_now)"
+  local repo_root module_dir
   repo_root="$(validate::_repo_root)"
-  repo_name="$(basename "$repo_root")"
-  commit="$(validate::_commit "$repo_root")"
-  dirty="$(validate::_dirty "$repo_root")"
   module_dir="$(validate::_module_dir)"
 
+  # The shared result cache is keyed by the working tree, hashed once per run.
+  local tree=""
+  if [[ -n $remote_url ]]; then
+    if ! tree="$(python3 "$module_dir/remote_cache.py" tree "$repo_root")"; then
+      warn "Remote-Cache übersprungen: kein Git-Arbeitsbaum."
+      tree=""
+    fi
+  fi
+
+  if [[ -z $log_dir ]] && ! log_dir="$(validate::_default_log_dir)"; then
+    warn "Kein Log-Verzeichnis im Cache; Check-Ausgaben werden verworfen."
+    log_dir=""
+  fi
+
+  local executable
+  if ! executable="$(validate::_executable)"; then
+    warn "wgx executable not found."
+    return 3
+  fi
+
   local errors_joined="" missing_joined=""
   ((${#_errors[@]})) && errors_joined="$(printf '%s\n' "${_errors[@]}")"
   ((${#_missing[@]})) && missing_joined="$(printf '%s\n' "${_missing[@]}")"
 
-  local receipt_status=0
-  receipt="$(WGX_BASH_VERSION="${BASH_VERSION:-unknown}" python3 "${module_dir}/validate_receipt.py" \
-    "$profile" "$repo_root" "$repo_name" "$commit" "$dirty" \
-    "$started_at" "$finished_at" "$manifest_ok" "$errors_joined" "$missing_joined" \
-    "$timeout_seconds" "$records")" || receipt_status=$?
-  rm -f "$records"
-
-  if ((receipt_status > 1)); then
+  local plan_file
+  plan_file="$(mktemp "${TMPDIR:-/tmp}/wgx-validate-plan.XXXXXX")"
+  local reuse_dir="" cache_root
+  if ((reuse)) && cache_root="$(profile::_cache_root)"; then
+    reuse_dir="$cache_root/validate/reuse"
+  fi
+  validate::_write_plan "$plan_file" "$repo_root" "$profile" "$manifest_ok" "$errors_joined" \
+    "$missing_joined" "$remote_url" "$tree" "$log_dir" "$reuse_dir" "${plan[@]}"
+
+  # One supervisor runs every check and builds the receipt in-process.
+  [[ -n $jobs ]] || jobs="$(profile::validate_profile_jobs "$profile")"
+  local -a options=(--jobs "${jobs:-0}")
+  ((json)) && options+=(--quiet)
+  local receipt receipt_status=0
+  receipt="$(WGX_BASH_VERSION="${BASH_VERSION:-unknown}" WGX_PROFILE_PARSER_BACKEND="${PROFILE_PARSER_BACKEND:-}" \
+    python3 "$module_dir/validate_runner.py" --plan "$plan_file" "${options[@]}" \
+    "$timeout_seconds" "$repo_root" "$executable")" || receipt_status=$?
+  rm -f "$plan_file"
+
+  ((receipt_status == 130)) && return 130
+  if ((receipt_status > 1)) || [[ -z $receipt ]]; then
     warn "Receipt konnte nicht erzeugt werden."
     return 3
   fi
@@ -281,19 +351,14 @@ validate::_profile_run() {
     fi
     [[ -n $output ]] && printf 'Receipt: %s\n' "$output"
   fi
-
-  # The receipt builder is the single source of the pass/fail verdict; the local
-  # failure counter only mirrors it for readable progress output.
-  if ((receipt_status == 0)) && ((failures > 0)); then
-    warn "Receipt meldet bestanden, obwohl $failures Check(s) fehlschlugen."
-    return 3
-  fi
   return $receipt_status
 }
 
 cmd_validate() {
   local json=0 help=0 dry_run=0 ok_bool
-  local profile="" timeout_seconds="" output=""
+  local profile="" timeout_seconds="" output="" remote_url="${WGX_REMOTE_CACHE:-}" log_dir="" jobs=""
+  local reuse=1
+  [[ ${WGX_VALIDATE_REUSE:-1} == 0 ]] && reuse=0
 
   while [ $# -gt 0 ]; do
     case "$1" in
@@ -314,6 +379,22 @@ cmd_validate() {
       output="${1:-}"
       ;;
     --output=*) output="${1#--output=}" ;;
+    --remote-cache)
+      shift || true
+      remote_url="${1:-}"
+      ;;
+    --remote-cache=*) remote_url="${1#--remote-cache=}" ;;
+    --log-dir)
+      shift || true
+      log_dir="${1:-}"
+      ;;
+    --log-dir=*) log_dir="${1#--log-dir=}" ;;
+    --jobs)
+      shift || true
+      jobs="${1:-}"
+      ;;
+    --jobs=*) jobs="${1#--jobs=}" ;;
+    --no-reuse) reuse=0 ;;
     -h | --help) help=1 ;;
     --)
       shift
@@ -358,7 +439,12 @@ cmd_validate() {
       warn "--timeout erwartet eine positive ganze Zahl (Sekunden)."
       return 2
     fi
-    validate::_profile_run "$profile" "$json" "$timeout_seconds" "$dry_run" "$output"
+    if [[ -n $jobs ]] && ! [[ $jobs =~ ^[0-9]+$ ]]; then
+      warn "--jobs erwartet eine nicht-negative ganze Zahl."
+      return 2
+    fi
+    validate::_profile_run "$profile" "$json" "$timeout_seconds" "$dry_run" "$output" "$remote_url" \
+      "$log_dir" "$jobs" "$reuse"
     return $?
   fi
 
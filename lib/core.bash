@@ -41,15 +41,186 @@ has() {
   command -v "$1" >/dev/null 2>&1
 }
 
+# --- Generierte Indizes -----------------------------------------------------
+# Autoload-Stubs und Command-Index liegen unter <Cache-Wurzel>/<Art>/ und
+# gelten, solange weder das Quellverzeichnis noch eine *.bash-Datei darin neuer
+# ist als der Index. Beide werden als Code ausgeführt: Ohne private
+# Cache-Wurzel (WGX_CACHE_DIR, XDG_CACHE_HOME oder HOME) gibt es keinen Index,
+# und gelesen wird nur ein Index, der wie sein Verzeichnis dem Aufrufer gehört
+# und für niemand anderen beschreibbar ist; sonst wird er neu erzeugt.
+
+# Speichert den Indexpfad der Art $2 für die Quelle $3 (Pfad) in $1; schlägt
+# ohne private Cache-Wurzel fehl.
+_wgx_index_path() {
+  local root="${WGX_CACHE_DIR:-${XDG_CACHE_HOME:-${HOME:+$HOME/.cache}}}"
+  printf -v "$1" '%s' ""
+  [[ -n $root ]] || return 1
+  [[ -n ${WGX_CACHE_DIR:-} ]] || root="$root/wgx"
+  printf -v "$1" '%s/%s/%s' "$root" "$2" "${3//\//%}"
+}
+
+# Erfolgreich, wenn Index $1 und sein Verzeichnis $EUID gehören und weder für
+# die Gruppe noch für andere beschreibbar sind.
+_wgx_index_trusted() {
+  local index="$1" dir="${1%/*}" safe
+  [[ -f $index && -O $index && -O $dir ]] || return 1
+  safe="$(find "$dir" "$index" -prune ! -perm -g=w ! -perm -o=w -print 2>/dev/null)" || return 1
+  [[ $safe == "$dir"$'\n'"$index" ]]
+}
+
+_wgx_index_fresh() {
+  local index="$1" dir="$2" f
+  [[ -f $index && ! $dir -nt $index ]] || return 1
+  for f in "$dir"/*.bash; do
+    [[ $f -nt $index ]] && return 1
+  done
+  return 0
+}
+
+# Schreibt die Ausgabe von "${@:2}" atomar und nur für den Aufrufer lesbar
+# nach $1; erfolgreich nur, wenn der Index danach vertrauenswürdig ist.
+_wgx_index_write() {
+  local index="$1" tmp="${1}.$$.tmp"
+  shift
+  if ! (
+    umask 077
+    [[ -d ${index%/*} ]] || mkdir -p "${index%/*}" 2>/dev/null || exit 1
+    "$@" >"$tmp" 2>/dev/null && mv -f "$tmp" "$index" 2>/dev/null
+  ); then
+    rm -f "$tmp" 2>/dev/null
+    return 1
+  fi
+  _wgx_index_trusted "$index"
+}
+
+# Sorgt für einen aktuellen, vertrauenswürdigen Index $1 der Quelle $2, den
+# "${@:3}" erzeugt.
+_wgx_index_ensure() {
+  local index="$1" dir="$2"
+  shift 2
+  if _wgx_index_fresh "$index" "$dir" && _wgx_index_trusted "$index"; then
+    return 0
+  fi
+  _wgx_index_write "$index" "$@"
+}
+
+# --- Modul-Autoload ---------------------------------------------------------
+# Module werden beim Dispatch nicht gesourct. _load_modules registriert für
+# jede Funktion in modules/*.bash einen Stub; der erste Aufruf sourct das
+# Modul (das dabei alle seine Stubs durch die echten Funktionen ersetzt) und
+# wiederholt den Aufruf. Die Stubs stehen in einer generierten Datei unter
+# <Cache-Wurzel>/autoload/ und werden neu erzeugt, sobald modules/ oder ein
+# Modul neuer ist als sie oder die Datei nicht sicher ist (siehe oben); ohne
+# private Cache-Wurzel werden die Module sofort gesourct. Wer eine Modul-Variable liest, ohne vorher eine
+# Funktion des Moduls aufgerufen zu haben, ruft _wgx_require_module.
+#
+#   WGX_AUTOLOAD=0         alle Module sofort sourcen (bisheriges Verhalten)
+#   WGX_TRACE_MODULES=1    Source-Zeit pro Modul und für den Stub-Index auf stderr
+
+declare -gA _WGX_MODULES_LOADED=()
+_WGX_AUTOLOAD_INDEX=""
+
+# Speichert die seit $2 (ein EPOCHREALTIME-Wert) vergangenen Mikrosekunden in $1.
+_wgx_us_since() {
+  local now="${EPOCHREALTIME//[.,]/}" start="${2//[.,]/}"
+  printf -v "$1" '%d' $((10#$now - 10#$start))
+}
+
+# Sourct ein Modul höchstens einmal pro Prozess.
+_wgx_require_module() {
+  local module="$1" trigger="${2:-}"
+  [[ -n ${_WGX_MODULES_LOADED[$module]:-} ]] && return 0
+  _WGX_MODULES_LOADED[$module]=1
+  local file="${WGX_PROJECT_ROOT:-$WGX_DIR}/modules/${module}.bash" start=""
+  [[ ${WGX_TRACE_MODULES:-0} != 0 ]] && start="$EPOCHREALTIME"
+  # shellcheck source=/dev/null
+  source "$file" || return
+  if [[ -n $start ]]; then
+    local us
+    _wgx_us_since us "$start"
+    printf 'wgx: module %s sourced in %s us%s\n' "$module" "$us" "${trigger:+ (via $trigger)}" >&2
+  fi
+}
+
+# Rumpf jedes Stubs: Modul laden, dann den ursprünglichen Aufruf wiederholen.
+_wgx_autoload() {
+  local module="$1" fn="$2"
+  shift
+  if [[ -n ${_WGX_MODULES_LOADED[$module]:-} ]]; then
+    printf '❌ Modul %s definiert %s nicht (Autoload-Index veraltet?).\n' "$module" "$fn" >&2
+    return 127
+  fi
+  _wgx_require_module "$module" "$fn" || return
+  "$@"
+}
+
+# Gibt die Stub-Datei für die Module in $1 aus.
+_wgx_autoload_generate() {
+  local module_dir="$1" f module line name
+  printf '# generated by wgx from %s; do not edit\n' "$module_dir"
+  for f in "$module_dir"/*.bash; do
+    [[ -r $f ]] || continue
+    module="${f##*/}"
+    module="${module%.bash}"
+    [[ $module =~ ^[A-Za-z0-9_-]+$ ]] || continue
+    while IFS= read -r line; do
+      [[ $line =~ ^([A-Za-z_][A-Za-z0-9_:]*)\(\)[[:space:]]*\{ ]] || continue
+      name="${BASH_REMATCH[1]}"
+      printf '%s() { _wgx_autoload %s %s "$@"; }\n' "$name" "$module" "$name"
+    done <"$f"
+  done
+}
+
+# Setzt _WGX_AUTOLOAD_INDEX auf einen aktuellen Stub-Index; schlägt fehl, wenn
+# keiner geschrieben werden kann.
+_wgx_autoload_index() {
+  local module_dir="$1" index
+  _WGX_AUTOLOAD_INDEX=""
+  _wgx_index_path index autoload "${module_dir}.bash" || return 1
+  _wgx_index_ensure "$index" "$module_dir" _wgx_autoload_generate "$module_dir" || return 1
+  _WGX_AUTOLOAD_INDEX="$index"
+}
+
+# Registriert die Modul-Stubs; mit WGX_AUTOLOAD=0 werden die Module sofort
+# gesourct, mit needs_profile=0 dann ohne modules/profile.bash.
 _load_modules() {
+  local needs_profile="${1:-1}"
   local module_dir="${WGX_PROJECT_ROOT:-$WGX_DIR}/modules"
-  if [ -d "$module_dir" ]; then
-    local f
-    for f in "$module_dir"/*.bash; do
-      # shellcheck source=/dev/null
-      [ -r "$f" ] && source "$f"
-    done
+  [ -d "$module_dir" ] || return 0
+  local start=""
+  [[ ${WGX_TRACE_MODULES:-0} != 0 ]] && start="$EPOCHREALTIME"
+  if [[ ${WGX_AUTOLOAD:-1} != 0 ]] && _wgx_autoload_index "$module_dir"; then
+    # shellcheck source=/dev/null
+    source "$_WGX_AUTOLOAD_INDEX" || return
+    if [[ -n $start ]]; then
+      local us
+      _wgx_us_since us "$start"
+      printf 'wgx: autoload index %s loaded in %s us\n' "$_WGX_AUTOLOAD_INDEX" "$us" >&2
+    fi
+    return 0
   fi
+  local f module
+  for f in "$module_dir"/*.bash; do
+    [ -r "$f" ] || continue
+    module="${f##*/}"
+    module="${module%.bash}"
+    if [[ $needs_profile == 0 && $module == profile ]]; then
+      continue
+    fi
+    _wgx_require_module "$module"
+  done
+}
+
+# Ein Command deklariert im Dateikopf "# wgx:needs-profile", wenn er das
+# Manifest braucht. Gelesen wird nur der Kopf, ohne den Command zu laden.
+wgx_command_needs_profile() {
+  local file="$1" line n=0
+  [ -r "$file" ] || return 1
+  while IFS= read -r line && ((n < 10)); do
+    [[ $line == "# wgx:needs-profile" ]] && return 0
+    n=$((n + 1))
+  done <"$file"
+  return 1
 }
 
 wgx_command_files() {
@@ -62,23 +233,81 @@ wgx_command_files() {
   done
 }
 
-wgx_available_commands() {
-  local -a commands=(help)
-  local file name
-  while IFS= read -r file; do
-    name=$(basename "$file")
-    name=${name%.bash}
-    commands+=("$name")
-  done < <(wgx_command_files)
+# --- Command-Index ----------------------------------------------------------
+# Eine Zeile pro Command, nach Namen sortiert:
+#   <name>\t<Datei>\t<Einstiegsfunktion>\t<needs-profile 0|1>
+# "-" steht für ein leeres Feld (help ist eingebaut und hat keine Datei).
+# --list, die Hilfe und der Dispatch lesen nur diesen Index; er wird neu
+# erzeugt, sobald cmd/ oder ein Command neuer ist als er.
+
+declare -ga _WGX_CMD_NAMES=()
+declare -gA _WGX_CMD_FILE=()
+declare -gA _WGX_CMD_ENTRY=()
+declare -gA _WGX_CMD_NEEDS_PROFILE=()
+
+# Gibt die Funktion aus, die der Dispatch nach dem Sourcen aufruft:
+# cmd_<name>, sonst wgx_command_main, sonst "-". Andere Definitionsformen
+# (function cmd_x {...}) fängt der Dispatch über declare -F ab.
+_wgx_command_entry() {
+  local file="$1" name="$2" line entry="-"
+  while IFS= read -r line; do
+    if [[ $line == "cmd_${name}()"* ]]; then
+      entry="cmd_${name}"
+      break
+    fi
+    [[ $line == "wgx_command_main()"* ]] && entry="wgx_command_main"
+  done <"$file"
+  printf '%s' "$entry"
+}
+
+_wgx_command_index_generate() {
+  local cmd_dir="$1" f name needs
+  {
+    printf 'help\t-\twgx_usage\t0\n'
+    for f in "$cmd_dir"/*.bash; do
+      [[ -r $f ]] || continue
+      name="${f##*/}"
+      name="${name%.bash}"
+      [[ $name =~ ^[A-Za-z0-9_-]+$ ]] || continue
+      needs=0
+      wgx_command_needs_profile "$f" && needs=1
+      printf '%s\t%s\t%s\t%s\n' "$name" "$f" "$(_wgx_command_entry "$f" "$name")" "$needs"
+    done
+  } | sort -t $'\t' -k1,1 -u
+}
 
-  printf '%s\n' "${commands[@]}" | sort -u
+_wgx_command_index_read() {
+  local name file entry needs
+  while IFS=$'\t' read -r name file entry needs; do
+    [[ -n $name ]] || continue
+    _WGX_CMD_NAMES+=("$name")
+    _WGX_CMD_FILE[$name]="$file"
+    _WGX_CMD_ENTRY[$name]="$entry"
+    _WGX_CMD_NEEDS_PROFILE[$name]="$needs"
+  done
+}
+
+# Liest den Command-Index einmal pro Prozess; ohne private, beschreibbare
+# Cache-Wurzel wird er im Speicher erzeugt.
+wgx_command_index_load() {
+  ((${#_WGX_CMD_NAMES[@]})) && return 0
+  local cmd_dir="${WGX_PROJECT_ROOT:-$WGX_DIR}/cmd" index
+  if _wgx_index_path index commands "${cmd_dir}.tsv" &&
+    _wgx_index_ensure "$index" "$cmd_dir" _wgx_command_index_generate "$cmd_dir"; then
+    _wgx_command_index_read <"$index"
+  else
+    _wgx_command_index_read < <(_wgx_command_index_generate "$cmd_dir")
+  fi
+}
+
+wgx_available_commands() {
+  wgx_command_index_load
+  printf '%s\n' "${_WGX_CMD_NAMES[@]}"
 }
 
 wgx_print_command_list() {
-  local command
-  while IFS= read -r command; do
-    printf '  %s\n' "$command"
-  done < <(wgx_available_commands)
+  wgx_command_index_load
+  printf '  %s\n' "${_WGX_CMD_NAMES[@]}"
 }
 
 wgx_usage() {
@@ -92,8 +321,10 @@ Commands:
 $(wgx_print_command_list)
 
 More:
-  wgx --list     Nur verfügbare Befehle anzeigen
-  wgx --version  Runner-Version anzeigen
+  wgx --list                Nur verfügbare Befehle anzeigen
+  wgx --version             Runner-Version anzeigen
+  wgx --cache stats|clear   Profil-Cache anzeigen oder leeren
+  wgx --serve [--stats]     Residenten Profil-Server starten bzw. abfragen
 
 USAGE
 }
@@ -116,21 +347,43 @@ wgx_main() {
     wgx_available_commands
     return 0
     ;;
+  --cache)
+    _load_modules
+    profile::cache_cli "$@"
+    return
+    ;;
+  --serve)
+    _load_modules
+    profile::serve_cli "$@"
+    return
+    ;;
   esac
 
-  _load_modules
-
   if declare -F "cmd_${sub}" >/dev/null 2>&1; then
+    _load_modules
     "cmd_${sub}" "$@"
     return
   fi
 
-  local cmd_dir="${WGX_PROJECT_ROOT:-$WGX_DIR}/cmd"
-  local file="${cmd_dir}/${sub}.bash"
-  if [ -r "$file" ]; then
+  wgx_command_index_load
+  local file="" entry=""
+  if [[ -n $sub ]]; then
+    file="${_WGX_CMD_FILE[$sub]:-}"
+    entry="${_WGX_CMD_ENTRY[$sub]:-}"
+  fi
+  if [[ -n $file && $file != - && -r $file ]]; then
+    # Das Profil wird nie beim Dispatch geparst: Commands laden es erst beim
+    # ersten Zugriff über profile::ensure_loaded, Hilfeausgaben also nie.
+    if [[ ${_WGX_CMD_NEEDS_PROFILE[$sub]:-0} == 1 ]]; then
+      _load_modules 1
+    else
+      _load_modules 0
+    fi
     # shellcheck source=/dev/null
     source "$file"
-    if declare -F "cmd_${sub}" >/dev/null 2>&1; then
+    if [[ $entry != - ]] && declare -F "$entry" >/dev/null 2>&1; then
+      "$entry" "$@"
+    elif declare -F "cmd_${sub}" >/dev/null 2>&1; then
       "cmd_${sub}" "$@"
     elif declare -F "wgx_command_main" >/dev/null 2>&1; then
       wgx_command_main "$@"
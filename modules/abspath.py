@@ -1,5 +0,0 @@
-#!/usr/bin/env python3
-import os
-import sys
-
-print(os.path.abspath(sys.argv[1]))
@@ -1,13 +1,20 @@
 #!/usr/bin/env bash
 
 # shellcheck shell=bash
-# NOTE: This module intentionally stays Bash-only. Parser output is validated before any eval.
+# NOTE: This module intentionally stays Bash-only. Parser output is read as a
+# NUL-delimited record stream and assigned as data; nothing it emits is evaluated.
 
 PROFILE_FILE=""
 PROFILE_VERSION=""
+# Backend that loaded the manifest (cyaml, pyyaml, builtin or json).
+PROFILE_PARSER_BACKEND=""
 WGX_REQUIRED_RANGE=""
 WGX_REQUIRED_MIN=""
 WGX_PROFILE_LOADED=""
+# Stamp file carrying the loaded manifest's mtime; see profile::_is_current.
+PROFILE_STAMP=""
+# Result of profile::ensure_version for the loaded manifest; empty until checked.
+PROFILE_VERSION_STATUS=""
 
 export WGX_REPO_KIND=""
 export WGX_DIR_WEB=""
@@ -15,14 +22,15 @@ export WGX_DIR_API=""
 export WGX_DIR_DATA=""
 
 # shellcheck disable=SC2034
-WGX_AVAILABLE_CAPS=(task-array status-dirs tasks-json validate validate-profiles env-defaults env-overrides workflows)
+WGX_AVAILABLE_CAPS=(task-array status-dirs tasks-json validate validate-profiles env-defaults env-overrides env-expansion workflows)
 
 declare -ga WGX_REQUIRED_CAPS=()
 declare -ga WGX_ENV_KEYS=()
-
-declare -gA WGX_ENV_BASE_MAP=()
-declare -gA WGX_ENV_DEFAULT_MAP=()
-declare -gA WGX_ENV_OVERRIDE_MAP=()
+# Effective env, merged by the parser: sorted KEY=value items for one `export`.
+# Keys in WGX_ENV_DEFERRED reference the process environment; the loader
+# expands them once per load (profile::_env_finish).
+declare -ga WGX_ENV_EXPORTS=()
+declare -ga WGX_ENV_DEFERRED=()
 
 # shellcheck disable=SC2034
 declare -ga WGX_TASK_ORDER=()
@@ -30,16 +38,39 @@ declare -gA WGX_TASK_CMDS=()
 declare -gA WGX_TASK_DESC=()
 declare -gA WGX_TASK_GROUP=()
 declare -gA WGX_TASK_SAFE=()
+# Array commands pre-split by the parser: task key -> "<offset> <count>" into
+# WGX_TASK_ARGV_ITEMS, so starting an array task decodes no JSON.
+declare -gA WGX_TASK_ARGV=()
+declare -ga WGX_TASK_ARGV_ITEMS=()
+# Declared inputs:/outputs: globs, one per line; tasks with inputs are cached.
+declare -gA WGX_TASK_INPUTS=()
+declare -gA WGX_TASK_OUTPUTS=()
+# String tasks that run under plain `bash -c` (shell: plain) instead of the
+# default login shell. shell: exec tasks arrive as array commands.
+declare -gA WGX_TASK_SHELL=()
+# Declared limits: as "memory_mb=N cpu_seconds=N open_files=N timeout=N".
+declare -gA WGX_TASK_LIMITS=()
+# Lookup index from the parser: task names and workflow steps as spelled in the
+# manifest (and every normalized key) -> normalized key; plus the sorted keys.
+declare -gA WGX_TASK_INDEX=()
+declare -ga WGX_TASK_KEYS=()
 
 declare -gA WGX_WORKFLOW_TASKS=()
+# Workflow graph: name -> one "<step> <need>..." line per step (task keys).
+declare -gA WGX_WORKFLOW_NEEDS=()
 
 # Declared validation profiles: profile name -> space separated task names.
 declare -gA WGX_VALIDATE_PROFILES=()
 # Explicit skip declarations: task name -> "unsupported:reason" | "ci-only:reason".
 declare -gA WGX_VALIDATE_SKIP=()
+# Per profile: declared concurrency, and the checks that must run alone.
+declare -gA WGX_VALIDATE_JOBS=()
+declare -gA WGX_VALIDATE_SERIAL=()
 
 profile::_reset() {
   PROFILE_VERSION=""
+  PROFILE_VERSION_STATUS=""
+  PROFILE_PARSER_BACKEND=""
   WGX_REQUIRED_RANGE=""
   WGX_REQUIRED_MIN=""
   WGX_REPO_KIND=""
@@ -48,18 +79,28 @@ profile::_reset() {
   WGX_DIR_DATA=""
   WGX_REQUIRED_CAPS=()
   WGX_ENV_KEYS=()
+  WGX_ENV_EXPORTS=()
+  WGX_ENV_DEFERRED=()
   # shellcheck disable=SC2034
   WGX_TASK_ORDER=()
-  WGX_ENV_BASE_MAP=()
-  WGX_ENV_DEFAULT_MAP=()
-  WGX_ENV_OVERRIDE_MAP=()
   WGX_TASK_CMDS=()
   WGX_TASK_DESC=()
   WGX_TASK_GROUP=()
   WGX_TASK_SAFE=()
+  WGX_TASK_ARGV=()
+  WGX_TASK_ARGV_ITEMS=()
+  WGX_TASK_INPUTS=()
+  WGX_TASK_OUTPUTS=()
+  WGX_TASK_SHELL=()
+  WGX_TASK_LIMITS=()
+  WGX_TASK_INDEX=()
+  WGX_TASK_KEYS=()
   WGX_WORKFLOW_TASKS=()
+  WGX_WORKFLOW_NEEDS=()
   WGX_VALIDATE_PROFILES=()
   WGX_VALIDATE_SKIP=()
+  WGX_VALIDATE_JOBS=()
+  WGX_VALIDATE_SERIAL=()
   WGX_PROFILE_LOADED=""
 }
 
@@ -85,74 +126,38 @@ profile::_module_dir() {
   cd "$(dirname "${BASH_SOURCE[0]}")" && pwd
 }
 
-profile::_abspath() {
-  local p="$1" resolved=""
-
-  # Strategy 1: Fast POSIX path resolution (existing directories/files)
-  # This works on Linux, macOS, and BSD without external dependencies.
-  # It resolves directory symlinks (via pwd -P) but keeps filenames as-is,
-  # matching os.path.abspath behavior for files while being robust for directories.
-  if [[ -e "$p" ]]; then
-    if [[ -d "$p" ]]; then
-      resolved="$(cd "$p" >/dev/null 2>&1 && pwd -P)"
-      printf '%s\n' "$resolved"
-      return 0
-    else
-      local dir base
-      dir="$(dirname "$p")"
-      base="$(basename "$p")"
-      if [[ -d "$dir" ]]; then
-        resolved="$(cd "$dir" >/dev/null 2>&1 && pwd -P)"
-        printf '%s/%s\n' "$resolved" "$base"
-        return 0
-      fi
-    fi
-  fi
-
-  # Note: We intentionally avoid `realpath` and `readlink -f` here because
-  # they dereference file symlinks, which creates inconsistent behavior
-  # compared to the Python fallback (os.path.abspath) which does not.
-  # We favor consistent "absolute path" semantics over "canonical path".
+# Stores the normalized task name of $2 in the variable named $1, without a
+# subshell. Must stay synchronized with normalize_task_name() in
+# profile_parser.py: re.sub(r'-+', '-', name.replace(' ', '').replace('_', '-').lower())
+profile::_normalize_task_name_into() {
+  local -n __wgx_norm_out="$1"
+  local __wgx_norm="${2:-}"
+  __wgx_norm="${__wgx_norm// /}"  # remove spaces
+  __wgx_norm="${__wgx_norm//_/-}" # normalize underscores to dashes
+  while [[ $__wgx_norm == *--* ]]; do
+    __wgx_norm="${__wgx_norm//--/-}" # collapse repeated dashes
+  done
+  __wgx_norm_out="${__wgx_norm,,}"
+}
 
-  # Strategy 2: Python Fallback (slow but robust cross-platform)
-  local module_dir
-  module_dir="$(profile::_module_dir)"
-  if profile::_have_cmd python3; then
-    if resolved="$(python3 "${module_dir}/abspath.py" "$p" 2>/dev/null)"; then
-      if [[ -n $resolved ]]; then
-        printf '%s\n' "$resolved"
-        return 0
-      fi
-    fi
-  fi
+profile::_normalize_task_name() {
+  local normalized
+  profile::_normalize_task_name_into normalized "${1:-}"
+  printf '%s' "$normalized"
+}
 
-  # Strategy 3: Best-effort fallback for non-existing paths without Python
-  # Try to resolve the directory part if it exists (handles ../ghost.txt).
-  local dir base
-  dir="$(dirname "$p")"
-  base="$(basename "$p")"
-  if [[ -d "$dir" ]]; then
-    resolved="$(cd "$dir" >/dev/null 2>&1 && pwd -P)"
-    printf '%s/%s\n' "$resolved" "$base"
+# Stores the task key for name $2 in the variable named $1: an O(1) lookup in
+# the parser's WGX_TASK_INDEX, normalizing in Bash only for spellings the
+# manifest does not contain (e.g. `wgx task Build_App`). The key may still
+# name an undefined task; callers check WGX_TASK_CMDS.
+profile::_task_key_into() {
+  local -n __wgx_key_out="$1"
+  local __wgx_key_name="${2:-}"
+  if [[ -n $__wgx_key_name && -n ${WGX_TASK_INDEX[$__wgx_key_name]:-} ]]; then
+    __wgx_key_out="${WGX_TASK_INDEX[$__wgx_key_name]}"
     return 0
   fi
-
-  # Ultimate fallback: Simple string manipulation (does NOT normalize ..)
-  if [[ "$p" == /* ]]; then
-    printf '%s\n' "$p"
-  else
-    printf '%s/%s\n' "$(pwd -P)" "$p"
-  fi
-}
-
-profile::_normalize_task_name() {
-  local name="${1:-}"
-  name="${name// /}"                        # remove spaces
-  name="${name//_/-}"                       # normalize underscores to dashes
-  name="$(printf '%s' "$name" | tr -s '-')" # collapse repeated dashes
-  printf '%s' "${name,,}"
-  # Note: This normalization must stay synchronized with profile_parser.py's implementation
-  # which uses re.sub(r'-+', '-', name.replace(' ', '').replace('_', '-').lower())
+  profile::_normalize_task_name_into __wgx_key_out "$__wgx_key_name"
 }
 
 profile::_ansi_c_word_is_safe() {
@@ -238,6 +243,8 @@ profile::_parser_line_is_safe() {
   return 1
 }
 
+# Reader for the legacy assignment stream (profile_parser.py --format=assign).
+# The loader itself consumes records; this gate stays for assignment consumers.
 profile::_apply_parser_line() {
   local line="${1:-}"
   line="${line//$'\r'/}"
@@ -255,127 +262,382 @@ profile::_apply_parser_line() {
   eval "$line"
 }
 
+# --- Record stream ----------------------------------------------------------
+# profile_parser.py --format=records emits NUL-delimited <target> <key> <value>
+# triples. Targets are dispatched through a fixed table straight into the
+# profile variables, so parser output is only ever assigned as data: there is
+# no eval and no intermediate flat-variable stage. A truncated stream or an
+# unknown target fails the load.
+
+profile::_apply_record_stream() {
+  local target="" key="" value=""
+  while IFS= read -r -d '' target && IFS= read -r -d '' key && IFS= read -r -d '' value; do
+    case "$target" in
+    PROFILE_VERSION) PROFILE_VERSION="$value" ;;
+    PROFILE_PARSER_BACKEND) PROFILE_PARSER_BACKEND="$value" ;;
+    WGX_REQUIRED_RANGE) WGX_REQUIRED_RANGE="$value" ;;
+    WGX_REQUIRED_MIN) WGX_REQUIRED_MIN="$value" ;;
+    WGX_REPO_KIND) WGX_REPO_KIND="$value" ;;
+    WGX_DIR_WEB) WGX_DIR_WEB="$value" ;;
+    WGX_DIR_API) WGX_DIR_API="$value" ;;
+    WGX_DIR_DATA) WGX_DIR_DATA="$value" ;;
+    WGX_REQUIRED_CAPS) WGX_REQUIRED_CAPS+=("$value") ;;
+    WGX_TASK_ORDER) WGX_TASK_ORDER+=("$value") ;;
+    WGX_TASK_KEYS) WGX_TASK_KEYS+=("$value") ;;
+    WGX_TASK_ARGV_ITEMS) WGX_TASK_ARGV_ITEMS+=("$value") ;;
+    WGX_ENV_EXPORTS) WGX_ENV_EXPORTS+=("$value") ;;
+    WGX_ENV_DEFERRED) WGX_ENV_DEFERRED+=("$value") ;;
+    *)
+      if [[ -z $key ]]; then
+        echo "FAIL: profile record without key for target: $target" >&2
+        return 1
+      fi
+      case "$target" in
+      WGX_WORKFLOW_TASKS) WGX_WORKFLOW_TASKS["$key"]="$value" ;;
+      WGX_WORKFLOW_NEEDS) WGX_WORKFLOW_NEEDS["$key"]="$value" ;;
+      WGX_VALIDATE_PROFILES) WGX_VALIDATE_PROFILES["$key"]="$value" ;;
+      WGX_VALIDATE_SKIP) WGX_VALIDATE_SKIP["$key"]="$value" ;;
+      WGX_VALIDATE_JOBS) WGX_VALIDATE_JOBS["$key"]="$value" ;;
+      WGX_VALIDATE_SERIAL) WGX_VALIDATE_SERIAL["$key"]="$value" ;;
+      WGX_TASK_CMDS) WGX_TASK_CMDS["$key"]="$value" ;;
+      WGX_TASK_DESC) WGX_TASK_DESC["$key"]="$value" ;;
+      WGX_TASK_GROUP) WGX_TASK_GROUP["$key"]="$value" ;;
+      WGX_TASK_SAFE) WGX_TASK_SAFE["$key"]="$value" ;;
+      WGX_TASK_INDEX) WGX_TASK_INDEX["$key"]="$value" ;;
+      WGX_TASK_ARGV) WGX_TASK_ARGV["$key"]="$value" ;;
+      WGX_TASK_INPUTS) WGX_TASK_INPUTS["$key"]="$value" ;;
+      WGX_TASK_OUTPUTS) WGX_TASK_OUTPUTS["$key"]="$value" ;;
+      WGX_TASK_SHELL) WGX_TASK_SHELL["$key"]="$value" ;;
+      WGX_TASK_LIMITS) WGX_TASK_LIMITS["$key"]="$value" ;;
+      *)
+        echo "FAIL: profile_parser.py emitted an unknown record target: $target" >&2
+        return 1
+        ;;
+      esac
+      ;;
+    esac
+  done
+  if [[ -n $target ]]; then
+    echo "FAIL: profile record stream is truncated" >&2
+    return 1
+  fi
+  return 0
+}
+
+# --- Compiled-profile cache -------------------------------------------------
+# The parser's record stream is stored on disk, keyed by the manifest's sha256,
+# the parser's own sha256 (its version), the selected platform variant and the
+# requested parser backend. A hit is read by the same record reader as a fresh
+# parse; only Python is skipped. What the parser wrote to stderr (warnings,
+# deprecation notes) is kept as <entry>.notes and replayed on a hit, so the
+# diagnostics do not depend on the cache state.
+
+profile::_cache_enabled() {
+  [[ ${WGX_PROFILE_CACHE:-1} != 0 ]]
+}
+
+profile::_backend_request() {
+  # WGX_PROFILE_BACKEND as passed to the parser; unknown names fail there.
+  local backend="${WGX_PROFILE_BACKEND:-auto}"
+  case "$backend" in
+  auto | cyaml | pyyaml | builtin) printf '%s' "$backend" ;;
+  *) return 1 ;;
+  esac
+}
+
+profile::_cache_root() {
+  # Print the cache root; fails without WGX_CACHE_DIR, XDG_CACHE_HOME or HOME
+  # instead of falling back to a shared directory like /tmp.
+  local root="${WGX_CACHE_DIR:-${XDG_CACHE_HOME:-${HOME:+$HOME/.cache}}}"
+  [[ -n $root ]] || return 1
+  [[ -n ${WGX_CACHE_DIR:-} ]] || root="$root/wgx"
+  printf '%s' "$root"
+}
+
+profile::_cache_dir() {
+  local root
+  root="$(profile::_cache_root)" || return 1
+  printf '%s/profiles' "$root"
+}
+
+profile::_platform_key() {
+  # Mirrors profile_parser.py's platform_keys, which pick the cmd/args variant.
+  case "${OSTYPE:-}" in
+  darwin*) printf 'darwin' ;;
+  linux*) printf 'linux' ;;
+  msys* | cygwin* | win*) printf 'win32' ;;
+  *) printf 'default' ;;
+  esac
+}
+
+profile::_sha256() {
+  # Print the sha256 of each file, one per line, with a single hashing process.
+  if profile::_have_cmd sha256sum; then
+    sha256sum -- "$@" 2>/dev/null
+  elif profile::_have_cmd shasum; then
+    shasum -a 256 -- "$@" 2>/dev/null
+  else
+    return 1
+  fi
+}
+
+profile::_cache_entry() {
+  # Print the cache entry path for a manifest; fails when caching is unavailable.
+  local file="$1" parser="$2"
+  profile::_cache_enabled || return 1
+  local backend
+  backend="$(profile::_backend_request)" || return 1
+  local manifest_sum="" parser_sum="" _
+  {
+    read -r manifest_sum _ || return 1
+    read -r parser_sum _ || return 1
+  } < <(profile::_sha256 "$file" "$parser")
+  [[ $manifest_sum =~ ^[0-9a-f]{64}$ && $parser_sum =~ ^[0-9a-f]{64}$ ]] || return 1
+  # WGX_PROFILE_DEPRECATION=quiet drops the parser's notes, so it gets its own entry.
+  local notes="" dir
+  [[ ${WGX_PROFILE_DEPRECATION:-warn} == quiet ]] && notes="-quiet"
+  dir="$(profile::_cache_dir)" || return 1
+  printf '%s/%s-%s-%s-%s%s.rec' "$dir" "$manifest_sum" "${parser_sum:0:16}" \
+    "$(profile::_platform_key)" "$backend" "$notes"
+}
+
+profile::_cache_prune() {
+  # Keep at most WGX_PROFILE_CACHE_MAX *.EXT files (default: entries); the
+  # oldest ones go first.
+  local dir="$1" ext="${2:-rec}" max="${WGX_PROFILE_CACHE_MAX:-256}"
+  [[ $max =~ ^[0-9]+$ ]] || max=256
+  local -a entries=("$dir"/*."$ext")
+  [[ -e ${entries[0]} ]] || return 0
+  local oldest entry
+  while ((${#entries[@]} > max)); do
+    oldest="${entries[0]}"
+    for entry in "${entries[@]}"; do
+      [[ $entry -ot $oldest ]] && oldest="$entry"
+    done
+    rm -f "$oldest"
+    [[ $ext == rec ]] && rm -f "${oldest%.rec}.notes"
+    entries=("$dir"/*."$ext")
+    [[ -e ${entries[0]} ]] || return 0
+  done
+}
+
+profile::cache_stats() {
+  local dir
+  dir="$(profile::_cache_dir)" || dir=""
+  local -a entries=()
+  if [[ -d $dir ]]; then
+    entries=("$dir"/*.rec)
+    [[ -e ${entries[0]} ]] || entries=()
+  fi
+  local bytes=0
+  if ((${#entries[@]})); then
+    bytes="$(cat -- "${entries[@]}" | wc -c)"
+    bytes="${bytes//[[:space:]]/}"
+  fi
+  local enabled="yes"
+  profile::_cache_enabled && [[ -n $dir ]] || enabled="no"
+  printf 'dir: %s\n' "$dir"
+  printf 'enabled: %s\n' "$enabled"
+  printf 'entries: %s\n' "${#entries[@]}"
+  printf 'bytes: %s\n' "$bytes"
+}
+
+profile::cache_clear() {
+  local dir
+  dir="$(profile::_cache_dir)" || dir=""
+  local -a entries=()
+  if [[ -d $dir ]]; then
+    entries=("$dir"/*.rec "$dir"/*.tmp)
+  fi
+  local removed=0 entry
+  for entry in "${entries[@]}"; do
+    [[ -e $entry ]] || continue
+    rm -f -- "$entry" && removed=$((removed + 1))
+  done
+  [[ -d $dir ]] && rm -f -- "$dir"/*.notes
+  printf 'removed: %s\n' "$removed"
+}
+
+profile::cache_cli() {
+  local action="${1:-stats}"
+  case "$action" in
+  stats) profile::cache_stats ;;
+  clear) profile::cache_clear ;;
+  -h | --help)
+    cat <<'USAGE'
+Usage: wgx --cache stats|clear
+  stats  Show location, entry count and size of the compiled-profile cache
+  clear  Remove all cached profile compilations
+
+Environment:
+  WGX_CACHE_DIR          Cache root (default: ${XDG_CACHE_HOME:-~/.cache}/wgx)
+  WGX_PROFILE_CACHE=0    Disable the compiled-profile cache
+  WGX_PROFILE_CACHE_MAX  Maximum number of cached compilations (default: 256)
+USAGE
+    ;;
+  *)
+    warn "unknown cache action: $action (expected: stats, clear)"
+    return 2
+    ;;
+  esac
+}
+
+# --- Resident profile server ------------------------------------------------
+# `wgx --serve` keeps compiled manifests in memory (modules/profile_server.py)
+# and answers over a Unix socket. The loader asks it first when the socket
+# exists and socat or `nc -U` can reach it; any other outcome falls back to the
+# disk cache and profile_parser.py. Answer format: see profile_server.py.
+
+# Exit status of profile::_serve_query when the server gave no usable answer.
+PROFILE_SERVE_UNAVAILABLE=75
+
+profile::_serve_socket() {
+  local root
+  if [[ -n ${WGX_SERVE_SOCKET:-} ]]; then
+    printf '%s' "$WGX_SERVE_SOCKET"
+    return 0
+  fi
+  root="$(profile::_cache_root)" || return 1
+  printf '%s/serve.sock' "$root"
+}
+
+profile::_serve_apply() {
+  local header state code count line i
+  IFS= read -r header || return "$PROFILE_SERVE_UNAVAILABLE"
+  read -r state code count <<<"$header"
+  case "$state" in
+  ok | error) ;;
+  *) return "$PROFILE_SERVE_UNAVAILABLE" ;;
+  esac
+  [[ $code =~ ^[0-9]+$ && $count =~ ^[0-9]+$ ]] || return "$PROFILE_SERVE_UNAVAILABLE"
+  for ((i = 0; i < count; i++)); do
+    IFS= read -r line || return "$PROFILE_SERVE_UNAVAILABLE"
+    if [[ $state == error || ${WGX_PROFILE_DEPRECATION:-warn} != quiet ]]; then
+      printf '%s\n' "$line" >&2
+    fi
+  done
+  if [[ $state == error ]]; then
+    ((code != 0 && code != PROFILE_SERVE_UNAVAILABLE)) || code=1
+    return "$code"
+  fi
+  profile::_apply_record_stream 2>/dev/null || return "$PROFILE_SERVE_UNAVAILABLE"
+}
+
+profile::_serve_query() {
+  local file="$1" socket backend
+  [[ ${WGX_SERVE:-1} != 0 ]] || return "$PROFILE_SERVE_UNAVAILABLE"
+  backend="$(profile::_backend_request)" || return "$PROFILE_SERVE_UNAVAILABLE"
+  socket="$(profile::_serve_socket)" || return "$PROFILE_SERVE_UNAVAILABLE"
+  [[ -S $socket ]] || return "$PROFILE_SERVE_UNAVAILABLE"
+  local -a client
+  if profile::_have_cmd socat; then
+    client=(socat -t 30 - "UNIX-CONNECT:${socket}")
+  elif profile::_have_cmd nc; then
+    client=(nc -U "$socket")
+  else
+    return "$PROFILE_SERVE_UNAVAILABLE"
+  fi
+  [[ $file == /* ]] || file="${PWD%/}/${file}"
+  profile::_serve_apply < <(printf 'compile\t%s\t%s\n' "$file" "$backend" | "${client[@]}" 2>/dev/null)
+}
+
+profile::serve_cli() {
+  local module_dir socket
+  module_dir="$(profile::_module_dir)"
+  socket="$(profile::_serve_socket)" || die "Kein Cache-Verzeichnis für den Socket; setze WGX_SERVE_SOCKET oder HOME."
+  case "${1:-}" in
+  "")
+    profile::_have_cmd python3 || die "wgx --serve benötigt python3."
+    if ! profile::_have_cmd socat && ! profile::_have_cmd nc; then
+      warn "Weder socat noch nc gefunden: wgx fragt den Profil-Server nicht ab."
+    fi
+    python3 "${module_dir}/profile_server.py" serve "$socket" "${WGX_SERVE_IDLE:-900}"
+    ;;
+  --stats) python3 "${module_dir}/profile_server.py" stats "$socket" ;;
+  --stop) python3 "${module_dir}/profile_server.py" stop "$socket" ;;
+  -h | --help)
+    cat <<'USAGE'
+Usage: wgx --serve [--stats|--stop]
+  (none)   Run the resident profile server in the foreground
+  --stats  Show entries, hits, misses and invalidations of the running server
+  --stop   Stop the running server
+
+The loader uses the server when its socket exists and socat or nc (-U) is
+installed, and falls back to the normal parse otherwise.
+
+Environment:
+  WGX_SERVE_SOCKET  Socket path (default: <cache root>/serve.sock)
+  WGX_SERVE_IDLE    Seconds without requests before the server exits (default: 900)
+  WGX_SERVE=0       Never ask the server
+USAGE
+    ;;
+  *)
+    warn "unknown serve option: $1 (expected: --stats, --stop)"
+    return 2
+    ;;
+  esac
+}
+
 profile::_python_parse() {
-  local file="$1" output
+  local file="$1"
   local module_dir
   module_dir="$(profile::_module_dir)"
-  profile::_have_cmd python3 || return 1
-  output="$(python3 "${module_dir}/profile_parser.py" "$file")"
-  local status=$?
-  if ((status != 0)); then
-    return $status
-  fi
+  local parser="${module_dir}/profile_parser.py"
 
-  if [[ -z $output ]]; then
+  local served=0
+  profile::_serve_query "$file" || served=$?
+  if ((served == 0)); then
     return 0
+  elif ((served != PROFILE_SERVE_UNAVAILABLE)); then
+    return "$served"
   fi
+  profile::_reset
 
-  local line
-  while IFS= read -r line; do
-    [[ -n $line ]] || continue
-    if ! profile::_apply_parser_line "$line"; then
-      return 1
+  local entry=""
+  if entry="$(profile::_cache_entry "$file" "$parser")" && [[ -f $entry ]]; then
+    if profile::_apply_record_stream <"$entry"; then
+      [[ -f ${entry%.rec}.notes ]] && cat -- "${entry%.rec}.notes" >&2
+      return 0
     fi
-  done <<<"$output"
+    # A damaged entry is dropped and the manifest is compiled again.
+    rm -f "$entry"
+    profile::_reset
+  fi
 
-  return 0
-}
+  profile::_have_cmd python3 || return 1
 
-profile::_task_key_from_var() {
-  # Convert internal variable naming (with underscores) to user-facing task names (with dashes)
-  local key="$1"
-  printf '%s' "${key//_/-}"
-}
-
-profile::_convert_flat_to_arrays() {
-  # Convert flat variables (VAR_key=value) to associative arrays (VAR[key]=value)
-  # This allows the parser to output safe flat variables while maintaining the array interface
-  local var key value
-
-  # Convert WGX_ENV_DEFAULT_MAP_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_ENV_DEFAULT_MAP_}"
-    value="${!var}"
-    WGX_ENV_DEFAULT_MAP["$key"]="$value"
-  done < <(compgen -v WGX_ENV_DEFAULT_MAP_)
-
-  # Convert WGX_ENV_BASE_MAP_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_ENV_BASE_MAP_}"
-    value="${!var}"
-    WGX_ENV_BASE_MAP["$key"]="$value"
-  done < <(compgen -v WGX_ENV_BASE_MAP_)
-
-  # Convert WGX_ENV_OVERRIDE_MAP_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_ENV_OVERRIDE_MAP_}"
-    value="${!var}"
-    WGX_ENV_OVERRIDE_MAP["$key"]="$value"
-  done < <(compgen -v WGX_ENV_OVERRIDE_MAP_)
-
-  # Convert WGX_WORKFLOW_TASKS_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_WORKFLOW_TASKS_}"
-    value="${!var}"
-    WGX_WORKFLOW_TASKS["$key"]="$value"
-  done < <(compgen -v WGX_WORKFLOW_TASKS_)
-
-  # Convert WGX_VALIDATE_PROFILE_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_VALIDATE_PROFILE_}"
-    value="${!var}"
-    WGX_VALIDATE_PROFILES["$key"]="$value"
-  done < <(compgen -v WGX_VALIDATE_PROFILE_)
-
-  # Convert WGX_VALIDATE_SKIP_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_VALIDATE_SKIP_}"
-    key="$(profile::_task_key_from_var "$key")"
-    value="${!var}"
-    WGX_VALIDATE_SKIP["$key"]="$value"
-  done < <(compgen -v WGX_VALIDATE_SKIP_)
-
-  # Convert WGX_TASK_CMDS_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_TASK_CMDS_}"
-    key="$(profile::_task_key_from_var "$key")"
-    value="${!var}"
-    WGX_TASK_CMDS["$key"]="$value"
-  done < <(compgen -v WGX_TASK_CMDS_)
-
-  # Convert WGX_TASK_DESC_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_TASK_DESC_}"
-    key="$(profile::_task_key_from_var "$key")"
-    value="${!var}"
-    WGX_TASK_DESC["$key"]="$value"
-  done < <(compgen -v WGX_TASK_DESC_)
-
-  # Convert WGX_TASK_GROUP_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_TASK_GROUP_}"
-    key="$(profile::_task_key_from_var "$key")"
-    value="${!var}"
-    WGX_TASK_GROUP["$key"]="$value"
-  done < <(compgen -v WGX_TASK_GROUP_)
-
-  # Convert WGX_TASK_SAFE_* to array
-  while IFS= read -r var; do
-    [[ -n $var ]] || continue
-    key="${var#WGX_TASK_SAFE_}"
-    key="$(profile::_task_key_from_var "$key")"
-    value="${!var}"
-    WGX_TASK_SAFE["$key"]="$value"
-  done < <(compgen -v WGX_TASK_SAFE_)
+  # Compile straight into the cache slot when there is one; the entry only
+  # becomes visible once the stream has been read back successfully.
+  local stream="" status=0
+  if [[ -n $entry ]] && mkdir -p "${entry%/*}" 2>/dev/null && [[ -w ${entry%/*} ]]; then
+    stream="${entry}.$$.tmp"
+  else
+    entry=""
+    stream="$(mktemp "${TMPDIR:-/tmp}/wgx-profile.XXXXXX")" || return 1
+  fi
+
+  local notes="${stream%.tmp}.notes.tmp"
+  python3 "$parser" --format=records "$file" >"$stream" 2>"$notes" || status=$?
+  [[ -s $notes ]] && cat -- "$notes" >&2
+  if ((status == 0)); then
+    if profile::_apply_record_stream <"$stream"; then
+      # The notes land first, so a hit on the new entry always finds them.
+      if [[ -n $entry && -s $notes ]]; then
+        mv -f "$notes" "${entry%.rec}.notes" 2>/dev/null || entry=""
+      elif [[ -n $entry ]]; then
+        rm -f "${entry%.rec}.notes"
+      fi
+      if [[ -n $entry ]] && mv -f "$stream" "$entry" 2>/dev/null; then
+        rm -f "$notes"
+        profile::_cache_prune "${entry%/*}"
+        return 0
+      fi
+    else
+      status=1
+    fi
+  fi
+  rm -f "$stream" "$notes"
+  return $status
 }
 
 profile::_decode_json_array() {
@@ -386,26 +648,47 @@ profile::_decode_json_array() {
   python3 "${module_dir}/json_decode.py" "$json_payload"
 }
 
-profile::_collect_env_keys() {
-  local -A seen=()
-  WGX_ENV_KEYS=()
-  local key
-  for key in "${!WGX_ENV_DEFAULT_MAP[@]}"; do
-    if [[ -z ${seen[$key]:-} ]]; then
-      seen[$key]=1
-      WGX_ENV_KEYS+=("$key")
+# Expand a deferred env value (profile_parser.merge_env): ${NAME} reads an
+# exported variable of the process environment (unset: empty), $$ is a
+# literal $. Nothing is evaluated.
+profile::_env_expand_into() {
+  local -n __expanded="$1"
+  local rest="$2" name
+  __expanded=""
+  while [[ $rest == *'$'* ]]; do
+    __expanded+="${rest%%\$*}"
+    rest="${rest#*\$}"
+    if [[ $rest == '$'* ]]; then
+      __expanded+='$'
+      rest="${rest:1}"
+    elif [[ $rest =~ ^\{([A-Za-z_][A-Za-z0-9_]*)\} ]]; then
+      name="${BASH_REMATCH[1]}"
+      if [[ -v $name && ${!name@a} == *x* ]]; then
+        __expanded+="${!name}"
+      fi
+      rest="${rest:${#BASH_REMATCH[0]}}"
+    else
+      __expanded+='$'
     fi
   done
-  for key in "${!WGX_ENV_BASE_MAP[@]}"; do
-    if [[ -z ${seen[$key]:-} ]]; then
-      seen[$key]=1
-      WGX_ENV_KEYS+=("$key")
-    fi
+  __expanded+="$rest"
+}
+
+# Finish the parser's merged env: expand deferred values, list the keys.
+profile::_env_finish() {
+  local -A deferred=()
+  local i item key value
+  for key in "${WGX_ENV_DEFERRED[@]}"; do
+    deferred[$key]=1
   done
-  for key in "${!WGX_ENV_OVERRIDE_MAP[@]}"; do
-    if [[ -z ${seen[$key]:-} ]]; then
-      seen[$key]=1
-      WGX_ENV_KEYS+=("$key")
+  WGX_ENV_KEYS=()
+  for i in "${!WGX_ENV_EXPORTS[@]}"; do
+    item="${WGX_ENV_EXPORTS[$i]}"
+    key="${item%%=*}"
+    WGX_ENV_KEYS+=("$key")
+    if [[ -n ${deferred[$key]:-} ]]; then
+      profile::_env_expand_into value "${item#*=}"
+      WGX_ENV_EXPORTS[i]="${key}=${value}"
     fi
   done
 }
@@ -414,6 +697,46 @@ profile::has_manifest() {
   profile::_detect_file
 }
 
+# --- Reload detection -------------------------------------------------------
+# A manifest counts as already loaded while the path names the same file
+# (`-ef`: device and inode) and its mtime equals that of the stamp file kept
+# for its content, down to the nanosecond (`-nt`/`-ot`). The check runs on test
+# builtins only. The stamp takes the manifest's timestamps before its content
+# is hashed and compiled, so an edit that lands in between triggers a reload on
+# the next access. Processes that loaded the same content share one stamp.
+
+profile::_is_current() {
+  local file="$1"
+  [[ -n ${WGX_PROFILE_LOADED:-} && -n $PROFILE_STAMP && -f $PROFILE_STAMP ]] || return 1
+  [[ $file -ef $WGX_PROFILE_LOADED ]] || return 1
+  [[ ! $file -nt $PROFILE_STAMP && ! $file -ot $PROFILE_STAMP ]]
+}
+
+profile::_capture_stamp() {
+  # Copy the manifest's timestamps onto <cache root>/stamps/<sha256>.stamp,
+  # written under a temporary name and renamed into place. New stamps are
+  # pruned like cache entries.
+  local file="$1" dir tmp sum="" _
+  PROFILE_STAMP=""
+  dir="$(profile::_cache_root)/stamps" || return 1
+  [[ -d $dir ]] || mkdir -p "$dir" 2>/dev/null || return 1
+  tmp="$dir/.${BASHPID}.tmp"
+  touch -r "$file" "$tmp" 2>/dev/null || return 1
+  read -r sum _ < <(profile::_sha256 "$file") || true
+  if [[ ! $sum =~ ^[0-9a-f]{64}$ ]]; then
+    rm -f "$tmp"
+    return 1
+  fi
+  local known=0
+  [[ -e $dir/$sum.stamp ]] && known=1
+  if ! mv -f "$tmp" "$dir/$sum.stamp" 2>/dev/null; then
+    rm -f "$tmp"
+    return 1
+  fi
+  PROFILE_STAMP="$dir/$sum.stamp"
+  ((known)) || profile::_cache_prune "$dir" stamp
+}
+
 profile::load() {
   local file="${1:-}"
   if [[ -n $file ]]; then
@@ -423,12 +746,14 @@ profile::load() {
     profile::_detect_file || return 1
     file="$PROFILE_FILE"
   fi
-  local _norm_file
-  _norm_file="$(profile::_abspath "$file")"
-  if [[ ${WGX_PROFILE_LOADED:-} == "$_norm_file" ]]; then
+  local source="$file"
+  [[ $source == /* ]] || source="${PWD%/}/${source}"
+  if profile::_is_current "$source"; then
     return 0
   fi
   profile::_reset
+  # Without a stamp every access reloads; that is slower, never stale.
+  profile::_capture_stamp "$source" || true
   local status=1
   if [[ $file == *.yml || $file == *.yaml || $file == *.json ]]; then
     if profile::_python_parse "$file"; then
@@ -445,27 +770,40 @@ profile::load() {
     # The flat yaml parser has been removed.
     return 1
   fi
-  # Convert flat variables to associative arrays
-  profile::_convert_flat_to_arrays
-  profile::_collect_env_keys
-  WGX_PROFILE_LOADED="$_norm_file"
+  profile::_env_finish
+  WGX_PROFILE_LOADED="$source"
+  if [[ ${WGX_DEBUG:-0} != 0 ]]; then
+    echo "WGX: profile parser backend: ${PROFILE_PARSER_BACKEND:-unknown}" >&2
+  fi
   return 0
 }
 
+# Every command that reads the manifest goes through here, so the first load
+# also reports an unmet requiredWgx; whether that is fatal is up to the command.
 profile::ensure_loaded() {
   if ! profile::has_manifest; then
     profile::_reset
     PROFILE_FILE=""
     return 1
   fi
-  profile::load "$PROFILE_FILE"
+  profile::load "$PROFILE_FILE" || return 1
+  profile::ensure_version || true
 }
 
 profile::available_caps() {
   printf '%s\n' "${WGX_AVAILABLE_CAPS[@]}"
 }
 
+# Warns once per loaded manifest; later calls return the same result quietly.
 profile::ensure_version() {
+  if [[ -z $PROFILE_VERSION_STATUS ]]; then
+    PROFILE_VERSION_STATUS=0
+    profile::_check_version || PROFILE_VERSION_STATUS=1
+  fi
+  return "$PROFILE_VERSION_STATUS"
+}
+
+profile::_check_version() {
   [[ -z ${WGX_VERSION:-} ]] && return 0
   if [[ -z $WGX_REQUIRED_RANGE && -z $WGX_REQUIRED_MIN ]]; then
     return 0
@@ -498,13 +836,10 @@ profile::ensure_version() {
 }
 
 profile::_task_keys() {
-  if ((${#WGX_TASK_CMDS[@]} == 0)); then
+  if ((${#WGX_TASK_KEYS[@]} == 0)); then
     return 0
   fi
-  local key
-  for key in "${!WGX_TASK_CMDS[@]}"; do
-    printf '%s\n' "$(profile::_normalize_task_name "$key")"
-  done | sort -u
+  printf '%s\n' "${WGX_TASK_KEYS[@]}"
 }
 
 profile::tasks() {
@@ -568,14 +903,14 @@ profile::tasks_json() {
   printf '{"tasks":['
   local key name safe desc group
   local -A groups=()
-  for name in $(profile::_task_keys); do
+  for name in "${WGX_TASK_KEYS[@]}"; do
     key="$name"
-    safe="$(profile::_task_safe "$key")"
+    safe="${WGX_TASK_SAFE[$key]:-0}"
     if ((safe_only)) && [[ "$safe" != "1" ]]; then
       continue
     fi
-    desc="$(profile::_task_desc "$key")"
-    group="$(profile::_task_group "$key")"
+    desc="${WGX_TASK_DESC[$key]:-}"
+    group="${WGX_TASK_GROUP[$key]:-}"
     local safe_bool="false"
     [[ $safe == 1 ]] && safe_bool="true"
     printf '%s{"name":"%s","desc":"%s","group":"%s","safe":%s}' \
@@ -601,6 +936,22 @@ profile::tasks_json() {
   printf '\n'
 }
 
+# The effective task env as {"env":{KEY:value,...}}, keys sorted.
+profile::env_json() {
+  profile::ensure_loaded || return 1
+  if ! declare -F json_escape >/dev/null 2>&1; then
+    # shellcheck disable=SC1091
+    source "$(dirname "${BASH_SOURCE[0]}")/json.bash"
+  fi
+  local sep="" item
+  printf '{"env":{'
+  for item in "${WGX_ENV_EXPORTS[@]}"; do
+    printf '%s"%s":"%s"' "$sep" "$(json_escape "${item%%=*}")" "$(json_escape "${item#*=}")"
+    sep=','
+  done
+  printf '}}\n'
+}
+
 profile::validate_profile_checks() {
   # Print the task names a validation profile declares, one per line.
   profile::ensure_loaded || return 1
@@ -608,9 +959,10 @@ profile::validate_profile_checks() {
   [[ -n $profile ]] || return 1
   local declared="${WGX_VALIDATE_PROFILES[$profile]:-}"
   [[ -n $declared ]] || return 0
-  local name
+  local name key
   for name in $declared; do
-    printf '%s\n' "$(profile::_normalize_task_name "$name")"
+    profile::_task_key_into key "$name"
+    printf '%s\n' "$key"
   done
 }
 
@@ -621,30 +973,199 @@ profile::validate_profile_declared() {
   [[ -n ${WGX_VALIDATE_PROFILES[$profile]:-} ]]
 }
 
+profile::validate_profile_jobs() {
+  # Print the concurrency a validation profile declares; nothing if it declares none.
+  profile::ensure_loaded || return 1
+  local profile="${1:-}"
+  [[ -n $profile ]] || return 1
+  printf '%s' "${WGX_VALIDATE_JOBS[$profile]:-}"
+}
+
+profile::validate_profile_serial() {
+  # Print the checks of a validation profile that must run alone, one per line.
+  profile::ensure_loaded || return 1
+  local profile="${1:-}" name
+  [[ -n $profile ]] || return 1
+  for name in ${WGX_VALIDATE_SERIAL[$profile]:-}; do
+    printf '%s\n' "$name"
+  done
+}
+
 profile::validate_skip_reason() {
   # Print "kind:reason" when a check is explicitly unsupported or CI-only.
   profile::ensure_loaded || return 1
   local key
-  key="$(profile::_normalize_task_name "${1:-}")"
+  profile::_task_key_into key "${1:-}"
+  [[ -n $key ]] || return 0
   printf '%s' "${WGX_VALIDATE_SKIP[$key]:-}"
 }
 
 profile::env_apply() {
   profile::ensure_loaded || return 1
-  local envs=()
-  local key
-  for key in "${!WGX_ENV_DEFAULT_MAP[@]}"; do
-    envs+=("${key}=${WGX_ENV_DEFAULT_MAP[$key]}")
-  done
-  for key in "${!WGX_ENV_BASE_MAP[@]}"; do
-    envs+=("${key}=${WGX_ENV_BASE_MAP[$key]}")
+  if ((${#WGX_ENV_EXPORTS[@]})); then
+    printf '%s\n' "${WGX_ENV_EXPORTS[@]}"
+  fi
+}
+
+# --- Task result cache ------------------------------------------------------
+# A task that declares inputs: is skipped when an earlier successful run had
+# the same command, shell mode, limits, arguments, merged env and input file
+# contents (see modules/task_cache.py). Entries live in
+# <target>/.wgx/cache/tasks, or WGX_TASK_CACHE_DIR. WGX_TASK_CACHE=0 (wgx task --no-cache) bypasses the
+# cache, WGX_TASK_CACHE=refresh (--force) runs the task and stores the result.
+
+profile::_task_cache_dir() {
+  printf '%s' "${WGX_TASK_CACHE_DIR:-${WGX_TARGET_ROOT:-.}/.wgx/cache/tasks}"
+}
+
+# Key material for task $1 with spec $2, env array $3 and argument array $4.
+profile::_task_cache_material() {
+  local key="$1" spec="$2" item shell="argv"
+  local -n __cache_envs="$3" __cache_args="$4"
+  # A STR command runs under bash -lc, or bash -c with shell: plain.
+  [[ $spec == STR:* ]] && shell="${WGX_TASK_SHELL[$key]:-login}"
+  printf 'task=%s\0cmd=%s\0shell=%s\0limits=%s\0' "$key" "$spec" "$shell" "${WGX_TASK_LIMITS[$key]:-}"
+  for item in "${__cache_args[@]}"; do
+    printf 'arg=%s\0' "$item"
   done
-  for key in "${!WGX_ENV_OVERRIDE_MAP[@]}"; do
-    envs+=("${key}=${WGX_ENV_OVERRIDE_MAP[$key]}")
+  for item in "${__cache_envs[@]}"; do
+    printf 'env=%s\0' "$item"
   done
-  if ((${#envs[@]})); then
-    printf '%s\n' "${envs[@]}"
+  while IFS= read -r item; do
+    [[ -n $item ]] && printf 'in=%s\0' "$item"
+  done <<<"${WGX_TASK_INPUTS[$key]:-}"
+  while IFS= read -r item; do
+    [[ -n $item ]] && printf 'out=%s\0' "$item"
+  done <<<"${WGX_TASK_OUTPUTS[$key]:-}"
+  # Without outputs the loop above ends on a failed test; pipefail would
+  # then discard the whole check.
+  return 0
+}
+
+# Sets $1 to "hit <sha256>" or "miss <sha256>" for task $2 (spec $3, env
+# array $4, argument array $5, run in $6); leaves it empty when the task is
+# not cached. With $7=1 a hit also restores the stored outputs.
+profile::_task_cache_check() {
+  local -n __cache_state="$1"
+  local key="$2" spec="$3" envs_name="$4" args_name="$5" workdir="$6" restore="${7:-0}"
+  __cache_state=""
+  [[ -n ${WGX_TASK_INPUTS[$key]:-} && ${WGX_TASK_CACHE:-1} != 0 ]] || return 0
+  profile::_have_cmd python3 || return 0
+  local -a options=()
+  ((restore)) && options+=(--restore)
+  [[ ${WGX_TASK_CACHE:-1} == refresh ]] && options+=(--refresh)
+  local cache_dir module_dir result
+  cache_dir="$(profile::_task_cache_dir)"
+  [[ $cache_dir == /* ]] || cache_dir="${PWD%/}/${cache_dir}"
+  module_dir="$(profile::_module_dir)"
+  result="$(profile::_task_cache_material "$key" "$spec" "$envs_name" "$args_name" |
+    (cd "$workdir" && python3 "${module_dir}/task_cache.py" check "$cache_dir" "${options[@]}"))" || return 0
+  [[ $result =~ ^(hit|miss)\ [0-9a-f]{64}$ ]] && __cache_state="$result"
+  return 0
+}
+
+profile::_task_cache_store() {
+  local cache_key="$1" key="$2" spec="$3" envs_name="$4" args_name="$5" workdir="$6"
+  local cache_dir module_dir
+  cache_dir="$(profile::_task_cache_dir)"
+  [[ $cache_dir == /* ]] || cache_dir="${PWD%/}/${cache_dir}"
+  module_dir="$(profile::_module_dir)"
+  profile::_task_cache_material "$key" "$spec" "$envs_name" "$args_name" |
+    (cd "$workdir" && python3 "${module_dir}/task_cache.py" store "$cache_dir" "$cache_key") ||
+    printf 'wgx: task cache: could not store the result of %s\n' "$key" >&2
+}
+
+# Lowers the resource limit behind ulimit flag $1 to soft $2 and hard $3 in
+# the current shell. A stricter hard limit that is already in place stays.
+profile::_lower_limit() {
+  local flag="$1" soft="$2" hard="$3" current
+  current="$(ulimit -H "$flag")"
+  if [[ $current != unlimited ]] && ((current < hard)); then
+    hard="$current"
+    ((soft > hard)) && soft="$hard"
   fi
+  # Soft first: a hard limit below the current soft one would be refused.
+  ulimit -S "$flag" "$soft" && ulimit -H "$flag" "$hard"
+}
+
+# Applies task $1's memory_mb (RLIMIT_AS), cpu_seconds (RLIMIT_CPU, per
+# process: SIGXCPU, one second later SIGKILL) and open_files (RLIMIT_NOFILE)
+# to the current (sub)shell before it execs the task.
+profile::_task_apply_limits() {
+  local key="$1" item value
+  local -a items=()
+  read -r -a items <<<"${WGX_TASK_LIMITS[$key]:-}"
+  for item in "${items[@]}"; do
+    value="${item#*=}"
+    case "${item%%=*}" in
+    memory_mb) profile::_lower_limit -v "$((value * 1024))" "$((value * 1024))" ;;
+    cpu_seconds) profile::_lower_limit -t "$value" "$((value + 1))" ;;
+    open_files) profile::_lower_limit -n "$value" "$value" ;;
+    esac || return 1
+  done
+}
+
+# Sets array $1 to the timeout(1) prefix for task $2's limits.timeout. The
+# command gets its own process group, so a timeout also ends its children;
+# on a terminal it stays in the foreground so Ctrl-C still reaches it.
+profile::_task_timeout_prefix_into() {
+  local -n __timeout_prefix="$1"
+  local key="$2" item
+  local -a items=()
+  __timeout_prefix=()
+  read -r -a items <<<"${WGX_TASK_LIMITS[$key]:-}"
+  for item in "${items[@]}"; do
+    [[ $item == timeout=* ]] || continue
+    if ! profile::_have_cmd timeout; then
+      printf 'wgx: task %s: limits.timeout ignored, timeout(1) not found\n' "$key" >&2
+      return 0
+    fi
+    __timeout_prefix=(timeout --kill-after=1)
+    [[ -t 0 ]] && __timeout_prefix+=(--foreground)
+    __timeout_prefix+=("${item#timeout=}")
+  done
+}
+
+# Sets $1 to the CPU time (user + system, ms) of the children this shell has
+# reaped so far. `times` has to run in this shell, so it writes to a file.
+profile::_children_cpu_ms_into() {
+  local -n __cpu_ms="$1"
+  local file user="" sys="" value minutes seconds
+  __cpu_ms=0
+  file="$(mktemp "${TMPDIR:-/tmp}/wgx-times.XXXXXX")" || return 0
+  times >"$file"
+  { read -r _ && read -r user sys; } <"$file" || true
+  rm -f "$file"
+  for value in "$user" "$sys"; do
+    # 0m1.250s; the decimal separator follows the locale.
+    [[ $value =~ ^([0-9]+)m([0-9]+)[.,]([0-9]{3})s$ ]] || continue
+    minutes="${BASH_REMATCH[1]}" seconds="${BASH_REMATCH[2]}"
+    __cpu_ms=$((__cpu_ms + (10#$minutes * 60 + 10#$seconds) * 1000 + 10#${BASH_REMATCH[3]}))
+  done
+}
+
+# Names the limit behind exit status $2 of task $1, where the run shows it:
+# 124 from timeout(1); SIGXCPU or SIGKILL once the task's CPU time $3 (ms)
+# reached cpu_seconds; the SIGKILL of timeout --kill-after once $4 ms of wall
+# time passed limits.timeout. Any other SIGKILL (the OOM killer, kill -9)
+# stays a plain failure.
+profile::_task_limit_notice() {
+  local key="$1" rc="$2" cpu_ms="${3:-0}" wall_ms="${4:-0}" item name value
+  local -a items=()
+  ((rc != 0)) || return 0
+  read -r -a items <<<"${WGX_TASK_LIMITS[$key]:-}"
+  for item in "${items[@]}"; do
+    name="${item%%=*}" value="${item#*=}"
+    case "$name:$rc" in
+    timeout:124) ;;
+    timeout:137) ((wall_ms >= value * 1000)) || continue ;;
+    # RLIMIT_CPU fires at the limit; allow for coarser rusage accounting.
+    cpu_seconds:152 | cpu_seconds:137) ((cpu_ms * 10 >= value * 9000)) || continue ;;
+    *) continue ;;
+    esac
+    printf 'wgx: task %s exceeded limits.%s (%s)\n' "$key" "$name" "$value" >&2
+    return 0
+  done
 }
 
 profile::run_task() {
@@ -657,15 +1178,14 @@ profile::run_task() {
   shift || true
 
   local key
-  key="$(profile::_normalize_task_name "$name")"
+  profile::_task_key_into key "$name"
   local spec
   spec="$(profile::_task_spec "$key")"
   if [[ -z $spec ]]; then
     printf 'Task not defined: %s\n' "$key" >&2
     return 1
   fi
-  local -a envs=()
-  mapfile -t envs < <(profile::env_apply)
+  local -a envs=("${WGX_ENV_EXPORTS[@]}")
   local dryrun="${DRYRUN:-0}"
   local args=()
   local passthrough=0
@@ -683,7 +1203,7 @@ profile::run_task() {
   done
 
   # Menschlich lesbare Repräsentation für Tests/Debug:
-  local raw_cmd base_cmd
+  local raw_cmd="" base_cmd=""
   case "$spec" in
   STR:*)
     base_cmd="${spec#STR:}" # z.B. "echo 'a # b'"
@@ -708,11 +1228,38 @@ profile::run_task() {
   # Respect WGX_TARGET_ROOT as the working directory for the task execution
   local workdir="${WGX_TARGET_ROOT:-.}"
 
+  local cache_state="" cache_key=""
+  profile::_task_cache_check cache_state "$key" "$spec" envs args "$workdir" "$((dryrun ? 0 : 1))"
+  if [[ -n $cache_state ]]; then
+    cache_key="${cache_state#* }"
+    if ((dryrun)); then
+      printf 'cache=%s %s\n' "${cache_state%% *}" "${cache_key:0:12}"
+    else
+      [[ -n ${WGX_TASK_CACHE_REPORT:-} ]] && printf '%s\n' "${cache_state%% *}" >"$WGX_TASK_CACHE_REPORT"
+      if [[ $cache_state == hit\ * ]]; then
+        printf 'wgx: %s cached (%s); wgx task --force %s runs it anyway.\n' \
+          "$key" "${cache_key:0:12}" "$key" >&2
+        return 0
+      fi
+    fi
+  fi
+
+  local rc=0 cpu_before=0 cpu_after=0 started="${EPOCHREALTIME/[.,]/}"
+  local -a limit_prefix=()
+  if ((dryrun == 0)); then
+    profile::_task_timeout_prefix_into limit_prefix "$key"
+    [[ ${WGX_TASK_LIMITS[$key]:-} == *cpu_seconds=* ]] && profile::_children_cpu_ms_into cpu_before
+  fi
+
   case "$spec" in
   ARRJSON:*)
     local payload_json="${spec#ARRJSON:}"
+    local span="${WGX_TASK_ARGV[$key]:-}"
     local -a cmd=()
-    if [[ -n $payload_json ]]; then
+    if [[ -n $span ]]; then
+      cmd=("${WGX_TASK_ARGV_ITEMS[@]:${span% *}:${span#* }}")
+    elif [[ -n $payload_json ]]; then
+      # Nur für von Hand gesetzte WGX_TASK_CMDS ohne Parser-Argv.
       if ! mapfile -t cmd < <(profile::_decode_json_array "$payload_json"); then
         return 1
       fi
@@ -739,7 +1286,8 @@ profile::run_task() {
     (
       cd "$workdir" || return 1
       ((${#envs[@]})) && export "${envs[@]}"
-      exec "${cmd[@]}" "${args[@]}"
+      profile::_task_apply_limits "$key" || return 126
+      exec "${limit_prefix[@]}" "${cmd[@]}" "${args[@]}"
     )
     ;;
   ARR:*)
@@ -770,7 +1318,8 @@ profile::run_task() {
     (
       cd "$workdir" || return 1
       ((${#envs[@]})) && export "${envs[@]}"
-      exec "${cmd[@]}" "${args[@]}"
+      profile::_task_apply_limits "$key" || return 126
+      exec "${limit_prefix[@]}" "${cmd[@]}" "${args[@]}"
     )
     ;;
   STR:*)
@@ -790,9 +1339,12 @@ profile::run_task() {
       printf '%s\n' "$out"
       return 0
     fi
+    local -a shell=(bash -lc)
+    [[ ${WGX_TASK_SHELL[$key]:-} == plain ]] && shell=(bash -c)
     (
       cd "$workdir" || return 1
       ((${#envs[@]})) && export "${envs[@]}"
+      profile::_task_apply_limits "$key" || return 126
       if ((${#args[@]})); then
         local extra=""
         local arg
@@ -800,16 +1352,26 @@ profile::run_task() {
           extra+=" "
           extra+="$(printf '%q' "$arg")"
         done
-        exec bash -lc "$command$extra"
+        exec "${limit_prefix[@]}" "${shell[@]}" "$command$extra"
       else
-        exec bash -lc "$command"
+        exec "${limit_prefix[@]}" "${shell[@]}" "$command"
       fi
     )
     ;;
   *)
     return 1
     ;;
-  esac
+  esac || rc=$?
+
+  if ((rc != 0)) && [[ -n ${WGX_TASK_LIMITS[$key]:-} ]]; then
+    [[ ${WGX_TASK_LIMITS[$key]} == *cpu_seconds=* ]] && profile::_children_cpu_ms_into cpu_after
+    profile::_task_limit_notice "$key" "$rc" "$((cpu_after - cpu_before))" \
+      "$(((${EPOCHREALTIME/[.,]/} - started) / 1000))"
+  fi
+  if [[ -n $cache_key ]] && ((rc == 0)); then
+    profile::_task_cache_store "$cache_key" "$key" "$spec" envs args "$workdir"
+  fi
+  return "$rc"
 }
 
 profile::validate_manifest() {
@@ -861,12 +1423,26 @@ profile::validate_manifest() {
     [[ -z $tasks ]] && continue
     for wf_task in $tasks; do
       local normalised
-      normalised="$(profile::_normalize_task_name "$wf_task")"
-      if [[ -z ${WGX_TASK_CMDS[$normalised]:-} ]]; then
+      profile::_task_key_into normalised "$wf_task"
+      if [[ -z $normalised || -z ${WGX_TASK_CMDS[$normalised]:-} ]]; then
         _errors_ref+=("workflow_missing_task:${wf}:${wf_task}")
       fi
     done
   done
+  local line step need
+  local -A in_workflow
+  for wf in "${!WGX_WORKFLOW_NEEDS[@]}"; do
+    in_workflow=()
+    while read -r step _; do
+      [[ -n $step ]] && in_workflow[$step]=1
+    done <<<"${WGX_WORKFLOW_NEEDS[$wf]}"
+    while read -r line; do
+      read -r step line <<<"$line"
+      for need in $line; do
+        [[ -n ${in_workflow[$need]:-} ]] || _errors_ref+=("workflow_unknown_need:${wf}:${step}:${need}")
+      done
+    done <<<"${WGX_WORKFLOW_NEEDS[$wf]}"
+  done
 }
 
 profile::check_workflows() {
@@ -900,7 +1476,10 @@ profile::check_workflows() {
   return 0
 }
 
+# Optional eager entry point for sourced sessions. The dispatcher never calls
+# it; commands load the manifest on first access through profile::ensure_loaded.
 profile::_auto_init() {
+  [[ -n $WGX_PROFILE_LOADED ]] && return 0
   if profile::has_manifest; then
     if profile::load "$PROFILE_FILE"; then
       profile::ensure_version || true
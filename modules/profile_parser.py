@@ -6,12 +6,13 @@ This script parses .wgx/profile.yml files when PyYAML is not available.
 It implements a minimal subset of block-style YAML necessary for wgx profiles.
 It does NOT support the full YAML specification (e.g. flow style, complex keys, anchors).
 """
+import io
 import json
 import os
 import re
 import shlex
 import sys
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 # Pre-compiled regexes
 RE_NON_ALPHANUM_UNDERSCORE = re.compile(r'[^A-Za-z0-9_]')
@@ -33,6 +34,13 @@ RE_STRIP_COMMENT_TOKENS = re.compile(r"""
     ( \# )
 """, re.VERBOSE)
 
+class ProfileError(Exception):
+    """A manifest that cannot be compiled; ``code`` is the CLI exit status."""
+
+    def __init__(self, message: str, code: int = 3) -> None:
+        super().__init__(message)
+        self.code = code
+
 # --- YAML Parser (Minimal Subset) ---
 
 def _parse_scalar(value: str) -> Any:
@@ -105,32 +113,6 @@ def _parse_scalar(value: str) -> Any:
 
     return text
 
-def _convert_frame(frame: Dict[str, Any], kind: str) -> None:
-    if frame["type"] == kind:
-        return
-    parent = frame["parent"]
-    key = frame["key"]
-    if kind == "list":
-        new_value: List[Any] = []
-        if parent is None:
-            frame["container"] = new_value
-        elif isinstance(parent, list):
-            parent[key] = new_value
-        else:
-            parent[key] = new_value
-        frame["container"] = new_value
-        frame["type"] = "list"
-    else:
-        new_value_dict: Dict[str, Any] = {}
-        if parent is None:
-            frame["container"] = new_value_dict
-        elif isinstance(parent, list):
-            parent[key] = new_value_dict
-        else:
-            parent[key] = new_value_dict
-        frame["container"] = new_value_dict
-        frame["type"] = "dict"
-
 def _strip_inline_comment(line: str) -> str:
     # Iterate over tokens (Quotes and Hashes)
     # We rely on the regex to skip "safe text" automatically.
@@ -188,123 +170,259 @@ def _split_key_value(text: str) -> Optional[Tuple[str, str]]:
         i += 1
     return None
 
+# Fast path: one full-line match for the common shapes (blank or comment-only
+# lines, `key: value`, `- item`, `- key: value`) with plain keys and a plain or
+# fully quoted value. Whatever it does not match takes _scan_line.
+RE_LINE = re.compile(r"""
+    (?:
+        [ \t]* (?: \# .* )?
+      |
+        (?P<indent> [ ]* )
+        (?: (?P<dash> -[ ] ) [ \t]* | (?! -[ ] ) )
+        (?:
+            (?P<key> [^\s:'"\#] (?: [^:'"\#]* [^\s:'"\#] )? ) :
+            (?: [ \t]+ (?P<value>
+                ' (?: '' | [^'] )* ' | " (?: \\. | [^"\\] )* " |
+                [^\s'"\#] (?: [^'"\#]* [^\s'"\#] )?
+            ) )?
+          |
+            (?P<item>
+                ' (?: '' | [^'] )* ' | " (?: \\. | [^"\\] )* " |
+                [^\s:'"\#] (?: [^:'"\#]* [^\s:'"\#] )?
+            )
+        )
+        (?: [ \t]+ \# .* )?
+    )
+    \s*
+""", re.VERBOSE)
+
+# Exact path: one scan per line finds quoted spans, comment starters and
+# colons together; it mirrors RE_STRIP_COMMENT_TOKENS plus the quote rules of
+# _split_key_value.
+# - Group 1/2: single/double quoted string (skipped as a whole).
+# - Group 3: hash (#), a comment if it starts the line or follows a blank.
+# - Group 4: colon, a key separator if followed by a blank or end of content.
+RE_LINE_TOKENS = re.compile(r"""
+    ( ' (?: '' | [^'] )* (?: ' | $ ) ) |
+    ( " (?: \\. | [^"\\] )* (?: " | $ ) ) |
+    ( \# ) |
+    ( : )
+""", re.VERBOSE)
+
+
+class _Frame:
+    """One open block collection while tokenizing the fallback YAML subset."""
+
+    __slots__ = ("indent", "container", "parent", "key", "is_list")
+
+    def __init__(self, indent: int, container: Any, parent: Any, key: Any, is_list: bool = False) -> None:
+        self.indent = indent
+        self.container = container
+        self.parent = parent
+        self.key = key
+        self.is_list = is_list
+
+    def become(self, is_list: bool) -> Any:
+        """Retype the collection on first use; a block starts out as a dict."""
+        if self.is_list != is_list:
+            value: Any = [] if is_list else {}
+            if self.parent is not None:
+                self.parent[self.key] = value
+            self.container = value
+            self.is_list = is_list
+        return self.container
+
+
+# (indent, is list item, key or None, value); None for blank lines.
+LineToken = Optional[Tuple[int, bool, Optional[str], str]]
+
+
+def _scan_line(line: str) -> LineToken:
+    """Tokenize one line the way _strip_inline_comment + _split_key_value do.
+
+    Lines holding both a backslash and a double quote use those helpers
+    directly, because a dangling escape makes the comment scanner and the
+    key/value splitter disagree about where that quote ends.
+    """
+    if "\\" in line and '"' in line:
+        content = _strip_inline_comment(line).strip()
+        split: Optional[Tuple[str, str]] = None
+        is_item = content.startswith("- ")
+        if is_item:
+            content = content[2:].strip()
+        if content:
+            split = _split_key_value(content)
+        elif not is_item:
+            return None
+        indent = len(line) - len(line.lstrip(" "))
+        if split is None:
+            return indent, is_item, None, content
+        return indent, is_item, split[0], split[1]
+
+    end = len(line)
+    colon = -1
+    tail_colon = -1
+    for match in RE_LINE_TOKENS.finditer(line):
+        kind = match.lastindex
+        pos = match.start()
+        if kind == 3:
+            if pos == 0 or line[pos - 1] in " \t":
+                end = pos
+                break
+        elif kind == 4 and colon < 0:
+            if line[pos + 1:pos + 2] in (" ", "\t"):
+                colon = pos
+            else:
+                tail_colon = pos
+    while end and line[end - 1].isspace():
+        end -= 1
+    start = len(line) - len(line.lstrip())
+    if start >= end:
+        return None
+    if colon < 0 and tail_colon >= 0 and tail_colon == end - 1:
+        colon = tail_colon
+
+    indent = len(line) - len(line.lstrip(" "))
+    is_item = end > start + 2 and line.startswith("- ", start)
+    if is_item:
+        start += 2
+    if colon < start:
+        return indent, is_item, None, line[start:end]
+    return indent, is_item, line[start:colon], line[colon + 1:end]
+
+
 def _parse_simple_yaml(path: str) -> Any:
     root: Dict[str, Any] = {}
-    stack: List[Dict[str, Any]] = [
-        {"indent": -1, "container": root, "parent": None, "key": None, "type": "dict"}
-    ]
+    stack: List[_Frame] = [_Frame(-1, root, None, None)]
+    fast_line = RE_LINE.fullmatch
 
     with open(path, "r", encoding="utf-8") as handle:
         for raw_line in handle:
             line = raw_line.rstrip("\n")
-            stripped = _strip_inline_comment(line).rstrip()
-            if not stripped:
-                continue
-            indent = len(line) - len(line.lstrip(" "))
-            content = stripped.lstrip()
+            match = fast_line(line)
+            if match is not None:
+                indent_text, dash, key, value, item = match.groups()
+                if indent_text is None:
+                    continue
+                indent = len(indent_text)
+                is_item = dash is not None
+                if key is None:
+                    value = item
+                elif value is None:
+                    value = ""
+            else:
+                token = _scan_line(line)
+                if token is None:
+                    continue
+                indent, is_item, key, value = token
+                value = value.strip()
+                if key is not None:
+                    key = key.strip().strip("'\"")
 
-            while len(stack) > 1 and indent <= stack[-1]["indent"]:
+            while len(stack) > 1 and indent <= stack[-1].indent:
                 stack.pop()
-
             frame = stack[-1]
-            container = frame["container"]
-
-            if content.startswith("- "):
-                value_part = content[2:].strip()
-                _convert_frame(frame, "list")
-                container = frame["container"]
-                if not value_part:
-                    item: Dict[str, Any] = {}
-                    container.append(item)
-                    stack.append(
-                        {
-                            "indent": indent,
-                            "container": item,
-                            "parent": container,
-                            "key": len(container) - 1,
-                            "type": "dict",
-                        }
-                    )
-                    continue
-                split = _split_key_value(value_part)
-                if split is not None:
-                    key, rest = split
-                    key = key.strip().strip("'\"")
-                    rest = rest.strip()
-                    item = {}
-                    container.append(item)
-                    frame_item = {
-                        "indent": indent,
-                        "container": item,
-                        "parent": container,
-                        "key": len(container) - 1,
-                        "type": "dict",
-                    }
-                    stack.append(frame_item)
-                    if rest:
-                        item[key] = _parse_scalar(rest)
+
+            if is_item:
+                container = frame.container if frame.is_list else frame.become(True)
+                if key is None:
+                    if not value:
+                        item: Dict[str, Any] = {}
+                        container.append(item)
+                        stack.append(_Frame(indent, item, container, len(container) - 1))
                     else:
-                        item[key] = {}
-                        stack.append(
-                            {
-                                "indent": indent,
-                                "container": item[key],
-                                "parent": item,
-                                "key": key,
-                                "type": "dict",
-                            }
-                        )
+                        container.append(_parse_scalar(value))
                     continue
-                container.append(_parse_scalar(value_part))
+                item = {}
+                container.append(item)
+                stack.append(_Frame(indent, item, container, len(container) - 1))
+                if value:
+                    item[key] = _parse_scalar(value)
+                else:
+                    item[key] = {}
+                    stack.append(_Frame(indent, item[key], item, key))
                 continue
 
-            split = _split_key_value(content)
-            if split is not None:
-                key, value_part = split
-                key = key.strip().strip("'\"")
-                value_part = value_part.strip()
-                _convert_frame(frame, "dict")
-                container = frame["container"]
-                if value_part == "":
+            if key is not None:
+                container = frame.become(False) if frame.is_list else frame.container
+                if value == "":
                     container[key] = {}
-                    stack.append(
-                        {
-                            "indent": indent,
-                            "container": container[key],
-                            "parent": container,
-                            "key": key,
-                            "type": "dict",
-                        }
-                    )
+                    stack.append(_Frame(indent, container[key], container, key))
                 else:
-                    container[key] = _parse_scalar(value_part)
+                    container[key] = _parse_scalar(value)
                 continue
 
+            container = frame.container
             if isinstance(container, list):
-                container.append(_parse_scalar(content))
+                container.append(_parse_scalar(value))
             elif isinstance(container, dict):
-                container[content] = True
+                container[value] = True
 
     return root
 
-def _load_manifest(path: str) -> Any:
-    _, ext = os.path.splitext(path)
-    ext = ext.lower()
-    if ext in {".yaml", ".yml"}:
-        try:
-            import yaml  # type: ignore
-        except Exception:
-            try:
-                return _parse_simple_yaml(path)
-            except Exception:
-                return {}
-        with open(path, "r", encoding="utf-8") as handle:
-            return yaml.safe_load(handle) or {}
-    if ext == ".json":
+# --- Manifest Backends ---
+#
+# WGX_PROFILE_BACKEND selects how YAML manifests are loaded:
+#   cyaml    PyYAML with the libyaml CSafeLoader
+#   pyyaml   PyYAML's pure-Python SafeLoader
+#   builtin  _parse_simple_yaml above (block-style subset only)
+#   auto     the first available of cyaml, pyyaml, builtin (default)
+# JSON manifests always use the json module and report the backend "json".
+
+PROFILE_BACKENDS = ('auto', 'cyaml', 'pyyaml', 'builtin')
+
+
+def _import_yaml() -> Any:
+    try:
+        import yaml  # type: ignore
+    except ImportError:
+        return None
+    return yaml
+
+
+def resolve_backend(requested: Optional[str] = None) -> str:
+    """Resolve a requested backend name (default: WGX_PROFILE_BACKEND) to a usable one."""
+    name = (requested if requested is not None else os.environ.get('WGX_PROFILE_BACKEND', '')).strip().lower() or 'auto'
+    if name not in PROFILE_BACKENDS:
+        raise ProfileError(
+            f"wgx: error: unknown WGX_PROFILE_BACKEND '{name}' (expected: {', '.join(PROFILE_BACKENDS)})", 2
+        )
+    if name == 'builtin':
+        return name
+    yaml = _import_yaml()
+    if name == 'auto':
+        if yaml is None:
+            return 'builtin'
+        return 'cyaml' if hasattr(yaml, 'CSafeLoader') else 'pyyaml'
+    if yaml is None:
+        raise ProfileError(f"wgx: error: WGX_PROFILE_BACKEND={name} requires PyYAML, which is not installed", 2)
+    if name == 'cyaml' and not hasattr(yaml, 'CSafeLoader'):
+        raise ProfileError("wgx: error: WGX_PROFILE_BACKEND=cyaml requires PyYAML built with libyaml", 2)
+    return name
+
+
+def manifest_backend(path: str, requested: Optional[str] = None) -> str:
+    """The backend that _load_manifest uses for ``path``."""
+    if os.path.splitext(path)[1].lower() in {".yaml", ".yml"}:
+        return resolve_backend(requested)
+    return 'json'
+
+
+def _load_manifest(path: str, backend: Optional[str] = None) -> Any:
+    backend = backend or manifest_backend(path)
+    try:
+        if backend == 'builtin':
+            return _parse_simple_yaml(path) or {}
         with open(path, "r", encoding="utf-8") as handle:
-            return json.load(handle) or {}
-    with open(path, "r", encoding="utf-8") as handle:
-        return json.load(handle) or {}
+            if backend == 'json':
+                return json.load(handle) or {}
+            yaml = _import_yaml()
+            loader = yaml.CSafeLoader if backend == 'cyaml' else yaml.SafeLoader
+            return yaml.load(handle, Loader=loader) or {}
+    except ProfileError:
+        raise
+    except Exception as exc:
+        raise ProfileError(f"wgx: error: cannot load {path} ({backend}): {exc}", 1) from exc
 
 # --- Platform Selection & Helpers ---
 
@@ -340,8 +458,8 @@ def as_bool(value: Any) -> bool:
         return value.strip().lower() in ("1", "true", "yes", "on")
     return False
 
-def emit(line: str) -> None:
-    sys.stdout.write(f"{line}\n")
+def emit(line: str, stream: Any = None) -> None:
+    (stream or sys.stdout).write(f"{line}\n")
 
 def shell_quote(value: str) -> str:
     """Return exactly one Bash-safe word without physical newlines.
@@ -374,30 +492,170 @@ def shell_quote(value: str) -> str:
             escaped.append(ch)
     return "$'" + "".join(escaped) + "'"
 
-def emit_var(name: str, value: Any) -> None:
+def emit_var(name: str, value: Any, stream: Any = None) -> None:
     if not RE_SHELL_NAME.fullmatch(name):
         raise ValueError(f"invalid shell variable name: {name!r}")
     sval = '' if value is None else str(value)
-    emit(f"{name}={shell_quote(sval)}")
+    emit(f"{name}={shell_quote(sval)}", stream)
+
+# --- Output Formats ---
+#
+# The loader contract knows three target shapes: scalars, indexed arrays that
+# are appended to, and associative arrays (maps). Each writer renders those
+# shapes in one output format.
+
+# Flat variable prefixes of the legacy assignment format, where they differ
+# from the Bash map name.
+FLAT_PREFIXES = {'WGX_VALIDATE_PROFILES': 'WGX_VALIDATE_PROFILE'}
+
+
+class AssignmentWriter:
+    """Legacy format: one validated Bash assignment per line.
+
+    Maps are flattened into ``<MAP>_<key>=value`` variables, so keys are
+    restricted to shell-name characters.
+    """
+
+    def __init__(self, stream: Any = None) -> None:
+        self.stream = stream
+
+    def scalar(self, name: str, value: Any) -> None:
+        emit_var(name, value, self.stream)
 
-def emit_env(prefix: str, mapping: Any) -> None:
+    def append(self, name: str, value: Any) -> None:
+        if not RE_SHELL_NAME.fullmatch(name):
+            raise ValueError(f"invalid shell variable name: {name!r}")
+        emit(f"{name}+=({shell_quote('' if value is None else str(value))})", self.stream)
+
+    def entry(self, name: str, key: str, value: Any) -> None:
+        prefix = FLAT_PREFIXES.get(name, name)
+        emit_var(f"{prefix}_{RE_NON_ALPHANUM_UNDERSCORE.sub('_', key)}", value, self.stream)
+
+
+class RecordWriter:
+    """NUL-delimited records: ``<target>\\0<key>\\0<value>\\0``.
+
+    Bash reads each field with ``read -d ''`` and dispatches on a fixed set of
+    target names, so nothing is evaluated and map keys keep their exact text.
+    Scalars and array appends carry an empty key.
+    """
+
+    def __init__(self, stream: Any = None) -> None:
+        self.stream = stream
+
+    def _record(self, target: str, key: str, value: Any) -> None:
+        sval = '' if value is None else str(value)
+        for field in (target, key, sval):
+            if "\x00" in field:
+                raise ValueError("profile values cannot contain NUL bytes")
+        (self.stream or sys.stdout).write(f"{target}\0{key}\0{sval}\0")
+
+    def scalar(self, name: str, value: Any) -> None:
+        self._record(name, '', value)
+
+    def append(self, name: str, value: Any) -> None:
+        self._record(name, '', value)
+
+    def entry(self, name: str, key: str, value: Any) -> None:
+        self._record(name, key, value)
+
+
+OUTPUT_FORMATS = {'assign': AssignmentWriter, 'records': RecordWriter}
+
+
+def emit_env(prefix: str, mapping: Any, writer: Any = None) -> None:
     if not isinstance(mapping, dict):
         return
+    writer = writer or AssignmentWriter()
     for key, val in mapping.items():
         if key is None:
             continue
         skey = str(key)
         if not RE_SHELL_NAME.fullmatch(skey):
             raise ValueError(f"invalid environment key: {skey!r}")
-        emit_var(f"{prefix}_{skey}", val)
+        writer.entry(prefix, skey, val)
+
+RE_ENV_REFERENCE = re.compile(r'\$(\$?)\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
 
-def emit_caps(caps: Any) -> None:
+def merge_env(*layers: Any) -> Dict[str, Tuple[str, bool]]:
+    """Merge env maps, later layers winning, and expand ``${NAME}`` references.
+
+    A reference to a key of the merged env is replaced by that key's expanded
+    value; ``$${`` stands for a literal ``${``. A value that refers to its own
+    key extends what the layers below set for it (``PATH: "${HOME}/bin:${PATH}"``),
+    or the process environment when no lower layer sets it. References to other
+    names are left for the loader, which resolves them against the process
+    environment. Returns key -> (value, deferred). A deferred value is in loader
+    form: ``${NAME}`` is a reference and ``$$`` a literal ``$``.
+    """
+    # Every layer's value per key, lowest first.
+    raw: Dict[str, List[str]] = {}
+    for layer in layers:
+        if isinstance(layer, dict):
+            for key, value in layer.items():
+                if key is None:
+                    continue
+                skey = str(key)
+                if not RE_SHELL_NAME.fullmatch(skey):
+                    raise ValueError(f"invalid environment key: {skey!r}")
+                raw.setdefault(skey, []).append('' if value is None else str(value))
+
+    # Each (key, layer index) expands to segments: (text, None) literal,
+    # (None, name) a reference left to the loader.
+    Node = Tuple[str, int]
+    segments: Dict[Node, List[Tuple[Optional[str], Optional[str]]]] = {}
+    active: List[Node] = []
+
+    def expand(node: Node) -> List[Tuple[Optional[str], Optional[str]]]:
+        if node in segments:
+            return segments[node]
+        if node in active:
+            cycle = ' -> '.join(key for key, _ in active[active.index(node):] + [node])
+            raise ProfileError(f"wgx: error: env references form a cycle: {cycle}")
+        active.append(node)
+        key, level = node
+        value = raw[key][level]
+        result: List[Tuple[Optional[str], Optional[str]]] = []
+        position = 0
+        for match in RE_ENV_REFERENCE.finditer(value):
+            result.append((value[position:match.start()], None))
+            escaped, name = match.groups()
+            if escaped:
+                result.append(('${' + name + '}', None))
+            elif name == key:
+                result.extend(expand((key, level - 1)) if level else [(None, name)])
+            elif name in raw:
+                result.extend(expand((name, len(raw[name]) - 1)))
+            else:
+                result.append((None, name))
+            position = match.end()
+        result.append((value[position:], None))
+        active.pop()
+        segments[node] = result
+        return result
+
+    merged: Dict[str, Tuple[str, bool]] = {}
+    for key in sorted(raw):
+        parts = expand((key, len(raw[key]) - 1))
+        if all(name is None for _, name in parts):
+            merged[key] = (''.join(text or '' for text, _ in parts), False)
+        else:
+            merged[key] = (''.join(
+                '${' + name + '}' if name is not None else (text or '').replace('$', '$$')
+                for text, name in parts
+            ), True)
+    return merged
+
+
+def emit_caps(caps: Any, writer: Any = None) -> None:
     if not isinstance(caps, (list, tuple)):
         return
+    writer = writer or AssignmentWriter()
     for cap in caps:
         if cap is None:
             continue
-        emit(f"WGX_REQUIRED_CAPS+=({shell_quote(str(cap))})")
+        writer.append("WGX_REQUIRED_CAPS", str(cap))
 
 # --- Configuration Logic ---
 
@@ -405,10 +663,14 @@ VALIDATE_PROFILES = ('quick', 'full')
 VALIDATE_SKIP_KINDS = {'unsupported': 'unsupported', 'cionly': 'ci-only', 'ci-only': 'ci-only', 'ci_only': 'ci-only'}
 
 
-def _validate_check_list(value: Any) -> List[str]:
-    """Normalize a declared profile check list to ordered, de-duplicated task names."""
+def _validate_check_list(value: Any) -> Tuple[List[str], List[str]]:
+    """Normalize a declared profile check list to ordered, de-duplicated task names.
+
+    Items are task names or ``{task: NAME, serial: true}``; the second list
+    holds the names marked serial.
+    """
     if value is None:
-        return []
+        return [], []
     if isinstance(value, str):
         items: List[Any] = value.split()
     elif isinstance(value, list):
@@ -417,41 +679,221 @@ def _validate_check_list(value: Any) -> List[str]:
         sys.stderr.write(
             f"wgx: warning: validate profile has invalid type {type(value).__name__}, expected list. Ignoring.\n"
         )
-        return []
+        return [], []
     names: List[str] = []
+    serial: List[str] = []
     for item in items:
-        if not isinstance(item, (str, int, float)):
+        marked = False
+        if isinstance(item, dict):
+            marked = as_bool(item.get('serial'))
+            item = item.get('task')
+        if not isinstance(item, (str, int, float)) or isinstance(item, bool):
             continue
-        norm = RE_DASH_SEQ.sub('-', str(item).replace(' ', '').replace('_', '-').lower())
+        norm = normalize_task_name(str(item))
         if norm and norm not in names:
             names.append(norm)
-    return names
+            if marked:
+                serial.append(norm)
+    return names, serial
+
+
+def _validate_jobs(profile: str, value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    sys.stderr.write(
+        f"wgx: warning: validate.{profile}.jobs must be a positive integer, got {value!r}. Ignoring.\n"
+    )
+    return None
+
+
+def normalize_task_name(name: str) -> str:
+    """Task lookup key: spaces removed, '_' as '-', dash runs collapsed, lower case.
+
+    profile::_normalize_task_name_into in profile.bash mirrors this for names
+    that are not in the emitted WGX_TASK_INDEX.
+    """
+    return RE_DASH_SEQ.sub('-', name.replace(' ', '').replace('_', '-').lower())
+
+
+def task_globs(task: str, field: str, value: Any) -> List[str]:
+    """A task's inputs:/outputs: as a list of glob strings (one glob or a list)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ProfileError(
+            f"wgx: error: task '{task}': {field} must be a glob or a list of globs"
+        )
+    globs = [item for item in value if item.strip()]
+    for item in globs:
+        if '\n' in item:
+            raise ProfileError(f"wgx: error: task '{task}': {field} globs cannot contain newlines")
+    return globs
+
+
+TASK_LIMITS = ('memory_mb', 'cpu_seconds', 'open_files', 'timeout')
+RE_DURATION = re.compile(r'^(\d+)\s*(s|m|h)?$')
+DURATION_UNITS = {None: 1, 's': 1, 'm': 60, 'h': 3600}
 
 
-def emit_validate(cfg: Any) -> None:
+def task_limits(task: str, value: Any) -> List[str]:
+    """A task's limits: as ``name=value`` items in TASK_LIMITS order.
+
+    memory_mb, cpu_seconds and open_files are positive integers; timeout is
+    seconds or a string like ``90s``, ``20m`` or ``1h`` and emitted as seconds.
+    """
+    if value is None:
+        return []
+    if not isinstance(value, dict):
+        raise ProfileError(f"wgx: error: task '{task}': limits must be a map")
+    unknown = sorted(str(key) for key in value if key not in TASK_LIMITS)
+    if unknown:
+        raise ProfileError(
+            f"wgx: error: task '{task}': unknown limit {unknown[0]!r} "
+            f"(expected {', '.join(TASK_LIMITS)})"
+        )
+    items: List[str] = []
+    for name in TASK_LIMITS:
+        raw = value.get(name)
+        if raw is None:
+            continue
+        amount = None
+        if isinstance(raw, int) and not isinstance(raw, bool):
+            amount = raw
+        elif isinstance(raw, str) and name == 'timeout':
+            match = RE_DURATION.match(raw.strip())
+            if match:
+                amount = int(match.group(1)) * DURATION_UNITS[match.group(2)]
+        elif isinstance(raw, str) and raw.strip().isdigit():
+            amount = int(raw.strip())
+        if amount is None or amount <= 0:
+            expected = "seconds or a duration like 20m" if name == 'timeout' else "a positive integer"
+            raise ProfileError(f"wgx: error: task '{task}': limits.{name} must be {expected}")
+        items.append(f"{name}={amount}")
+    return items
+
+
+TASK_SHELL_MODES = ('login', 'plain', 'exec')
+# A string task runs without a shell (shell: exec) only if none of these
+# appear: operators, redirections, expansions, globbing, comments.
+SHELL_METACHARACTERS = frozenset('|&;<>()$`\\*?[]{}~#\n')
+# First words that only a shell can run.
+SHELL_ONLY_WORDS = frozenset((
+    '!', '.', ':', '[[', '{', 'alias', 'bg', 'builtin', 'case', 'cd', 'command',
+    'coproc', 'declare', 'eval', 'exec', 'exit', 'export', 'fg', 'for',
+    'function', 'hash', 'if', 'jobs', 'let', 'local', 'popd', 'pushd', 'read',
+    'readonly', 'return', 'select', 'set', 'shift', 'shopt', 'source', 'time',
+    'trap', 'type', 'typeset', 'ulimit', 'umask', 'unset', 'until', 'wait',
+    'while',
+))
+
+
+def task_shell_mode(owner: str, value: Any) -> str:
+    """A ``shell:`` setting as one of TASK_SHELL_MODES; '' when unset."""
+    if value is None:
+        return ''
+    if value not in TASK_SHELL_MODES:
+        raise ProfileError(
+            f"wgx: error: {owner}: shell must be one of {', '.join(TASK_SHELL_MODES)}"
+        )
+    return value
+
+
+def exec_argv(command: str) -> Optional[List[str]]:
+    """argv to exec a string command directly, or None if it needs a shell."""
+    if any(char in SHELL_METACHARACTERS for char in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if not argv or argv[0] in SHELL_ONLY_WORDS or '=' in argv[0]:
+        return None
+    return argv
+
+
+def workflow_step_needs(workflow: str, step: Dict[str, Any], previous: Optional[str]) -> List[str]:
+    """Task keys a workflow step waits for.
+
+    Without ``needs`` a step depends on the step before it, so a plain steps
+    list keeps running in order; ``needs: []`` makes the step a root.
+    """
+    if 'needs' not in step:
+        return [previous] if previous else []
+    needs = step.get('needs')
+    if needs is None:
+        return []
+    if isinstance(needs, (str, int, float)):
+        needs = [needs]
+    if not isinstance(needs, list):
+        raise ProfileError(
+            f"wgx: error: workflow '{workflow}' step '{step.get('task')}': "
+            "needs must be a task name or a list of task names"
+        )
+    keys: List[str] = []
+    for need in needs:
+        key = normalize_task_name(str(need))
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def emit_task_index(spellings: List[str], keys: List[str], writer: Any) -> None:
+    """Emit the lookup index the Bash side uses instead of normalizing.
+
+    WGX_TASK_INDEX maps every task name and workflow step as spelled in the
+    manifest, plus each normalized key itself, to the normalized key;
+    WGX_TASK_KEYS lists the task keys once, sorted.
+    """
+    index: Dict[str, str] = {}
+    for spelling in spellings + keys:
+        norm = normalize_task_name(spelling)
+        if spelling and norm and spelling not in index:
+            index[spelling] = norm
+    for spelling, norm in index.items():
+        writer.entry("WGX_TASK_INDEX", spelling, norm)
+    for key in sorted(set(keys)):
+        writer.append("WGX_TASK_KEYS", key)
+
+
+def emit_validate(cfg: Any, writer: Any = None) -> None:
     """Emit the declared validate profiles and the explicit skip declarations.
 
     Repositories declare which native tasks each profile invokes, plus checks that
     are explicitly unsupported or CI-only. An undeclared profile emits an empty
-    list; wgx then reports it as undeclared rather than inventing checks.
+    list; wgx then reports it as undeclared rather than inventing checks. A
+    profile may also be a map with ``checks`` and ``jobs`` (its default
+    concurrency); checks marked serial never run next to another check.
     """
     if not isinstance(cfg, dict):
         cfg = {}
+    writer = writer or AssignmentWriter()
     lowered = {str(key).lower(): value for key, value in cfg.items()}
     for profile in VALIDATE_PROFILES:
-        checks = _validate_check_list(lowered.get(profile))
-        emit_var(f"WGX_VALIDATE_PROFILE_{profile}", ' '.join(checks))
+        declared = lowered.get(profile)
+        jobs = None
+        if isinstance(declared, dict):
+            jobs = _validate_jobs(profile, declared.get('jobs'))
+            declared = declared.get('checks')
+        checks, serial = _validate_check_list(declared)
+        writer.entry("WGX_VALIDATE_PROFILES", profile, ' '.join(checks))
+        if serial:
+            writer.entry("WGX_VALIDATE_SERIAL", profile, ' '.join(serial))
+        if jobs is not None:
+            writer.entry("WGX_VALIDATE_JOBS", profile, str(jobs))
     for raw_kind, kind in VALIDATE_SKIP_KINDS.items():
         entries = lowered.get(raw_kind)
         if not isinstance(entries, dict):
             continue
         for raw_name, reason in entries.items():
-            norm = RE_DASH_SEQ.sub('-', str(raw_name).replace(' ', '').replace('_', '-').lower())
+            norm = normalize_task_name(str(raw_name))
             if not norm:
                 continue
-            safe_name = RE_NON_ALPHANUM_UNDERSCORE.sub('_', norm)
             text = '' if reason is None else str(reason)
-            emit_var(f"WGX_VALIDATE_SKIP_{safe_name}", f"{kind}:{text}")
+            writer.entry("WGX_VALIDATE_SKIP", norm, f"{kind}:{text}")
 
 
 def get_config(data: Dict, wgx: Dict, key: str, default: Any = None, aliases: Optional[List[str]] = None, check_type: Any = None) -> Tuple[Any, bool]:
@@ -502,13 +944,19 @@ def get_config(data: Dict, wgx: Dict, key: str, default: Any = None, aliases: Op
 
     return val, fallback
 
-def main():
-    if len(sys.argv) < 2:
-        sys.stderr.write("Usage: profile_parser.py <profile_file>\n")
-        sys.exit(1)
+ROOT_FALLBACK_NOTE = "wgx: note: using root-level profile keys for backwards compatibility; consider nesting under 'wgx.'"
+
 
-    path = sys.argv[1]
-    data = _load_manifest(path) or {}
+def compile_profile(path: str, writer: Any, backend: Optional[str] = None) -> List[str]:
+    """Compile one manifest into ``writer`` and return its notes for stderr.
+
+    ``backend`` is a WGX_PROFILE_BACKEND value; None reads the environment.
+    Raises ProfileError for manifests the loader must reject. Shared by the
+    CLI entry point and the resident server (profile_server.py).
+    """
+    notes: List[str] = []
+    used_backend = manifest_backend(path, backend)
+    data = _load_manifest(path, used_backend) or {}
 
     wgx = data.get('wgx')
     if not isinstance(wgx, dict):
@@ -518,69 +966,86 @@ def main():
 
     # apiVersion
     api_version, _ = get_config(data, wgx, 'apiVersion', default='v1')
-    emit_var("PROFILE_VERSION", api_version)
+    writer.scalar("PROFILE_VERSION", api_version)
+    writer.scalar("PROFILE_PARSER_BACKEND", used_backend)
 
     # requiredWgx (supports aliases)
     req, fb = get_config(data, wgx, 'requiredWgx', aliases=['required-wgx'])
     if fb: used_root_fallback = True
 
     if isinstance(req, str):
-        emit_var("WGX_REQUIRED_RANGE", req)
+        writer.scalar("WGX_REQUIRED_RANGE", req)
     elif isinstance(req, dict):
-        emit_var("WGX_REQUIRED_RANGE", req.get('range'))
-        emit_var("WGX_REQUIRED_MIN", req.get('min'))
-        emit_caps(req.get('caps'))
+        writer.scalar("WGX_REQUIRED_RANGE", req.get('range'))
+        writer.scalar("WGX_REQUIRED_MIN", req.get('min'))
+        emit_caps(req.get('caps'), writer)
     else:
-        emit_caps([])
+        emit_caps([], writer)
 
     # repoKind
     repo_kind, fb = get_config(data, wgx, 'repoKind', default='')
     if fb: used_root_fallback = True
-    emit_var("WGX_REPO_KIND", repo_kind)
+    writer.scalar("WGX_REPO_KIND", repo_kind)
 
     # dirs
     dirs, fb = get_config(data, wgx, 'dirs', default={}, check_type=dict)
     if fb: used_root_fallback = True
-    emit_var("WGX_DIR_WEB", dirs.get('web'))
-    emit_var("WGX_DIR_API", dirs.get('api'))
-    emit_var("WGX_DIR_DATA", dirs.get('data'))
+    writer.scalar("WGX_DIR_WEB", dirs.get('web'))
+    writer.scalar("WGX_DIR_API", dirs.get('api'))
+    writer.scalar("WGX_DIR_DATA", dirs.get('data'))
 
     # envDefaults
     env_defaults, fb = get_config(data, wgx, 'envDefaults', default={}, check_type=dict)
     if fb: used_root_fallback = True
-    emit_env('WGX_ENV_DEFAULT_MAP', env_defaults)
 
     # env (base)
     env_base, fb = get_config(data, wgx, 'env', default={}, check_type=dict)
     if fb: used_root_fallback = True
-    emit_env('WGX_ENV_BASE_MAP', env_base)
 
     # envOverrides
     env_overrides, fb = get_config(data, wgx, 'envOverrides', default={}, check_type=dict)
     if fb: used_root_fallback = True
-    emit_env('WGX_ENV_OVERRIDE_MAP', env_overrides)
+
+    # Effective env: envOverrides > env > envDefaults, ${NAME} expanded, one
+    # KEY=value item per key sorted by key, ready for a single `export`.
+    for key, (value, deferred) in merge_env(env_defaults, env_base, env_overrides).items():
+        writer.append("WGX_ENV_EXPORTS", f"{key}={value}")
+        if deferred:
+            writer.append("WGX_ENV_DEFERRED", key)
 
     # workflows
     workflows, fb = get_config(data, wgx, 'workflows', default={}, check_type=dict)
     if fb: used_root_fallback = True
 
+    spellings: List[str] = []
     for wf_name, wf_spec in workflows.items():
         steps = []
+        graph = []
+        previous = None
         if isinstance(wf_spec, dict):
             for step in wf_spec.get('steps') or []:
                 if isinstance(step, dict):
                     task_name = step.get('task')
                     if task_name:
                         steps.append(str(task_name))
-        # Sanitize workflow name to create a valid variable suffix
-        safe_name = RE_NON_ALPHANUM_UNDERSCORE.sub('_', str(wf_name))
-        emit_var(f"WGX_WORKFLOW_TASKS_{safe_name}", ' '.join(steps))
+                        key = normalize_task_name(str(task_name))
+                        needs = workflow_step_needs(str(wf_name), step, previous)
+                        graph.append(' '.join([key] + needs))
+                        previous = key
+        writer.entry("WGX_WORKFLOW_TASKS", str(wf_name), ' '.join(steps))
+        writer.entry("WGX_WORKFLOW_NEEDS", str(wf_name), '\n'.join(graph))
+        spellings.extend(' '.join(steps).split())
 
     # validate profiles
     validate_cfg, fb = get_config(data, wgx, 'validate', default={}, check_type=dict)
     if fb:
         used_root_fallback = True
-    emit_validate(validate_cfg)
+    emit_validate(validate_cfg, writer)
+
+    # shell: default execution mode of string tasks
+    default_shell, fb = get_config(data, wgx, 'shell')
+    if fb: used_root_fallback = True
+    default_shell = task_shell_mode("shell", default_shell) or 'login'
 
     # tasks
     tasks, fb = get_config(data, wgx, 'tasks', default={}, check_type=dict)
@@ -596,26 +1061,27 @@ def main():
 
     seen_task_order = set()
     norm_to_name: Dict[str, str] = {}
+    # Array commands are also emitted pre-split: WGX_TASK_ARGV_ITEMS holds
+    # every argv item in order, WGX_TASK_ARGV maps the task key to
+    # "<offset> <count>" into it, so Bash slices argv without decoding JSON.
+    argv_offset = 0
 
     for raw_name, spec in tasks.items():
         name = str(raw_name)
-        norm = RE_DASH_SEQ.sub('-', name.replace(' ', '').replace('_', '-').lower())
+        norm = normalize_task_name(name)
 
         if norm in norm_to_name and norm_to_name[norm] != name:
-            sys.stderr.write(
+            raise ProfileError(
                 "wgx: error: task name collision after normalization: "
                 f"'{norm_to_name[norm]}' vs '{name}'\n"
-            )
-            sys.stderr.write(
                 "wgx: error: task names normalize by removing spaces and "
-                "treating '_' as '-'. Rename one task to avoid ambiguity.\n"
+                "treating '_' as '-'. Rename one task to avoid ambiguity."
             )
-            sys.exit(3)
         norm_to_name[norm] = name
+        spellings.append(name)
 
-        safe_name = norm.replace('-', '_')
         if norm not in seen_task_order:
-            emit(f"WGX_TASK_ORDER+=({shell_quote(norm)})")
+            writer.append("WGX_TASK_ORDER", norm)
             seen_task_order.add(norm)
 
         desc = ''
@@ -623,6 +1089,10 @@ def main():
         safe = False
         cmd_value = spec
         args_value = None
+        inputs: List[str] = []
+        outputs: List[str] = []
+        limits: List[str] = []
+        shell = default_shell
 
         if isinstance(spec, dict):
             desc = spec.get('desc') or ''
@@ -630,6 +1100,10 @@ def main():
             safe = as_bool(spec.get('safe'))
             cmd_value = spec.get('cmd')
             args_value = spec.get('args')
+            inputs = task_globs(name, 'inputs', spec.get('inputs'))
+            outputs = task_globs(name, 'outputs', spec.get('outputs'))
+            limits = task_limits(name, spec.get('limits'))
+            shell = task_shell_mode(f"task '{name}'", spec.get('shell')) or shell
 
         selected_cmd = select_variant(cmd_value)
 
@@ -655,12 +1129,7 @@ def main():
             elif variant not in (None, ''):
                 appended_args.append(str(variant))
 
-        if use_array_format:
-            if appended_args:
-                tokens.extend(appended_args)
-            payload = json.dumps(tokens, ensure_ascii=False)
-            emit_var(f"WGX_TASK_CMDS_{safe_name}", 'ARRJSON:' + payload)
-        else:
+        if not use_array_format:
             if base_cmd is not None:
                 command_parts = [base_cmd]
                 if appended_args:
@@ -669,14 +1138,193 @@ def main():
             else:
                 all_parts = tokens + appended_args
                 command = ' '.join(shlex.quote(str(p)) for p in all_parts)
-            emit_var(f"WGX_TASK_CMDS_{safe_name}", 'STR:' + command)
+            if shell == 'exec':
+                # Without shell syntax the string is emitted as an array
+                # command; otherwise it falls back to a plain bash -c.
+                argv = exec_argv(command)
+                if argv:
+                    tokens, appended_args, use_array_format = argv, [], True
+                else:
+                    shell = 'plain'
 
-        emit_var(f"WGX_TASK_DESC_{safe_name}", desc)
-        emit_var(f"WGX_TASK_GROUP_{safe_name}", group)
-        emit_var(f"WGX_TASK_SAFE_{safe_name}", '1' if safe else '0')
+        if use_array_format:
+            if appended_args:
+                tokens.extend(appended_args)
+            payload = json.dumps(tokens, ensure_ascii=False)
+            writer.entry("WGX_TASK_CMDS", norm, 'ARRJSON:' + payload)
+            writer.entry("WGX_TASK_ARGV", norm, f"{argv_offset} {len(tokens)}")
+            for token in tokens:
+                writer.append("WGX_TASK_ARGV_ITEMS", token)
+            argv_offset += len(tokens)
+        else:
+            writer.entry("WGX_TASK_CMDS", norm, 'STR:' + command)
+            if shell == 'plain':
+                writer.entry("WGX_TASK_SHELL", norm, 'plain')
+
+        writer.entry("WGX_TASK_DESC", norm, desc)
+        writer.entry("WGX_TASK_GROUP", norm, group)
+        writer.entry("WGX_TASK_SAFE", norm, '1' if safe else '0')
+        if inputs:
+            writer.entry("WGX_TASK_INPUTS", norm, '\n'.join(inputs))
+        if outputs:
+            writer.entry("WGX_TASK_OUTPUTS", norm, '\n'.join(outputs))
+        if limits:
+            writer.entry("WGX_TASK_LIMITS", norm, ' '.join(limits))
+
+    emit_task_index(spellings, list(norm_to_name), writer)
+
+    if used_root_fallback:
+        notes.append(ROOT_FALLBACK_NOTE)
+    return notes
+
+
+# --- Batch mode ---
+#
+# `--batch` compiles many manifests in one interpreter (fleet tooling). Paths
+# arrive on stdin, one per line or NUL-terminated with -0. Every input path
+# yields exactly one section on stdout, in input order:
+#
+#     wgx-profile <code> <path bytes> <output bytes> <message bytes>\n
+#     <path><output><message>
+#
+# <code> is the exit status the single-file CLI would have returned, <output>
+# the compiled profile in the requested format (empty unless <code> is 0) and
+# <message> its stderr text: deprecation notes or the error. A failing
+# manifest never aborts the batch.
+
+BATCH_MAGIC = b"wgx-profile"
+
+BatchResult = Tuple[int, bytes, bytes]
+
+
+def compile_section(path: str, fmt: str = 'records') -> BatchResult:
+    """Compile one manifest for a batch section: (code, output, message)."""
+    stream = io.StringIO()
+    try:
+        notes = compile_profile(path, OUTPUT_FORMATS[fmt](stream))
+    except ProfileError as exc:
+        return exc.code, b"", f"{exc}\n".encode("utf-8", "surrogateescape")
+    except Exception as exc:  # the single-file CLI would die with a traceback
+        return 1, b"", f"wgx: error: {path}: {exc}\n".encode("utf-8", "surrogateescape")
+    message = ""
+    if os.environ.get("WGX_PROFILE_DEPRECATION", "warn") != "quiet":
+        message = "".join(f"{note}\n" for note in notes)
+    return 0, stream.getvalue().encode("utf-8", "surrogateescape"), message.encode("utf-8")
+
+
+def _compile_section_args(args: Tuple[str, str]) -> BatchResult:
+    return compile_section(*args)
+
+
+def frame_section(path: str, result: BatchResult) -> bytes:
+    code, output, message = result
+    raw_path = os.fsencode(path)
+    header = b"%s %d %d %d %d\n" % (BATCH_MAGIC, code, len(raw_path), len(output), len(message))
+    return header + raw_path + output + message
+
+
+def iter_sections(data: bytes) -> Iterator[Tuple[str, int, bytes, bytes]]:
+    """Split batch output into (path, code, output, message) tuples."""
+    pos = 0
+    while pos < len(data):
+        end = data.index(b"\n", pos)
+        magic, code, path_len, out_len, msg_len = data[pos:end].split(b" ")
+        if magic != BATCH_MAGIC:
+            raise ValueError(f"not a batch section header at byte {pos}")
+        pos = end + 1
+        sizes = (int(path_len), int(out_len), int(msg_len))
+        fields = []
+        for size in sizes:
+            fields.append(data[pos:pos + size])
+            pos += size
+        if pos > len(data):
+            raise ValueError("truncated batch section")
+        yield os.fsdecode(fields[0]), int(code), fields[1], fields[2]
+
+
+def read_batch_paths(data: bytes, nul: bool = False) -> List[str]:
+    separator = b"\0" if nul else b"\n"
+    paths = []
+    for raw in data.split(separator):
+        if not nul:
+            raw = raw.rstrip(b"\r")
+        if raw:
+            paths.append(os.fsdecode(raw))
+    return paths
+
+
+def run_batch(paths: List[str], fmt: str, jobs: int, out: Any) -> int:
+    """Write one section per path to the binary stream ``out``.
+
+    Returns 0 when every manifest compiled and 1 otherwise; the per-file
+    status is in each section header.
+    """
+    if jobs > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(paths)))
+        chunk = max(1, len(paths) // (jobs * 4))
+        results = executor.map(_compile_section_args, [(p, fmt) for p in paths], chunksize=chunk)
+    else:
+        executor = None
+        results = (compile_section(p, fmt) for p in paths)
+    failed = False
+    try:
+        # map() yields in submission order, so sections stay in input order.
+        for path, result in zip(paths, results):
+            failed = failed or result[0] != 0
+            out.write(frame_section(path, result))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    out.flush()
+    return 1 if failed else 0
+
+
+USAGE = (
+    "Usage: profile_parser.py [--format=assign|records] <profile_file>\n"
+    "       profile_parser.py [--format=assign|records] --batch [-0] [--jobs N] < paths\n"
+)
+
+
+def main():
+    args = sys.argv[1:]
+    fmt = 'assign'
+    batch = False
+    nul = False
+    jobs = 1
+    while args and args[0].startswith('-'):
+        opt = args.pop(0)
+        if opt.startswith('--format='):
+            fmt = opt[len('--format='):]
+        elif opt == '--batch':
+            batch = True
+        elif opt == '-0':
+            nul = True
+        elif opt == '--jobs' or opt.startswith('--jobs='):
+            value = opt[len('--jobs='):] if '=' in opt else (args.pop(0) if args else '')
+            if not value.isdigit():
+                sys.stderr.write(USAGE)
+                sys.exit(1)
+            jobs = int(value) or (os.cpu_count() or 1)
+        else:
+            sys.stderr.write(USAGE)
+            sys.exit(1)
+    if fmt not in OUTPUT_FORMATS or (batch and args) or (not batch and (len(args) < 1 or nul or jobs != 1)):
+        sys.stderr.write(USAGE)
+        sys.exit(1)
 
-    if used_root_fallback and os.environ.get("WGX_PROFILE_DEPRECATION", "warn") != "quiet":
-        print("wgx: note: using root-level profile keys for backwards compatibility; consider nesting under 'wgx.'", file=sys.stderr)
+    if batch:
+        paths = read_batch_paths(sys.stdin.buffer.read(), nul)
+        sys.exit(run_batch(paths, fmt, jobs, sys.stdout.buffer))
+
+    try:
+        notes = compile_profile(args[0], OUTPUT_FORMATS[fmt]())
+    except ProfileError as exc:
+        sys.stderr.write(f"{exc}\n")
+        sys.exit(exc.code)
+    if os.environ.get("WGX_PROFILE_DEPRECATION", "warn") != "quiet":
+        for note in notes:
+            print(note, file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Resident profile compiler behind `wgx --serve`.
+
+Keeps compiled manifests in memory and answers the Bash loader over a Unix
+domain socket, so back-to-back `wgx` invocations skip the interpreter start.
+Compilation is profile_parser.compile_profile with the record writer, i.e.
+byte-identical to `profile_parser.py --format=records`.
+
+One request line per connection:
+
+    compile\t<absolute manifest path>\t<WGX_PROFILE_BACKEND>\n
+    stats\n
+    stop\n
+
+Every answer starts with a header line `<state> <code> <lines>` followed by
+<lines> text lines; `ok` answers to `compile` then carry the record stream:
+
+    ok 0 <notes>        notes for stderr, then the records
+    error <code> <n>    the parser's message; <code> is its exit status
+    stale 0 0           profile_parser.py changed on disk; the server exits
+
+Entries are keyed by repository root, manifest path and requested backend and
+carry the file's
+(st_dev, st_ino, st_size, st_mtime_ns) fingerprint; every request re-stats the
+manifest, so an edit invalidates the entry without a file watcher.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import signal
+import socket
+import sys
+import time
+from collections import OrderedDict
+from typing import List, NoReturn, Optional, Tuple
+
+try:
+    from modules import profile_parser
+except ImportError:  # run as a script from modules/
+    import profile_parser
+
+MAX_ENTRIES = 64
+DEFAULT_IDLE_SECONDS = 900
+CLIENT_TIMEOUT_SECONDS = 5.0
+# sockaddr_un.sun_path is 108 bytes on Linux and 104 on macOS.
+MAX_SOCKET_PATH = 103
+
+Fingerprint = Tuple[int, int, int, int]
+
+
+def _usage() -> NoReturn:
+    raise SystemExit(
+        "usage: profile_server.py serve SOCKET [IDLE_SECONDS] | stats SOCKET | stop SOCKET"
+    )
+
+
+def fingerprint(path: str) -> Fingerprint:
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def repo_root(path: str) -> str:
+    parent = os.path.dirname(path)
+    if os.path.basename(parent) == ".wgx":
+        return os.path.dirname(parent)
+    return parent
+
+
+class Entry:
+    __slots__ = ("fingerprint", "header", "body")
+
+    def __init__(self, fp: Fingerprint, header: bytes, body: bytes) -> None:
+        self.fingerprint = fp
+        self.header = header
+        self.body = body
+
+
+def _answer(state: str, code: int, lines: List[str], body: bytes = b"") -> bytes:
+    text = "".join(f"{line}\n" for line in lines)
+    return f"{state} {code} {len(lines)}\n{text}".encode("utf-8", "surrogateescape") + body
+
+
+class ProfileServer:
+    def __init__(self, socket_path: str, idle_seconds: int) -> None:
+        self.socket_path = socket_path
+        self.idle_seconds = idle_seconds
+        self.entries: "OrderedDict[Tuple[str, str, str], Entry]" = OrderedDict()
+        self.started = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self.parser_path = os.path.abspath(profile_parser.__file__)
+        self.parser_fingerprint = fingerprint(self.parser_path)
+        self.running = True
+
+    # --- requests -----------------------------------------------------------
+
+    def compile(self, path: str, backend: str = "auto") -> bytes:
+        if not os.path.isabs(path):
+            self.errors += 1
+            return _answer("error", 1, [f"wgx: error: manifest path must be absolute: {path}"])
+        try:
+            fp = fingerprint(path)
+        except OSError as exc:
+            self.errors += 1
+            return _answer("error", 1, [f"wgx: error: {exc}"])
+
+        key = (repo_root(path), path, backend)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.fingerprint == fp:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry.header + entry.body
+            self.invalidations += 1
+            del self.entries[key]
+
+        self.misses += 1
+        stream = io.StringIO()
+        try:
+            notes = profile_parser.compile_profile(path, profile_parser.RecordWriter(stream), backend)
+        except profile_parser.ProfileError as exc:
+            entry = Entry(fp, _answer("error", exc.code, str(exc).splitlines()), b"")
+        except Exception as exc:  # the CLI would die with a traceback here
+            entry = Entry(fp, _answer("error", 1, f"wgx: error: {path}: {exc}".splitlines()), b"")
+        else:
+            entry = Entry(fp, _answer("ok", 0, notes), stream.getvalue().encode("utf-8"))
+        if entry.body == b"":
+            self.errors += 1
+        self.entries[key] = entry
+        while len(self.entries) > MAX_ENTRIES:
+            self.entries.popitem(last=False)
+        return entry.header + entry.body
+
+    def stats(self) -> bytes:
+        lines = [
+            f"socket: {self.socket_path}",
+            f"uptime_s: {int(time.monotonic() - self.started)}",
+            f"idle_timeout_s: {self.idle_seconds}",
+            f"entries: {len(self.entries)}",
+            f"hits: {self.hits}",
+            f"misses: {self.misses}",
+            f"invalidations: {self.invalidations}",
+            f"errors: {self.errors}",
+        ]
+        return _answer("ok", 0, lines)
+
+    def handle(self, request: str) -> bytes:
+        command, _, argument = request.partition("\t")
+        if command == "stats":
+            return self.stats()
+        if command == "stop":
+            self.running = False
+            return _answer("ok", 0, [])
+        if command != "compile":
+            return _answer("error", 2, [f"wgx: error: unknown request: {command}"])
+        # A changed parser means this process runs stale code; let the client
+        # fall back and stop so the next `wgx --serve` loads the new version.
+        try:
+            current = fingerprint(self.parser_path)
+        except OSError:
+            current = None
+        if current != self.parser_fingerprint:
+            self.running = False
+            return _answer("stale", 0, [])
+        path, _, backend = argument.partition("\t")
+        return self.compile(path, backend or "auto")
+
+    # --- socket loop --------------------------------------------------------
+
+    def _read_request(self, conn: socket.socket) -> Optional[str]:
+        data = b""
+        while b"\n" not in data:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > 65536:
+                return None
+        line, sep, _ = data.partition(b"\n")
+        if not sep:
+            return None
+        return line.decode("utf-8", "surrogateescape")
+
+    def serve(self, listener: socket.socket) -> None:
+        listener.settimeout(self.idle_seconds)
+        while self.running:
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                break
+            with conn:
+                conn.settimeout(CLIENT_TIMEOUT_SECONDS)
+                try:
+                    request = self._read_request(conn)
+                    if request is None:
+                        continue
+                    conn.sendall(self.handle(request))
+                except OSError:
+                    continue
+
+
+def _connect(socket_path: str) -> Optional[socket.socket]:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def _request(socket_path: str, request: str) -> int:
+    client = _connect(socket_path)
+    if client is None:
+        sys.stderr.write(f"wgx: no profile server listening on {socket_path}\n")
+        return 1
+    with client:
+        client.settimeout(CLIENT_TIMEOUT_SECONDS)
+        client.sendall(f"{request}\n".encode("utf-8"))
+        data = b""
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    header, _, rest = data.decode("utf-8", "replace").partition("\n")
+    sys.stdout.write(rest)
+    return 0 if header.startswith("ok ") else 1
+
+
+def _serve(socket_path: str, idle_seconds: int) -> int:
+    if len(os.fsencode(socket_path)) > MAX_SOCKET_PATH:
+        sys.stderr.write(f"wgx: socket path too long: {socket_path} (set WGX_SERVE_SOCKET)\n")
+        return 1
+    if os.path.exists(socket_path):
+        existing = _connect(socket_path)
+        if existing is not None:
+            existing.close()
+            sys.stderr.write(f"wgx: a profile server is already listening on {socket_path}\n")
+            return 1
+        os.unlink(socket_path)
+
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir:
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(16)
+
+    server = ProfileServer(socket_path, idle_seconds)
+
+    def _terminate(signum: int, _frame: object) -> None:
+        server.running = False
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    sys.stderr.write(f"wgx: profile server listening on {socket_path} (idle timeout {idle_seconds}s)\n")
+    try:
+        server.serve(listener)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) < 3:
+        _usage()
+    action, socket_path = sys.argv[1], sys.argv[2]
+    if action == "serve":
+        idle_seconds = DEFAULT_IDLE_SECONDS
+        if len(sys.argv) > 3:
+            try:
+                idle_seconds = int(sys.argv[3])
+            except ValueError:
+                _usage()
+            if idle_seconds <= 0:
+                _usage()
+        return _serve(socket_path, idle_seconds)
+    if action in ("stats", "stop") and len(sys.argv) == 3:
+        return _request(socket_path, action)
+    _usage()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Shared check-result cache for wgx validate.
+
+A cache is addressed by a base URL, either ``file:///srv/wgx-cache`` or
+``http://host:port[/prefix]``. Both use the same layout below the base:
+
+    ac/<key>      result document (JSON), PUT after a check passed
+    cas/<sha256>  content-addressed blob, e.g. the captured check log
+
+GET returns 200 and the object or 404. PUT stores the body and returns 201;
+a cas/ body whose sha256 differs from its name is refused with 400, as is
+any path outside the two namespaces. Objects are immutable in spirit: a PUT
+replaces atomically, so concurrent writers of the same key are harmless.
+
+The result key is the sha256 over the material validate_runner.py reads on
+stdin (NUL-separated ``tree=``, ``task=``, ``cmd=``, ``env=`` items, env
+sorted). ``tree`` is the git tree of the working tree including uncommitted
+and untracked, not ignored, files, so clones of one commit share results.
+
+    tree REPOSITORY_ROOT
+        Prints that tree hash; fails outside a git work tree.
+    serve DIRECTORY [--host HOST] [--port PORT]
+        Reference server (http.server). Prints "serving <url>" once bound.
+    get URL PATH
+        Writes an object to stdout, exit 1 when it is missing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.server
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, NoReturn, Optional
+
+USAGE = (
+    "usage: remote_cache.py tree REPOSITORY_ROOT\n"
+    "       remote_cache.py serve DIRECTORY [--host HOST] [--port PORT]\n"
+    "       remote_cache.py get URL PATH"
+)
+KEY_VERSION = b"wgx-check-cache-v1\0"
+OBJECT_PATH = re.compile(r"^(ac|cas)/[0-9a-f]{64}$")
+SERVED_PATH = re.compile(r"(?:^|/)((?:ac|cas)/[0-9a-f]{64})$")
+DEFAULT_TIMEOUT = 5.0
+
+
+class CacheError(Exception):
+    """The backend could not be reached or refused the request."""
+
+
+def _usage() -> NoReturn:
+    raise SystemExit(USAGE)
+
+
+def _check_path(path: str) -> None:
+    if not OBJECT_PATH.match(path):
+        raise CacheError(f"invalid object path: {path!r}")
+
+
+def _verify(path: str, data: bytes) -> None:
+    if path.startswith("cas/") and hashlib.sha256(data).hexdigest() != path[4:]:
+        raise CacheError(f"content does not match {path}")
+
+
+def _write_atomic(target: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, staging = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(target))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(staging, target)
+    except BaseException:
+        try:
+            os.unlink(staging)
+        except OSError:
+            pass
+        raise
+
+
+class FileBackend:
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def get(self, path: str) -> Optional[bytes]:
+        _check_path(path)
+        try:
+            with open(os.path.join(self.root, path), "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            raise CacheError(str(exc)) from exc
+
+    def put(self, path: str, data: bytes) -> None:
+        _check_path(path)
+        _verify(path, data)
+        try:
+            _write_atomic(os.path.join(self.root, path), data)
+        except OSError as exc:
+            raise CacheError(str(exc)) from exc
+
+
+class HttpBackend:
+    def __init__(self, base: str, timeout: float) -> None:
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, data: Optional[bytes] = None) -> Optional[bytes]:
+        _check_path(path)
+        request = urllib.request.Request(f"{self.base}/{path}", data=data, method=method)
+        if data is not None:
+            request.add_header("Content-Type", "application/octet-stream")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404 and method == "GET":
+                return None
+            raise CacheError(f"{method} {path}: HTTP {exc.code}") from exc
+        except (urllib.error.URLError, OSError) as exc:
+            raise CacheError(f"{method} {path}: {exc}") from exc
+
+    def get(self, path: str) -> Optional[bytes]:
+        return self._request("GET", path)
+
+    def put(self, path: str, data: bytes) -> None:
+        _verify(path, data)
+        self._request("PUT", path, data)
+
+
+def backend_for(url: str):
+    """Return the backend for a file:// or http(s):// base URL."""
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme == "file":
+        if parsed.netloc not in ("", "localhost"):
+            raise CacheError(f"file URL must be local: {url}")
+        return FileBackend(urllib.parse.unquote(parsed.path))
+    if parsed.scheme in ("http", "https"):
+        try:
+            timeout = float(os.environ.get("WGX_REMOTE_CACHE_TIMEOUT", DEFAULT_TIMEOUT))
+        except ValueError:
+            timeout = DEFAULT_TIMEOUT
+        return HttpBackend(url, timeout)
+    raise CacheError(f"unsupported cache URL: {url}")
+
+
+def read_material(data: bytes) -> Dict[str, List[str]]:
+    material: Dict[str, List[str]] = {}
+    for item in data.split(b"\0"):
+        if not item:
+            continue
+        tag, sep, value = item.decode("utf-8", "surrogateescape").partition("=")
+        if not sep:
+            raise ValueError(f"malformed material item: {tag!r}")
+        material.setdefault(tag, []).append(value)
+    return material
+
+
+def result_key(material: Dict[str, List[str]]) -> Optional[str]:
+    """Key of a check result, or None without a tree hash to anchor it."""
+    if not material.get("tree"):
+        return None
+    digest = hashlib.sha256(KEY_VERSION)
+    for tag in ("tree", "task", "cmd", "env"):
+        values = material.get(tag, [])
+        if tag == "env":
+            values = sorted(values)
+        for value in values:
+            digest.update(f"{tag}={value}".encode("utf-8", "surrogateescape") + b"\0")
+    return digest.hexdigest()
+
+
+def tree_hash(repository_root: str) -> str:
+    """git write-tree over a scratch copy of the index after `git add -A`."""
+    def git(*args: str, env: Optional[Dict[str, str]] = None) -> str:
+        return subprocess.run(
+            ["git", "-C", repository_root, *args], check=True, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip()
+
+    index = os.path.join(repository_root, git("rev-parse", "--git-path", "index"))
+    with tempfile.TemporaryDirectory(prefix="wgx-tree.") as scratch:
+        scratch_index = os.path.join(scratch, "index")
+        if os.path.exists(index):
+            shutil.copyfile(index, scratch_index)
+        env = {**os.environ, "GIT_INDEX_FILE": scratch_index}
+        git("add", "-A", env=env)
+        return git("write-tree", env=env)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "wgx-remote-cache/1"
+    root = "."
+
+    def _path(self) -> Optional[str]:
+        # Any prefix is accepted, so one server can stand in for a base URL
+        # like http://cache.example/wgx.
+        match = SERVED_PATH.search(urllib.parse.urlsplit(self.path).path)
+        if not match:
+            self.send_error(400, "expected .../ac/<sha256> or .../cas/<sha256>")
+            return None
+        return match.group(1)
+
+    def do_GET(self) -> None:
+        path = self._path()
+        if path is None:
+            return
+        data = FileBackend(self.root).get(path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self) -> None:
+        path = self._path()
+        if path is None:
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.send_error(411)
+            return
+        try:
+            FileBackend(self.root).put(path, self.rfile.read(length))
+        except CacheError as exc:
+            self.send_error(400, str(exc))
+            return
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        if os.environ.get("WGX_REMOTE_CACHE_LOG") == "1":
+            super().log_message(format, *args)
+
+
+def make_server(directory: str, host: str = "127.0.0.1",
+                port: int = 0) -> http.server.ThreadingHTTPServer:
+    handler = type("BoundHandler", (Handler,), {"root": os.path.abspath(directory)})
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+
+def lookup(url: str, key: str) -> Optional[dict]:
+    """The stored result for key when it is a pass, else None."""
+    data = backend_for(url).get(f"ac/{key}")
+    if data is None:
+        return None
+    try:
+        result = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or result.get("status") != "passed":
+        return None
+    return result
+
+
+def publish(url: str, key: str, task: str, duration_ms: int, log: Optional[bytes]) -> None:
+    backend = backend_for(url)
+    log_digest = None
+    if log is not None:
+        log_digest = hashlib.sha256(log).hexdigest()
+        backend.put(f"cas/{log_digest}", log)
+    document = {
+        "version": 1,
+        "task": task,
+        "status": "passed",
+        "exit_code": 0,
+        "duration_ms": duration_ms,
+        "log": log_digest,
+        "created": int(time.time()),
+    }
+    backend.put(f"ac/{key}", json.dumps(document, sort_keys=True).encode())
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        _usage()
+    command, rest = argv[0], argv[1:]
+    if command == "tree" and len(rest) == 1:
+        try:
+            print(tree_hash(rest[0]))
+        except (OSError, subprocess.CalledProcessError):
+            return 1
+        return 0
+
+    if command == "get" and len(rest) == 2:
+        try:
+            data = backend_for(rest[0]).get(rest[1])
+        except CacheError as exc:
+            print(f"wgx: remote cache: {exc}", file=sys.stderr)
+            return 2
+        if data is None:
+            return 1
+        sys.stdout.buffer.write(data)
+        return 0
+
+    if command == "serve" and rest:
+        directory, options = rest[0], rest[1:]
+        host, port = "127.0.0.1", 0
+        while options:
+            option = options.pop(0)
+            if option in ("--host", "--port") and options:
+                value = options.pop(0)
+                if option == "--host":
+                    host = value
+                else:
+                    try:
+                        port = int(value)
+                    except ValueError:
+                        _usage()
+            else:
+                _usage()
+        os.makedirs(directory, exist_ok=True)
+        server = make_server(directory, host, port)
+        bound_host, bound_port = server.server_address[:2]
+        print(f"serving http://{bound_host}:{bound_port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    _usage()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Input-hash cache for WGX task results.
+
+profile::run_task writes the key material of a task as NUL-separated
+``<tag>=<value>`` items to stdin:
+
+    task=<key>  cmd=<spec>  shell=<argv|login|plain>  limits=<declared limits>
+    arg=<forwarded arg>  env=<NAME=value>  in=<glob>  out=<glob>
+
+The cache key is the sha256 over the material (env items sorted) and over
+the path and content of every file the ``in`` globs match, relative to the
+working directory. ``**`` matches across directories, a directory matches
+every file below it, and a leading ``!`` excludes matches. ``.git`` and the
+cache directory itself never count as inputs.
+
+    check CACHE_DIR [--restore] [--refresh]
+        Prints "hit <key>" or "miss <key>". A hit refreshes the entry's
+        LRU stamp; --restore copies stored outputs back where they are
+        missing or differ. --refresh reports a miss without looking.
+    store CACHE_DIR KEY
+        Records a successful run: the files the ``out`` globs match now are
+        copied into the entry. The cache is then pruned to
+        WGX_TASK_CACHE_MAX entries and WGX_TASK_CACHE_MAX_MB megabytes,
+        least recently used first.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Dict, List, NoReturn, Tuple
+
+USAGE = (
+    "usage: task_cache.py check CACHE_DIR [--restore] [--refresh] < MATERIAL\n"
+    "       task_cache.py store CACHE_DIR KEY < MATERIAL"
+)
+KEY_VERSION = b"wgx-task-cache-v1\0"
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_MB = 256
+META = "meta.json"
+OUTPUTS = "outputs"
+
+
+def _usage() -> NoReturn:
+    raise SystemExit(USAGE)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def read_material(data: bytes) -> Dict[str, List[str]]:
+    material: Dict[str, List[str]] = {}
+    for item in data.split(b"\0"):
+        if not item:
+            continue
+        tag, sep, value = item.decode("utf-8", "surrogateescape").partition("=")
+        if not sep:
+            raise ValueError(f"malformed material item: {tag!r}")
+        material.setdefault(tag, []).append(value)
+    return material
+
+
+def _excluded(path: str, cache_dir: str) -> bool:
+    parts = path.split(os.sep)
+    if ".git" in parts:
+        return True
+    absolute = os.path.abspath(path)
+    return absolute == cache_dir or absolute.startswith(cache_dir + os.sep)
+
+
+def expand(patterns: List[str], cache_dir: str) -> List[str]:
+    """Files matched by the globs, relative and sorted; '!glob' removes matches."""
+    cache_dir = os.path.abspath(cache_dir)
+    selected: Dict[str, None] = {}
+    for pattern in patterns:
+        exclude = pattern.startswith("!")
+        if exclude:
+            pattern = pattern[1:]
+        matched: List[str] = []
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs[:] = [name for name in dirs if name != ".git"]
+                    matched.extend(os.path.join(root, name) for name in files)
+            elif os.path.isfile(path):
+                matched.append(path)
+        for path in matched:
+            path = os.path.normpath(path)
+            if _excluded(path, cache_dir):
+                continue
+            if exclude:
+                selected.pop(path, None)
+            else:
+                selected[path] = None
+    return sorted(selected)
+
+
+def _file_digest(path: str) -> bytes:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return b"unreadable"
+    return digest.digest()
+
+
+def cache_key(material: Dict[str, List[str]], cache_dir: str) -> Tuple[str, int]:
+    """Return the key and the number of input files it covers."""
+    digest = hashlib.sha256(KEY_VERSION)
+    for tag in ("task", "cmd", "shell", "limits", "arg", "env", "in", "out"):
+        values = material.get(tag, [])
+        if tag == "env":
+            values = sorted(values)
+        for value in values:
+            digest.update(f"{tag}={value}".encode("utf-8", "surrogateescape") + b"\0")
+    inputs = expand(material.get("in", []), cache_dir)
+    for path in inputs:
+        digest.update(b"file=" + os.fsencode(path) + b"\0" + _file_digest(path))
+    return digest.hexdigest(), len(inputs)
+
+
+def _entry_size(entry: str) -> int:
+    total = 0
+    for root, _, files in os.walk(entry):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def restore_outputs(entry: str) -> int:
+    stored = os.path.join(entry, OUTPUTS)
+    restored = 0
+    for root, _, files in os.walk(stored):
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.relpath(source, stored)
+            if os.path.isfile(target) and filecmp.cmp(source, target, shallow=False):
+                continue
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            shutil.copy2(source, target)
+            restored += 1
+    return restored
+
+
+def prune(cache_dir: str, keep: str = "") -> None:
+    max_entries = _env_int("WGX_TASK_CACHE_MAX", DEFAULT_MAX_ENTRIES)
+    max_bytes = _env_int("WGX_TASK_CACHE_MAX_MB", DEFAULT_MAX_MB) * 1024 * 1024
+    entries = []
+    for name in os.listdir(cache_dir):
+        meta = os.path.join(cache_dir, name, META)
+        try:
+            stamp = os.stat(meta).st_mtime_ns
+        except OSError:
+            continue
+        entries.append((stamp, name))
+    entries.sort(reverse=True)
+    total = 0
+    for index, (_, name) in enumerate(entries):
+        entry = os.path.join(cache_dir, name)
+        total += _entry_size(entry)
+        if name != keep and (index >= max_entries or total > max_bytes):
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def check(cache_dir: str, material: Dict[str, List[str]], restore: bool, refresh: bool) -> str:
+    key, _ = cache_key(material, cache_dir)
+    entry = os.path.join(cache_dir, key)
+    meta = os.path.join(entry, META)
+    if refresh or not os.path.isfile(meta):
+        return f"miss {key}"
+    os.utime(meta)
+    if restore:
+        restore_outputs(entry)
+    return f"hit {key}"
+
+
+def store(cache_dir: str, key: str, material: Dict[str, List[str]]) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    ignore = os.path.join(cache_dir, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w", encoding="utf-8") as handle:
+            handle.write("*\n")
+
+    staging = os.path.join(cache_dir, f".tmp-{key}-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    outputs = expand(material.get("out", []), cache_dir)
+    for path in outputs:
+        target = os.path.join(staging, OUTPUTS, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target)
+    os.makedirs(staging, exist_ok=True)
+    with open(os.path.join(staging, META), "w", encoding="utf-8") as handle:
+        json.dump({
+            "task": (material.get("task") or [""])[0],
+            "key": key,
+            "stored_at": int(time.time()),
+            "outputs": outputs,
+        }, handle, sort_keys=True)
+
+    entry = os.path.join(cache_dir, key)
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(staging, entry)
+    prune(cache_dir, keep=key)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 2 or argv[0] not in ("check", "store"):
+        _usage()
+    command, cache_dir, rest = argv[0], argv[1], argv[2:]
+    try:
+        material = read_material(sys.stdin.buffer.read())
+    except ValueError as exc:
+        print(f"wgx: task cache: {exc}", file=sys.stderr)
+        return 2
+
+    if command == "check":
+        if any(option not in ("--restore", "--refresh") for option in rest):
+            _usage()
+        print(check(cache_dir, material, "--restore" in rest, "--refresh" in rest))
+        return 0
+
+    if len(rest) != 1 or len(rest[0]) != 64:
+        _usage()
+    store(cache_dir, rest[0], material)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""Run several WGX tasks in a bounded pool of process groups.
+
+Every task runs as ``wgx task NAME`` in its own session, the same front door
+validate_runner.py uses, with stdout and stderr merged into one pipe. A task
+is done when its process exits, not when the pipe closes: what is readable
+then is drained and whatever is left of its process group (a server started
+with ``&``, a daemon, leftover test workers) is killed. Output
+is written as it arrives with each line prefixed by the padded task name, or
+(--group) held back and written as one block when the task finishes.
+--fail-fast terminates running tasks and skips queued ones after the first
+failure. A summary table with status, exit code and duration closes the run;
+the exit status is that of the first failed task in argument order.
+
+With --graph, stdin holds one "<task> <need>..." line per task (a workflow's
+WGX_WORKFLOW_NEEDS): a task starts once every need passed and is skipped
+when one failed. Start and end of each task are reported as progress lines,
+and the summary names the critical path, i.e. the chain of tasks that
+bounded the wall time.
+"""
+
+from __future__ import annotations
+
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NoReturn, Optional
+
+try:
+    from modules.validate_runner import _Child, _exit_code, _signal_group, _terminate
+except ImportError:  # run as a script from modules/
+    from validate_runner import _Child, _exit_code, _signal_group, _terminate
+
+USAGE = (
+    "usage: task_runner.py [--group] [--fail-fast] [--graph] "
+    "JOBS REPOSITORY_ROOT WGX_EXECUTABLE TASK..."
+)
+
+
+class Interrupted(Exception):
+    """SIGINT or SIGTERM reached the runner."""
+
+
+class Job:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.status = "queued"
+        self.exit_code: Optional[int] = None
+        self.duration_ms: Optional[int] = None
+        self.process: Optional[_Child] = None
+        self.started = 0
+        self.finished = 0
+        # Unterminated last line (prefix mode) or the whole output (--group).
+        self.pending = b""
+
+
+def _usage() -> NoReturn:
+    raise SystemExit(USAGE)
+
+
+def read_graph(stream: BinaryIO, names: List[str]) -> Dict[str, List[str]]:
+    """Parse "<task> <need>..." lines; reject unknown needs and cycles."""
+    needs: Dict[str, List[str]] = {name: [] for name in names}
+    if len(needs) != len(names):
+        raise ValueError("a task is listed twice")
+    for raw in stream.read().decode().splitlines():
+        fields = raw.split()
+        if not fields:
+            continue
+        if fields[0] not in needs:
+            raise ValueError(f"graph names unknown task '{fields[0]}'")
+        for need in fields[1:]:
+            if need not in needs:
+                raise ValueError(f"'{fields[0]}' needs '{need}', which is not part of the run")
+        needs[fields[0]] = fields[1:]
+
+    remaining = {name: set(deps) for name, deps in needs.items()}
+    while remaining:
+        roots = [name for name, deps in remaining.items() if not deps]
+        if not roots:
+            raise ValueError("dependency cycle between " + ", ".join(sorted(remaining)))
+        for name in roots:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(roots)
+    return needs
+
+
+class Runner:
+    def __init__(self, names: List[str], jobs: int, repository_root: Path,
+                 executable: Path, group: bool, fail_fast: bool,
+                 out: BinaryIO, needs: Optional[Dict[str, List[str]]] = None) -> None:
+        self.jobs = [Job(name) for name in names]
+        self.by_name = {job.name: job for job in self.jobs}
+        self.needs = needs
+        self.run_started = 0
+        self.limit = jobs
+        self.repository_root = repository_root
+        self.executable = executable
+        self.group = group
+        self.fail_fast = fail_fast
+        self.out = out
+        self.width = max(len(name) for name in names)
+        self.selector = selectors.DefaultSelector()
+        self.running: List[Job] = []
+        self.failed = False
+        # Reaper threads write a byte here when a task exits, which wakes the
+        # selector even while a descendant keeps the task's pipe open.
+        self.wake_r, wake_w = os.pipe()
+        self.wake_w: Optional[int] = wake_w
+        self.wake_lock = threading.Lock()
+        os.set_blocking(self.wake_r, False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, None)
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self.out.flush()
+
+    def _prefix(self, job: Job, lines: List[bytes]) -> None:
+        prefix = f"{job.name:<{self.width}} | ".encode()
+        self._write(b"".join(prefix + line + b"\n" for line in lines))
+
+    def _output(self, job: Job, chunk: bytes) -> None:
+        job.pending += chunk
+        if self.group:
+            return
+        lines = job.pending.split(b"\n")
+        job.pending = lines.pop()
+        if lines:
+            self._prefix(job, lines)
+
+    def _start(self, job: Job) -> None:
+        job.started = time.monotonic_ns()
+        job.process = _Child(subprocess.Popen(
+            [str(self.executable), "task", job.name],
+            cwd=self.repository_root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            close_fds=True,
+        ), on_exit=self._wake)
+        job.status = "running"
+        if self.needs is not None:
+            self._write(f"→ {job.name}\n".encode())
+        self.selector.register(job.process.stdout, selectors.EVENT_READ, job)
+        self.running.append(job)
+
+    def _close(self, job: Job) -> None:
+        if not job.process.stdout.closed:
+            self.selector.unregister(job.process.stdout)
+            job.process.stdout.close()
+
+    def _drain(self, job: Job) -> None:
+        """Read what a terminated task left in its pipe without blocking."""
+        pipe = job.process.stdout
+        if pipe.closed:
+            return
+        os.set_blocking(pipe.fileno(), False)
+        try:
+            while True:
+                chunk = os.read(pipe.fileno(), 65536)
+                if not chunk:
+                    break
+                self._output(job, chunk)
+        except BlockingIOError:
+            pass
+
+    def _finish(self, job: Job, returncode: int, cancelled: bool = False) -> None:
+        self._drain(job)
+        self._close(job)
+        # Descendants that outlive the task would hold on to its resources.
+        _signal_group(job.process.pid, signal.SIGKILL)
+        self.running.remove(job)
+        job.finished = time.monotonic_ns()
+        job.duration_ms = max(0, (job.finished - job.started) // 1_000_000)
+        job.exit_code = _exit_code(returncode)
+        if cancelled:
+            job.status = "cancelled"
+        else:
+            job.status = "passed" if job.exit_code == 0 else "failed"
+
+        header = (f"── {job.name} ({job.status}, exit {job.exit_code}, "
+                  f"{job.duration_ms} ms)\n").encode()
+        if self.group:
+            self._write(header)
+            if job.pending:
+                self._write(job.pending if job.pending.endswith(b"\n") else job.pending + b"\n")
+        else:
+            if job.pending:
+                self._prefix(job, [job.pending])
+            if self.needs is not None:
+                self._write(header)
+        job.pending = b""
+
+    def _ready(self, job: Job) -> Optional[bool]:
+        """True once every need passed, False if one cannot pass any more."""
+        state: Optional[bool] = True
+        for name in (self.needs or {}).get(job.name, ()):
+            status = self.by_name[name].status
+            if status in ("failed", "cancelled", "skipped"):
+                return False
+            if status != "passed":
+                state = None
+        return state
+
+    def _schedule(self, queued: List[Job]) -> None:
+        blocked = True
+        while blocked:
+            blocked = False
+            for job in list(queued):
+                if self._ready(job) is False:
+                    queued.remove(job)
+                    job.status = "skipped"
+                    self._write(f"── {job.name} (skipped: a needed task did not pass)\n".encode())
+                    blocked = True
+        for job in list(queued):
+            if len(self.running) >= self.limit:
+                break
+            if self._ready(job):
+                queued.remove(job)
+                self._start(job)
+
+    def _cancel_running(self) -> None:
+        for job in list(self.running):
+            # A task that already exited keeps its own result.
+            returncode = job.process.poll()
+            cancelled = returncode is None
+            if cancelled:
+                returncode = _terminate(job.process)
+            self._finish(job, returncode, cancelled=cancelled)
+
+    def run(self) -> None:
+        queued = list(self.jobs)
+        self.run_started = time.monotonic_ns()
+        try:
+            while queued or self.running:
+                if not self.failed:
+                    self._schedule(queued)
+                if not self.running:
+                    break
+                for key, _ in self.selector.select():
+                    job = key.data
+                    if job is None:
+                        self._reap()
+                        break
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        self._output(job, chunk)
+                    else:
+                        # The task's exit finishes it; this only ends its output.
+                        self._close(job)
+        except Interrupted:
+            self._cancel_running()
+            raise
+        finally:
+            for job in queued:
+                job.status = "skipped"
+            self.selector.close()
+            with self.wake_lock:
+                os.close(self.wake_w)
+                self.wake_w = None
+            os.close(self.wake_r)
+
+    def _wake(self) -> None:
+        with self.wake_lock:
+            if self.wake_w is not None:
+                os.write(self.wake_w, b"\0")
+
+    def _reap(self) -> None:
+        """Finish every task whose process exited."""
+        try:
+            while os.read(self.wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        for job in list(self.running):
+            returncode = job.process.poll()
+            if returncode is None:
+                continue
+            self._finish(job, returncode)
+            if job.status == "failed" and self.fail_fast and not self.failed:
+                self.failed = True
+                self._cancel_running()
+                return
+
+    def critical_path(self) -> List[Job]:
+        """Walk back from the last task to finish through its latest-finishing need."""
+        finished = [job for job in self.jobs if job.finished]
+        if not finished or self.needs is None:
+            return []
+        job = max(finished, key=lambda item: item.finished)
+        path = [job]
+        while True:
+            needs = [self.by_name[name] for name in self.needs.get(job.name, ())]
+            needs = [need for need in needs if need.finished]
+            if not needs:
+                break
+            job = max(needs, key=lambda item: item.finished)
+            path.append(job)
+        return path[::-1]
+
+    def summary(self) -> str:
+        width = max(self.width, len("task"))
+        rows = [f"{'task':<{width}}  {'status':<9}  {'exit':>4}  {'duration_ms':>11}"]
+        for job in self.jobs:
+            exit_code = "-" if job.exit_code is None else str(job.exit_code)
+            duration = "-" if job.duration_ms is None else str(job.duration_ms)
+            rows.append(f"{job.name:<{width}}  {job.status:<9}  {exit_code:>4}  {duration:>11}")
+        path = self.critical_path()
+        if path:
+            wall_ms = (path[-1].finished - self.run_started) // 1_000_000
+            chain = " → ".join(f"{job.name} ({job.duration_ms} ms)" for job in path)
+            total = sum(job.duration_ms or 0 for job in path)
+            rows.append(f"critical path: {chain} = {total} ms of {wall_ms} ms wall")
+        return "\n".join(rows) + "\n"
+
+    def exit_status(self) -> int:
+        for job in self.jobs:
+            if job.status == "failed":
+                return job.exit_code or 1
+        return 0
+
+
+def _raise_interrupted(signum: int, frame: object) -> None:
+    raise Interrupted()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    group = fail_fast = graph = False
+    while args and args[0].startswith("--"):
+        option = args.pop(0)
+        if option == "--group":
+            group = True
+        elif option == "--fail-fast":
+            fail_fast = True
+        elif option == "--graph":
+            graph = True
+        else:
+            _usage()
+    if len(args) < 4:
+        _usage()
+
+    try:
+        jobs = int(args[0])
+    except ValueError:
+        _usage()
+    if jobs < 0:
+        _usage()
+    jobs = jobs or os.cpu_count() or 1
+
+    repository_root = Path(args[1])
+    executable = Path(args[2])
+    names = args[3:]
+    if not repository_root.is_dir() or not executable.is_file() or not all(names):
+        _usage()
+
+    needs = None
+    if graph:
+        try:
+            needs = read_graph(sys.stdin.buffer, names)
+        except ValueError as exc:
+            print(f"wgx: invalid task graph: {exc}", file=sys.stderr)
+            return 2
+
+    runner = Runner(names, jobs, repository_root, executable, group, fail_fast,
+                    sys.stdout.buffer, needs)
+    signal.signal(signal.SIGINT, _raise_interrupted)
+    signal.signal(signal.SIGTERM, _raise_interrupted)
+    status = None
+    try:
+        runner.run()
+    except Interrupted:
+        status = 130
+    sys.stdout.buffer.write(b"\n" + runner.summary().encode())
+    sys.stdout.buffer.flush()
+    return runner.exit_status() if status is None else status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Rerun one WGX task whenever its input files change.
+
+The watched files are those the task's ``inputs:`` globs match (--input,
+expanded like the task cache does), minus its ``outputs:`` (--output), or,
+without inputs, ``git ls-files --cached --others --exclude-standard``. The
+task runs as ``wgx task NAME [-- ARG...]`` in its own process group.
+
+Changes are noticed through inotify (via ctypes) on the directories holding
+watched files, or by stat polling where inotify is unavailable or
+WGX_WATCH_POLL=1. Either way a wake-up only counts once the burst is over:
+events are coalesced until none arrived for WGX_WATCH_DEBOUNCE_MS (default
+200), then the files' (mtime, size) are compared with the last run's. A
+change while the task runs terminates its process group (SIGTERM, SIGKILL
+after a 1 s grace) and starts it again. SIGINT or SIGTERM end the watch with
+status 130.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NoReturn, Optional, Set, Tuple
+
+try:
+    from modules.task_cache import expand
+    from modules.validate_runner import _exit_code, _terminate
+except ImportError:  # run as a script from modules/
+    from task_cache import expand
+    from validate_runner import _exit_code, _terminate
+
+USAGE = (
+    "usage: task_watch.py [--input GLOB]... [--output GLOB]... "
+    "REPOSITORY_ROOT WGX_EXECUTABLE TASK [ARG...]"
+)
+DEFAULT_DEBOUNCE_MS = 200
+POLL_INTERVAL = 0.5
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class Interrupted(Exception):
+    """SIGINT or SIGTERM reached the watcher."""
+
+
+def _usage() -> NoReturn:
+    raise SystemExit(USAGE)
+
+
+def _say(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def watched_files(inputs: List[str], outputs: List[str], cache_dir: str) -> List[str]:
+    """Relative paths to watch in the current directory."""
+    if inputs:
+        files = expand(inputs, cache_dir)
+    else:
+        listing = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        ).stdout
+        files = sorted({os.path.normpath(os.fsdecode(item))
+                        for item in listing.split(b"\0") if item})
+    if outputs:
+        produced = set(expand(outputs, cache_dir))
+        files = [path for path in files if path not in produced]
+    return files
+
+
+def snapshot(files: List[str]) -> Snapshot:
+    state: Snapshot = {}
+    for path in files:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        state[path] = (info.st_mtime_ns, info.st_size)
+    return state
+
+
+def changed_paths(before: Snapshot, after: Snapshot) -> List[str]:
+    return sorted(path for path in before.keys() | after.keys()
+                  if before.get(path) != after.get(path))
+
+
+class PollWatcher:
+    """Stats the watched files every POLL_INTERVAL; new files in watched
+    directories show up with the next sync, i.e. after the next real change."""
+
+    name = "polling"
+
+    def __init__(self) -> None:
+        self.files: List[str] = []
+        self.state: Snapshot = {}
+
+    def sync(self, files: List[str]) -> None:
+        self.files = files
+        self.state = snapshot(files)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        time.sleep(POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL))
+        state = snapshot(self.files)
+        if state == self.state:
+            return False
+        self.state = state
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """inotify watches on every directory that holds a watched file."""
+
+    name = "inotify"
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: Set[str] = set()
+
+    def sync(self, files: List[str]) -> None:
+        directories = {"."}
+        for path in files:
+            parent = os.path.dirname(path)
+            while parent and parent not in directories:
+                directories.add(parent)
+                parent = os.path.dirname(parent)
+        for directory in sorted(directories - self.watched):
+            if self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+                errno = ctypes.get_errno()
+                if errno == 2:  # ENOENT: gone since the listing
+                    continue
+                raise OSError(errno, f"inotify_add_watch {directory}: {os.strerror(errno)}")
+            self.watched.add(directory)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher() -> object:
+    if os.environ.get("WGX_WATCH_POLL") == "1" or not sys.platform.startswith("linux"):
+        return PollWatcher()
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return PollWatcher()
+
+
+class Watch:
+    def __init__(self, command: List[str], task: str, inputs: List[str],
+                 outputs: List[str], cache_dir: str, debounce_ms: int) -> None:
+        self.command = command
+        self.task = task
+        self.inputs = inputs
+        self.outputs = outputs
+        self.cache_dir = cache_dir
+        self.debounce = debounce_ms / 1000
+        self.watcher = make_watcher()
+        self.process: Optional[subprocess.Popen] = None
+        self.started = 0
+        self.files: List[str] = []
+        self.state: Snapshot = {}
+
+    def _refresh(self) -> Snapshot:
+        self.files = watched_files(self.inputs, self.outputs, self.cache_dir)
+        try:
+            self.watcher.sync(self.files)
+        except OSError as exc:
+            _say(f"wgx: {exc}; falling back to polling")
+            self.watcher.close()
+            self.watcher = PollWatcher()
+            self.watcher.sync(self.files)
+        return snapshot(self.files)
+
+    def _start(self) -> None:
+        self.started = time.monotonic_ns()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.DEVNULL,
+                                        start_new_session=True, close_fds=True)
+
+    def _reap(self) -> None:
+        if self.process is None:
+            return
+        returncode = self.process.poll()
+        if returncode is None:
+            return
+        exit_code = _exit_code(returncode)
+        status = "passed" if exit_code == 0 else "failed"
+        duration_ms = (time.monotonic_ns() - self.started) // 1_000_000
+        _say(f"── {self.task} {status} (exit {exit_code}, {duration_ms} ms); waiting for changes")
+        self.process = None
+
+    def _settle(self) -> None:
+        """Swallow the rest of a burst: wait until it is quiet for the debounce time."""
+        deadline = time.monotonic() + max(self.debounce * 20, 5.0)
+        while self.watcher.wait(self.debounce) and time.monotonic() < deadline:
+            pass
+
+    def cancel(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            _terminate(self.process)
+        self.process = None
+
+    def run(self) -> None:
+        self.state = self._refresh()
+        _say(f"wgx: watching {len(self.files)} files ({self.watcher.name}) for {self.task}; "
+             "Ctrl-C stops")
+        self._start()
+        while True:
+            woke = self.watcher.wait(0.1 if self.process is not None else None)
+            self._reap()
+            if not woke:
+                continue
+            self._settle()
+            state = self._refresh()
+            changed = changed_paths(self.state, state)
+            if not changed:
+                continue
+            self.state = state
+            more = f" (+{len(changed) - 1} more)" if len(changed) > 1 else ""
+            if self.process is not None:
+                _say(f"── {changed[0]}{more} changed; restarting {self.task}")
+                self.cancel()
+            else:
+                _say(f"── {changed[0]}{more} changed; running {self.task}")
+            self._start()
+
+
+def _raise_interrupted(signum: int, frame: object) -> None:
+    raise Interrupted()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    inputs: List[str] = []
+    outputs: List[str] = []
+    while args and args[0] in ("--input", "--output"):
+        if len(args) < 2:
+            _usage()
+        (inputs if args[0] == "--input" else outputs).append(args[1])
+        args = args[2:]
+    if len(args) < 3:
+        _usage()
+
+    repository_root = Path(args[0])
+    executable = Path(args[1])
+    task, forwarded = args[2], args[3:]
+    if not repository_root.is_dir() or not executable.is_file() or not task:
+        _usage()
+
+    os.chdir(repository_root)
+    cache_dir = os.environ.get("WGX_TASK_CACHE_DIR") or os.path.join(".wgx", "cache", "tasks")
+    if not inputs:
+        probe = subprocess.run(["git", "rev-parse", "--is-inside-work-tree"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if probe.returncode != 0:
+            _say(f"wgx: --watch needs inputs: on task {task} or a git repository")
+            return 2
+
+    command = [str(executable), "task", task]
+    if forwarded:
+        command += ["--", *forwarded]
+    watch = Watch(command, task, inputs, outputs, cache_dir,
+                  _env_int("WGX_WATCH_DEBOUNCE_MS", DEFAULT_DEBOUNCE_MS))
+    signal.signal(signal.SIGINT, _raise_interrupted)
+    signal.signal(signal.SIGTERM, _raise_interrupted)
+    try:
+        watch.run()
+    except Interrupted:
+        watch.cancel()
+        return 130
+    finally:
+        watch.watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,10 +6,30 @@ no repository correctness, no CI replacement and no merge readiness; those
 boundaries are carried in the emitted `does_not_establish` list.
 
 Records arrive as NUL-separated 6-tuples on a file so Bash never has to quote
-JSON itself:
+JSON itself, or as lists from validate_runner.py --plan, which calls build()
+in-process:
 
     check\0<name>\0<status>\0<exit_code>\0<duration_ms>\0<command>
     skip\0<name>\0<kind>\0<reason>\0\0
+    cache\0<name>\0<hit|miss|remote>\0\0\0
+    output\0<name>\0<capture.json>\0\0\0
+    reuse\0<name>\0<receipt_sha256>\0\0\0
+
+A cache record follows the check of a task that declares inputs (task result
+cache, hit or miss) or whose pass came from the shared result cache (remote)
+and becomes that check's ``cache`` field.
+
+An output record names the run description validate_runner.py wrote for the
+check. It becomes the check's ``output`` field, the log file by path and
+sha256 (or, when writing it failed, ``log.error`` without a path) and, for
+checks that did not pass, the redacted output tail, and its
+``resources`` field: CPU time, peak RSS, page faults, context switches and
+block I/O of the task's process tree. A check with status
+``resource_exceeded`` also gets ``limit``, the declared limit it ran into.
+
+A reuse record marks a check that was not run because an earlier run passed
+it with the same inputs (validate_reuse.py); it becomes ``reused_from``, the
+receipt_sha256 of that run.
 """
 from __future__ import annotations
 
@@ -19,9 +39,20 @@ import os
 import platform
 import re
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 RECORD_FIELDS = 6
+RESOURCE_FIELDS = (
+    'user_cpu_ms',
+    'sys_cpu_ms',
+    'max_rss_kb',
+    'major_faults',
+    'minor_faults',
+    'voluntary_context_switches',
+    'involuntary_context_switches',
+    'block_input_ops',
+    'block_output_ops',
+)
 
 # Environment names whose values never enter a receipt.
 RE_SECRET_NAME = re.compile(
@@ -112,6 +143,47 @@ def read_records(path: str) -> List[List[str]]:
     return records
 
 
+def read_capture(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding='utf-8') as handle:
+            capture = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return capture if isinstance(capture, dict) else {}
+
+
+def resources_field(capture: Dict[str, Any]) -> Dict[str, Any]:
+    usage = capture.get('resources')
+    if not isinstance(usage, dict):
+        return {}
+    resources: Dict[str, Any] = {name: _int(usage.get(name)) for name in RESOURCE_FIELDS}
+    try:
+        resources['cpu_ratio'] = float(usage.get('cpu_ratio', 0))
+    except (TypeError, ValueError):
+        resources['cpu_ratio'] = 0.0
+    return resources
+
+
+def output_field(capture: Dict[str, Any], status: str) -> Dict[str, Any]:
+    if not capture:
+        return {}
+    output: Dict[str, Any] = {
+        'log': {
+            'path': capture.get('log'),
+            'sha256': capture.get('log_sha256'),
+            'bytes': _int(capture.get('log_bytes')),
+            'compressed': bool(capture.get('compressed')),
+            'truncated': bool(capture.get('truncated')),
+        },
+        'bytes': _int(capture.get('output_bytes')),
+    }
+    if capture.get('error'):
+        output['log']['error'] = str(capture['error'])
+    if status != 'passed':
+        output['tail'] = redact(str(capture.get('tail') or ''))
+    return output
+
+
 def environment_identity() -> Dict[str, Any]:
     """Identify the environment without exposing any secret value."""
     names = sorted(name for name in os.environ if RE_SECRET_NAME.search(name))
@@ -134,7 +206,7 @@ def environment_identity() -> Dict[str, Any]:
     return identity
 
 
-def build(argv: List[str]) -> Dict[str, Any]:
+def build(argv: List[str], records: Optional[List[List[str]]] = None) -> Dict[str, Any]:
     (
         profile,
         repo_root,
@@ -152,7 +224,9 @@ def build(argv: List[str]) -> Dict[str, Any]:
 
     checks: List[Dict[str, Any]] = []
     skipped: List[Dict[str, Any]] = []
-    for kind, name, a, b, c, command in read_records(records_path):
+    if records is None:
+        records = read_records(records_path)
+    for kind, name, a, b, c, command in records:
         if kind == 'check':
             command_text = redact(command)
             checks.append({
@@ -163,6 +237,24 @@ def build(argv: List[str]) -> Dict[str, Any]:
                 'command': command_text,
                 'command_sha256': hashlib.sha256(command_text.encode('utf-8')).hexdigest(),
             })
+        elif kind == 'cache' and checks and checks[-1]['name'] == name and a in ('hit', 'miss', 'remote'):
+            checks[-1]['cache'] = a
+        elif kind == 'output' and checks and checks[-1]['name'] == name:
+            capture = read_capture(a)
+            output = output_field(capture, checks[-1]['status'])
+            if output:
+                checks[-1]['output'] = output
+            resources = resources_field(capture)
+            if resources:
+                checks[-1]['resources'] = resources
+            exceeded = capture.get('exceeded')
+            if checks[-1]['status'] == 'resource_exceeded' and isinstance(exceeded, dict):
+                checks[-1]['limit'] = {
+                    'name': str(exceeded.get('name') or ''),
+                    'value': _int(exceeded.get('value')),
+                }
+        elif kind == 'reuse' and checks and checks[-1]['name'] == name and a:
+            checks[-1]['reused_from'] = a
         elif kind == 'skip':
             skipped.append({'name': name, 'kind': a, 'reason': redact(b)})
 
@@ -186,6 +278,7 @@ def build(argv: List[str]) -> Dict[str, Any]:
             'ok': manifest_ok == 'true',
             'errors': [item for item in manifest_errors.split('\n') if item],
             'missing_capabilities': [item for item in manifest_missing.split('\n') if item],
+            'parser_backend': os.environ.get('WGX_PROFILE_PARSER_BACKEND') or None,
         },
         'checks': checks,
         'skipped': skipped,
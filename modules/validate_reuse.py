@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Reuse of passed validate checks whose inputs did not change.
+
+After a run, every check that passed is remembered under a key and points to
+the receipt that recorded it:
+
+    <STORE>/<key>.json  {"task": ..., "receipt_sha256": ..., "stored_at": ...}
+
+The key is the sha256 over the repository root, the sha256 of its profile
+manifest, the task name, the sha256 of its command, its env items and limits,
+the receipt's environment identity and the state of its inputs. The store is
+shared by every repository, so two checkouts with the same task name never
+share a pass. For a task that declares ``inputs:`` that state is the git blob
+hash of every file the globs match (``git hash-object --stdin-paths``, so
+edits not yet committed count); for any other task it is the tree hash of the
+whole working tree (remote_cache.tree_hash). A later run with the same key
+takes the pass over instead of running the check; its receipt names the
+original as ``reused_from``. A task whose globs match no file, or without
+inputs outside a git work tree, is never reused.
+
+The store keeps the WGX_VALIDATE_REUSE_MAX (default 256) most recently used
+entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from typing import List, Optional
+
+try:
+    from modules.task_cache import expand
+except ImportError:  # run as a script from modules/
+    from task_cache import expand
+
+KEY_VERSION = b"wgx-validate-reuse-v2\0"
+DEFAULT_MAX_ENTRIES = 256
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def blob_digest(patterns: List[str], cache_dir: str) -> Optional[str]:
+    """sha256 over "path blob" of every input file, or None if git cannot tell.
+
+    None too when the globs match no file: a pass that read nothing says
+    nothing about the next run.
+    """
+    files = expand(patterns, cache_dir)
+    if not files or any("\n" in path for path in files):
+        return None
+    try:
+        blobs = subprocess.run(
+            ["git", "hash-object", "--stdin-paths"], check=True,
+            input="".join(path + "\n" for path in files),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ).stdout.split()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if len(blobs) != len(files):
+        return None
+    digest = hashlib.sha256()
+    for path, blob in zip(files, blobs):
+        digest.update(f"{path}\0{blob}\0".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def reuse_key(repository: str, manifest_sha256: str, task: str, command: str,
+              envs: List[str], limits: str, identity_sha256: str, inputs: str) -> str:
+    digest = hashlib.sha256(KEY_VERSION)
+    items = [
+        f"repository={repository}",
+        f"manifest_sha256={manifest_sha256}",
+        f"task={task}",
+        f"cmd_sha256={hashlib.sha256(command.encode('utf-8', 'surrogateescape')).hexdigest()}",
+        f"limits={limits}",
+        f"identity={identity_sha256}",
+        f"inputs={inputs}",
+    ] + [f"env={item}" for item in sorted(envs)]
+    for item in items:
+        digest.update(item.encode("utf-8", "surrogateescape") + b"\0")
+    return digest.hexdigest()
+
+
+def lookup(store: str, key: str) -> Optional[str]:
+    """receipt_sha256 of the run that passed under this key, if remembered."""
+    path = os.path.join(store, key + ".json")
+    try:
+        with open(path, encoding="utf-8") as handle:
+            entry = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    receipt_sha256 = entry.get("receipt_sha256") if isinstance(entry, dict) else None
+    if not isinstance(receipt_sha256, str) or not receipt_sha256:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return receipt_sha256
+
+
+def remember(store: str, entries: List[tuple], receipt_sha256: str) -> None:
+    """Record (key, task) pairs as passed in the receipt; then prune."""
+    if not entries:
+        return
+    os.makedirs(store, exist_ok=True)
+    for key, task in entries:
+        handle = tempfile.NamedTemporaryFile("w", dir=store, prefix=".tmp-", suffix=".json",
+                                             delete=False, encoding="utf-8")
+        with handle:
+            json.dump({"task": task, "receipt_sha256": receipt_sha256,
+                       "stored_at": int(time.time())}, handle, sort_keys=True)
+        os.replace(handle.name, os.path.join(store, key + ".json"))
+    prune(store)
+
+
+def prune(store: str) -> None:
+    max_entries = _env_int("WGX_VALIDATE_REUSE_MAX", DEFAULT_MAX_ENTRIES)
+    entries = []
+    for name in os.listdir(store):
+        if not name.endswith(".json") or name.startswith(".tmp-"):
+            continue
+        try:
+            entries.append((os.stat(os.path.join(store, name)).st_mtime_ns, name))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    for _, name in entries[max_entries:]:
+        try:
+            os.unlink(os.path.join(store, name))
+        except OSError:
+            pass
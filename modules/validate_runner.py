@@ -1,23 +1,390 @@
 #!/usr/bin/env python3
-"""Run one WGX validation task with a process-group timeout."""
+"""Run WGX validation tasks with a process-group timeout.
+
+Prints "<status> <exit_code> <duration_ms>", followed by "hit" or "miss" when
+the task consulted the task result cache.
+
+With --plan FILE the runner is the supervisor of a whole `wgx validate
+--profile` run instead: FILE holds the resolved plan as NUL-separated
+6-field records, like the receipt records of validate_receipt.py:
+
+    profile\0<name>\0\0\0\0\0
+    repository\0<name>\0<commit>\0<dirty>\0\0\0
+    manifest\0<ok>\0<errors>\0<missing>\0\0\0
+    logs\0<dir>\0\0\0\0\0                  (capture base per check)
+    reuse\0<dir>\0<manifest sha256>\0\0\0\0 (validate_reuse.py store)
+    remote\0<url>\0<tree>\0\0\0\0           (shared result cache)
+    env\0<NAME=value>\0\0\0\0\0              (task env, part of both keys)
+    run\0<name>\0<command>\0<limits>\0<serial 0|1>\0<input globs>
+    skip\0<name>\0<kind>\0<reason>\0\0
+
+It runs every check on up to --jobs threads (0: one per CPU), writes
+progress to stderr (unless --quiet) and the receipt, built in-process, to
+stdout; the exit status is 0 for a passed receipt and 1 for a failed one.
+Per check that saves a Python start-up and the Bash subshells around it.
+With a reuse store, a check whose repository, manifest, inputs, command,
+env and environment identity match an earlier pass is not run; see
+validate_reuse.py.
+
+With --remote URL, stdin carries the check's key material (see
+remote_cache.py). A passed result stored under that key is reported as
+"passed 0 <lookup_ms> remote" without running the task; otherwise the task
+runs with its output captured, and a pass is published together with the
+log (WGX_REMOTE_CACHE_PUT=0: read only, WGX_REMOTE_CACHE_LOGS=0: no log).
+Cache failures only cost the shortcut: they are reported on stderr and the
+check runs as usual.
+
+With --capture BASE, stdout and stderr are read through one pipe. The whole
+stream goes to BASE.log (BASE.log.gz with WGX_VALIDATE_LOG_GZIP=1), cut off
+after WGX_VALIDATE_LOG_MAX_MB megabytes (default 64, 0: no limit); the last
+WGX_VALIDATE_TAIL_KB kilobytes (default 16) are kept in memory. BASE.json
+then describes the run for validate_receipt.py:
+
+    {"log": path, "log_sha256": sha256 of the file as stored,
+     "log_bytes": bytes logged, "output_bytes": bytes read,
+     "truncated": bool, "compressed": bool, "tail": text,
+     "resources": {...}}
+
+If writing the log fails (ENOSPC, EPIPE, ...), the partial file is removed,
+"log" and "log_sha256" are null, "truncated" is true and "error" says why;
+the task still runs to its end and the check keeps its record.
+
+"resources" is the task's rusage as wait4 reports it when reaping the task,
+including every descendant the task waited for, also for a run that
+_terminate had to reap after a timeout; checks running side by side each get
+their own. Orphans that outlive the task are not counted.
+
+Without --capture the output is discarded, unless --remote needs a log to
+publish.
+
+--limits "memory_mb=N cpu_seconds=N open_files=N timeout=N" (a task's
+WGX_TASK_LIMITS) shortens the timeout; `wgx task` itself applies the rlimits
+to the task command, not to its own wrapper. A check that ran into one of
+them is reported as "resource_exceeded" instead of failed or timeout, and
+BASE.json names the limit as "exceeded": {"name": ..., "value": ...}. A
+limit is only named on evidence: wgx's own "exceeded limits.<name>" notice,
+the exit status (124 for timeout; SIGXCPU or SIGKILL for cpu_seconds only if
+the task's CPU time reached it, SIGKILL for timeout only once its time was
+up) or, for memory_mb, a peak RSS at or above the limit. The output is not
+searched for error messages: a check whose own test prints "MemoryError" or
+"Too many open files" and fails is a plain failure, and so is an allocation
+that RLIMIT_AS refused; its output tail says why.
+"""
 
 from __future__ import annotations
 
+import glob
+import gzip
+import hashlib
+import json
 import os
+import re
+import resource
+import selectors
 import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import NoReturn
+from types import ModuleType
+from typing import BinaryIO, Callable, Dict, List, NoReturn, Optional, Tuple
+
+DEFAULT_TAIL_KB = 16
+DEFAULT_LOG_MAX_MB = 64
+READ_SIZE = 1 << 20
+F_SETPIPE_SZ = 1031  # fcntl.F_SETPIPE_SZ, Linux only
+LIMIT_NAMES = ("memory_mb", "cpu_seconds", "open_files", "timeout")
+RE_EXCEEDED_NOTICE = re.compile(rb"wgx: task \S+ exceeded limits\.(\w+)")
 
 
 def _usage() -> NoReturn:
     raise SystemExit(
-        "usage: validate_runner.py TIMEOUT_SECONDS REPOSITORY_ROOT WGX_EXECUTABLE TASK"
+        "usage: validate_runner.py [--remote URL] [--capture BASE] [--limits SPEC] "
+        "TIMEOUT_SECONDS REPOSITORY_ROOT WGX_EXECUTABLE TASK\n"
+        "       validate_runner.py --plan FILE [--jobs N] [--quiet] "
+        "TIMEOUT_SECONDS REPOSITORY_ROOT WGX_EXECUTABLE"
     )
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def parse_limits(spec: str) -> dict:
+    limits = {}
+    for item in spec.split():
+        name, sep, value = item.partition("=")
+        if not sep or name not in LIMIT_NAMES or not value.isdigit() or int(value) <= 0:
+            raise ValueError(f"invalid limit: {item!r}")
+        limits[name] = int(value)
+    return limits
+
+
+def exceeded_limit(limits: dict, exit_code: int, limit_timed_out: bool,
+                   tail: bytes, cpu_ms: int = 0, duration_ms: int = 0,
+                   max_rss_kb: int = 0) -> Optional[str]:
+    """The limit a finished check ran into, or None.
+
+    A SIGKILL also comes from timeout --kill-after and from the OOM killer,
+    so it only counts against cpu_seconds when ``cpu_ms`` reached the limit
+    (RLIMIT_CPU fires there; rusage accounting is a little coarser). ``tail``
+    is only searched for wgx's own notice.
+    """
+    if limit_timed_out:
+        return "timeout"
+    if not limits or exit_code == 0:
+        return None
+    notice = RE_EXCEEDED_NOTICE.search(tail)
+    if notice and notice.group(1).decode() in limits:
+        return notice.group(1).decode()
+    if "timeout" in limits and exit_code == 124:
+        return "timeout"
+    if exit_code in (128 + signal.SIGXCPU, 128 + signal.SIGKILL):
+        if "cpu_seconds" in limits and cpu_ms * 10 >= limits["cpu_seconds"] * 9000:
+            return "cpu_seconds"
+        if (exit_code == 128 + signal.SIGKILL and "timeout" in limits
+                and duration_ms >= limits["timeout"] * 1000):
+            return "timeout"
+    if "memory_mb" in limits and max_rss_kb >= limits["memory_mb"] * 1024:
+        return "memory_mb"
+    return None
+
+
+def resource_usage(before: resource.struct_rusage, after: resource.struct_rusage,
+                   wall_ms: int) -> dict:
+    """Rusage between two samples; NO_USAGE as ``before`` reads one wait4 result."""
+    user_ms = round((after.ru_utime - before.ru_utime) * 1000)
+    sys_ms = round((after.ru_stime - before.ru_stime) * 1000)
+    # ru_maxrss is a maximum, not a sum; with one reaped child it is the
+    # child's own peak. Linux reports KiB, macOS bytes.
+    max_rss_kb = after.ru_maxrss // 1024 if sys.platform == "darwin" else after.ru_maxrss
+    return {
+        "user_cpu_ms": user_ms,
+        "sys_cpu_ms": sys_ms,
+        "cpu_ratio": round((user_ms + sys_ms) / wall_ms, 2) if wall_ms else 0.0,
+        "max_rss_kb": max_rss_kb,
+        "major_faults": after.ru_majflt - before.ru_majflt,
+        "minor_faults": after.ru_minflt - before.ru_minflt,
+        "voluntary_context_switches": after.ru_nvcsw - before.ru_nvcsw,
+        "involuntary_context_switches": after.ru_nivcsw - before.ru_nivcsw,
+        "block_input_ops": after.ru_inblock - before.ru_inblock,
+        "block_output_ops": after.ru_oublock - before.ru_oublock,
+    }
+
+
+class _HashingFile:
+    """Write-through wrapper that hashes the bytes as they reach the file."""
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self.handle = handle
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        return self.handle.write(data)
+
+    def flush(self) -> None:
+        self.handle.flush()
+
+
+class Capture:
+    """Merged task output: a bounded tail in memory, a size-capped log file."""
+
+    def __init__(self, base: Optional[str]) -> None:
+        self.tail_limit = _env_int("WGX_VALIDATE_TAIL_KB", DEFAULT_TAIL_KB) * 1024
+        self.log_limit = _env_int("WGX_VALIDATE_LOG_MAX_MB", DEFAULT_LOG_MAX_MB) * 1024 * 1024
+        self.compressed = bool(base) and os.environ.get("WGX_VALIDATE_LOG_GZIP") == "1"
+        self.base = base
+        self.path: Optional[str] = None
+        self.tail = bytearray()
+        self.output_bytes = 0
+        self.log_bytes = 0
+        self.truncated = False
+        # Why the log was given up; the tail and the check's record remain.
+        self.error: Optional[str] = None
+        if base:
+            self.path = os.path.abspath(base + (".log.gz" if self.compressed else ".log"))
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.file: BinaryIO = open(self.path, "wb")
+            except OSError as exc:
+                self.path = None
+                self.fail(exc)
+        if self.path is None:
+            self.file = tempfile.TemporaryFile(prefix="wgx-check-log.")
+        self.hashing = _HashingFile(self.file)
+        self.sink = (gzip.GzipFile(filename="", mode="wb", fileobj=self.hashing,
+                                   compresslevel=1, mtime=0)
+                     if self.compressed else self.hashing)
+
+    def fail(self, exc: OSError) -> None:
+        """Stop logging after a write error (ENOSPC, EPIPE, ...); keep the tail."""
+        if self.error is None:
+            self.error = f"log not written: {exc.strerror or exc}"
+        self.truncated = True
+
+    def feed(self, chunk: bytes) -> None:
+        self.output_bytes += len(chunk)
+        if len(chunk) >= self.tail_limit:
+            self.tail = bytearray(chunk[len(chunk) - self.tail_limit:])
+        else:
+            self.tail += chunk
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:len(self.tail) - self.tail_limit]
+        if self.truncated:
+            return
+        room = len(chunk)
+        if self.log_limit:
+            room = min(room, self.log_limit - self.log_bytes)
+        if room < len(chunk):
+            self.truncated = True
+        if room > 0:
+            try:
+                self.sink.write(chunk[:room] if room < len(chunk) else chunk)
+            except OSError as exc:
+                self.fail(exc)
+                return
+            self.log_bytes += room
+
+    def drain(self, fd: int, budget: float = 0.5) -> None:
+        """Take what is left in the pipe without waiting for writers that linger."""
+        os.set_blocking(fd, False)
+        deadline = time.monotonic() + budget
+        try:
+            while time.monotonic() < deadline:
+                chunk = os.read(fd, READ_SIZE)
+                if not chunk:
+                    break
+                self.feed(chunk)
+        except BlockingIOError:
+            pass
+
+    def pump(self, process: "_Child", timeout: float) -> Optional[int]:
+        """Read until the task exits; its returncode, or None on timeout."""
+        fd = process.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                # Descendants may hold the pipe open after the task exited.
+                if process.poll() is not None:
+                    self.drain(fd)
+                    return process.returncode
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if not selector.select(min(remaining, 0.1)):
+                    continue
+                chunk = os.read(fd, READ_SIZE)
+                if not chunk:
+                    try:
+                        return process.wait(timeout=max(0.0, deadline - time.monotonic()))
+                    except subprocess.TimeoutExpired:
+                        return None
+                self.feed(chunk)
+
+    def close(self) -> None:
+        try:
+            if self.sink is not self.hashing:
+                self.sink.close()
+            self.file.flush()
+        except OSError as exc:
+            self.fail(exc)
+        if self.error is None:
+            return
+        # A partial log would pass for the check's output; drop it.
+        self.file.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        self.path = None
+        self.log_bytes = 0
+
+    def read_log(self) -> bytes:
+        if self.error is not None:
+            return b""
+        if self.path is None:
+            self.file.seek(0)
+            return self.file.read()
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        return gzip.decompress(data) if self.compressed else data
+
+    def tail_text(self) -> str:
+        text = bytes(self.tail).decode("utf-8", "replace")
+        if self.output_bytes > len(self.tail):
+            # Start at a line boundary rather than inside a cut line.
+            _, newline, rest = text.partition("\n")
+            if newline:
+                text = rest
+        return text
+
+    def describe(self) -> dict:
+        described = {
+            "log": self.path,
+            "log_sha256": None if self.error else self.hashing.digest.hexdigest(),
+            "log_bytes": self.log_bytes,
+            "output_bytes": self.output_bytes,
+            "truncated": self.truncated,
+            "compressed": self.compressed,
+            "tail": self.tail_text(),
+        }
+        if self.error:
+            described["error"] = self.error
+        return described
+
+    def write_sidecar(self, resources: Optional[dict] = None,
+                      exceeded: Optional[dict] = None) -> None:
+        described = self.describe()
+        if resources is not None:
+            described["resources"] = resources
+        if exceeded is not None:
+            described["exceeded"] = exceeded
+        path = self.base + ".json"
+        try:
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(described, handle, sort_keys=True)
+        except OSError:
+            # A cut-off description must not reach the receipt.
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            raise
+
+
+def _remote_cache() -> ModuleType:
+    # Imported on demand: http.server and urllib are not free at startup.
+    try:
+        from modules import remote_cache
+    except ImportError:  # run as a script from modules/
+        import remote_cache
+    return remote_cache
+
+
+def _remote_warning(exc: Exception) -> None:
+    print(f"wgx: remote cache: {exc}", file=sys.stderr)
+
+
+def _remote_key(url: str, material: bytes) -> Optional[str]:
+    remote_cache = _remote_cache()
+    try:
+        remote_cache.backend_for(url)
+        return remote_cache.result_key(remote_cache.read_material(material))
+    except (remote_cache.CacheError, ValueError) as exc:
+        _remote_warning(exc)
+        return None
+
+
 def _group_exists(process_group: int) -> bool:
     try:
         os.killpg(process_group, 0)
@@ -39,68 +406,510 @@ def _exit_code(returncode: int) -> int:
     return 128 + (-returncode) if returncode < 0 else returncode
 
 
-def main() -> int:
-    if len(sys.argv) != 5:
-        _usage()
+def _terminate(process: _Child) -> int:
+    """SIGTERM the process group, SIGKILL it after a 1 s grace; return the returncode."""
+    process_group = process.pid
+    _signal_group(process_group, signal.SIGTERM)
 
-    try:
-        timeout_seconds = int(sys.argv[1])
-    except ValueError:
-        _usage()
-    if timeout_seconds <= 0:
-        _usage()
+    grace_deadline = time.monotonic() + 1.0
+    while time.monotonic() < grace_deadline:
+        process.poll()
+        if not _group_exists(process_group):
+            break
+        time.sleep(0.05)
+    if _group_exists(process_group):
+        _signal_group(process_group, signal.SIGKILL)
 
-    repository_root = Path(sys.argv[2])
-    executable = Path(sys.argv[3])
-    task = sys.argv[4]
-    if not repository_root.is_dir() or not executable.is_file() or not task:
-        _usage()
+    if process.returncode is None:
+        try:
+            return process.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            _signal_group(process_group, signal.SIGKILL)
+            return process.wait()
+    return process.returncode
 
-    started = time.monotonic_ns()
-    process = subprocess.Popen(
-        [str(executable), "task", task],
-        cwd=repository_root,
-        stdin=subprocess.DEVNULL,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        start_new_session=True,
-        close_fds=True,
-    )
-    process_group = process.pid
-    timed_out = False
 
+class _Child:
+    """A task process reaped by its own thread with os.wait4(pid, 0).
+
+    RUSAGE_CHILDREN deltas only isolate one check while no other child is
+    reaped in between; with several checks in flight each needs its own.
+    The Popen is never polled or waited on through subprocess, so only that
+    thread reaps the pid. poll() and wait() mirror Popen's; on_exit, if given,
+    is called from the thread once the returncode is known.
+    """
+
+    def __init__(self, process: subprocess.Popen,
+                 on_exit: Optional[Callable[[], None]] = None) -> None:
+        self.process = process
+        self.on_exit = on_exit
+        self.pid = process.pid
+        self.stdout = process.stdout
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[resource.struct_rusage] = None
+        self._exited = threading.Event()
+        threading.Thread(target=self._reap, name=f"reap-{self.pid}", daemon=True).start()
+
+    def _reap(self) -> None:
+        try:
+            _, status, self.rusage = os.wait4(self.pid, 0)
+            self.returncode = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            self.returncode = 0  # what Popen reports for a pid it cannot wait for
+        # Popen's own cleanup then leaves the pid alone.
+        self.process.returncode = self.returncode
+        self._exited.set()
+        if self.on_exit:
+            self.on_exit()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode if self._exited.is_set() else None
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.process.args, timeout)
+        return self.returncode
+
+
+NO_USAGE = resource.struct_rusage((0.0, 0.0) + (0,) * 14)
+
+
+def run_check(task: str, timeout_seconds: int, repository_root: Path, executable: Path,
+              remote_url: str = "", material: bytes = b"", capture_base: str = "",
+              limits: Optional[dict] = None,
+              on_start: Optional[Callable[[_Child], None]] = None) -> Tuple[str, int, int, str]:
+    """Run one check; (status, exit_code, duration_ms, cache) with cache "" if unknown."""
+    limits = limits or {}
+    # The task's own timeout: shortens the run and counts as a limit.
+    limit_timeout = limits.get("timeout", 0)
+    run_timeout = min(timeout_seconds, limit_timeout) if limit_timeout else timeout_seconds
+
+    lookup_started = time.monotonic_ns()
+    remote_key = _remote_key(remote_url, material) if remote_url else None
+    if remote_key:
+        remote_cache = _remote_cache()
+        try:
+            if remote_cache.lookup(remote_url, remote_key) is not None:
+                return "passed", 0, (time.monotonic_ns() - lookup_started) // 1_000_000, "remote"
+        except remote_cache.CacheError as exc:
+            _remote_warning(exc)
+
+    report_fd, report_path = tempfile.mkstemp(prefix="wgx-task-cache.")
+    os.close(report_fd)
+    capture = Capture(capture_base) if capture_base or remote_key else None
+    started = time.monotonic_ns()
     try:
-        returncode = process.wait(timeout=timeout_seconds)
-    except subprocess.TimeoutExpired:
-        timed_out = True
-        _signal_group(process_group, signal.SIGTERM)
-
-        grace_deadline = time.monotonic() + 1.0
-        while time.monotonic() < grace_deadline:
-            process.poll()
-            if not _group_exists(process_group):
-                break
-            time.sleep(0.05)
-        if _group_exists(process_group):
-            _signal_group(process_group, signal.SIGKILL)
+        popen = subprocess.Popen(
+            [str(executable), "task", task],
+            cwd=repository_root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+            stderr=subprocess.STDOUT if capture else subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+            env={**os.environ, "WGX_TASK_CACHE_REPORT": report_path},
+        )
+    except OSError as exc:
+        os.unlink(report_path)
+        if capture:
+            capture.fail(exc)
+            capture.close()
+        raise
+    process = _Child(popen)
+    if on_start:
+        on_start(process)
+    timed_out = False
 
-        if process.returncode is None:
-            try:
-                returncode = process.wait(timeout=1.0)
-            except subprocess.TimeoutExpired:
-                _signal_group(process_group, signal.SIGKILL)
-                returncode = process.wait()
-        else:
-            returncode = process.returncode
+    if capture:
+        # Fewer wake-ups for chatty tasks; the default pipe holds only 64 KiB.
+        try:
+            import fcntl
+            fcntl.fcntl(process.stdout.fileno(), F_SETPIPE_SZ, READ_SIZE)
+        except (ImportError, OSError):
+            pass
+        try:
+            returncode = capture.pump(process, run_timeout)
+            if returncode is None:
+                timed_out = True
+                returncode = _terminate(process)
+                capture.drain(process.stdout.fileno())
+        except OSError as exc:
+            # Reading the pipe failed: stop the task, keep its record.
+            capture.fail(exc)
+            returncode = process.poll()
+            if returncode is None:
+                returncode = _terminate(process)
+        finally:
+            process.stdout.close()
+            capture.close()
+    else:
+        try:
+            returncode = process.wait(timeout=run_timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            returncode = _terminate(process)
 
     duration_ms = max(0, (time.monotonic_ns() - started) // 1_000_000)
+    usage = resource_usage(NO_USAGE, process.rusage, duration_ms) if process.rusage else None
     if timed_out:
         status, exit_code = "timeout", 124
     else:
         exit_code = _exit_code(returncode)
         status = "passed" if exit_code == 0 else "failed"
+    exceeded = exceeded_limit(limits, exit_code,
+                              timed_out and 0 < limit_timeout <= timeout_seconds,
+                              bytes(capture.tail) if capture else b"",
+                              usage["user_cpu_ms"] + usage["sys_cpu_ms"] if usage else 0,
+                              duration_ms, usage["max_rss_kb"] if usage else 0)
+    if exceeded:
+        status = "resource_exceeded"
+
+    try:
+        with open(report_path, encoding="utf-8") as handle:
+            cache = handle.read().strip()
+    finally:
+        os.unlink(report_path)
+
+    if remote_key and status == "passed" and os.environ.get("WGX_REMOTE_CACHE_PUT") != "0":
+        log_data = None
+        if os.environ.get("WGX_REMOTE_CACHE_LOGS") != "0" and capture.error is None:
+            log_data = capture.read_log()
+        try:
+            remote_cache.publish(remote_url, remote_key, task, duration_ms, log_data)
+        except remote_cache.CacheError as exc:
+            _remote_warning(exc)
+    if capture:
+        if capture_base:
+            try:
+                capture.write_sidecar(
+                    usage, {"name": exceeded, "value": limits[exceeded]} if exceeded else None)
+            except OSError as exc:
+                print(f"wgx: {task}: output not recorded: {exc}", file=sys.stderr)
+        capture.file.close()
+
+    return status, exit_code, duration_ms, cache if cache in ("hit", "miss") else ""
+
+
+class Interrupted(Exception):
+    """SIGINT or SIGTERM reached the supervisor."""
+
+
+def _raise_interrupted(signum: int, frame: object) -> None:
+    raise Interrupted()
+
+
+def _receipt_module() -> ModuleType:
+    try:
+        from modules import validate_receipt
+    except ImportError:  # run as a script from modules/
+        import validate_receipt
+    return validate_receipt
+
+
+def _reuse_module() -> ModuleType:
+    try:
+        from modules import validate_reuse
+    except ImportError:  # run as a script from modules/
+        import validate_reuse
+    return validate_reuse
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class Supervisor:
+    """Runs a whole resolved plan in this process and builds its receipt.
+
+    Checks start in plan order on up to ``jobs`` threads, each one a
+    run_check; a serial check waits for everything before it and holds back
+    everything after it. Results are keyed by plan index, so the receipt
+    lists checks in plan order however they finish.
+    """
+
+    def __init__(self, records: List[List[str]], jobs: int, timeout_seconds: int,
+                 repository_root: Path, executable: Path, quiet: bool) -> None:
+        self.header: Dict[str, List[str]] = {}
+        self.envs: List[str] = []
+        self.entries: List[List[str]] = []
+        for kind, *fields in records:
+            if kind in ("run", "skip"):
+                self.entries.append([kind, *fields])
+            elif kind == "env":
+                self.envs.append(fields[0])
+            else:
+                self.header[kind] = fields
+        # Paths from the command line stay valid once supervise() changes directory.
+        for kind in ("logs", "reuse"):
+            if self.header.get(kind, [""])[0]:
+                self.header[kind][0] = os.path.abspath(self.header[kind][0])
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout_seconds = timeout_seconds
+        self.repository_root = repository_root
+        self.executable = executable
+        self.quiet = quiet
+        self.results: Dict[int, Tuple[str, int, int, str]] = {}
+        self.running: Dict[int, _Child] = {}
+        self.lock = threading.Lock()
+        self.cancelled = False
+        # Incremental reuse: plan index -> reuse key, or the receipt reused.
+        self.reuse_store = self._field("reuse", 0)
+        self.reuse_keys: Dict[int, str] = {}
+        self.reused: Dict[int, str] = {}
+        self.identity_sha256 = ""
+        self._tree: Optional[str] = None
+
+    def _field(self, kind: str, position: int) -> str:
+        return self.header.get(kind, [""] * 5)[position]
+
+    def _say(self, message: str) -> None:
+        if not self.quiet:
+            with self.lock:
+                print(message, file=sys.stderr, flush=True)
+
+    def capture_base(self, name: str) -> str:
+        log_dir = self._field("logs", 0)
+        return os.path.join(log_dir, name.replace("/", "%")) if log_dir else ""
+
+    def material(self, name: str, command: str) -> bytes:
+        """Key material for the shared result cache, see remote_cache.py."""
+        fields = [f"tree={self._field('remote', 1)}", f"task={name}", f"cmd={command}"]
+        fields += [f"env={item}" for item in self.envs]
+        return b"".join(field.encode("utf-8") + b"\0" for field in fields)
+
+    def _progress(self, name: str, result: Tuple[str, int, int, str], base: str,
+                  reused: bool) -> None:
+        status, _, duration_ms, cache = result
+        note = ", reused" if reused else {"hit": ", cached", "remote": ", remote cache"}.get(cache, "")
+        if self.jobs > 1:
+            lines = [f"← {name} {status} ({duration_ms} ms{note})"]
+        else:
+            lines = [f"  {status} ({duration_ms} ms{note})"]
+        logs = sorted(glob.glob(glob.escape(base) + ".log*")) if base else []
+        if status != "passed" and logs:
+            lines.append(f"  Log: {logs[0]}")
+        self._say("\n".join(lines))
+
+    def _work_tree(self) -> str:
+        """Tree hash of the working tree, computed once; "" outside git."""
+        with self.lock:
+            if self._tree is None:
+                try:
+                    self._tree = _remote_cache().tree_hash(str(self.repository_root))
+                except (OSError, subprocess.CalledProcessError):
+                    self._tree = ""
+            return self._tree
+
+    def _reuse_key(self, name: str, command: str, limits_spec: str, inputs: str) -> str:
+        validate_reuse = _reuse_module()
+        patterns = [item for item in inputs.split("\n") if item]
+        if patterns:
+            cache_dir = os.environ.get("WGX_TASK_CACHE_DIR") or os.path.join(".wgx", "cache", "tasks")
+            state = validate_reuse.blob_digest(patterns, cache_dir)
+        else:
+            state = self._work_tree()
+        manifest_sha256 = self._field("reuse", 1)
+        if not state or not manifest_sha256:
+            return ""
+        return validate_reuse.reuse_key(str(self.repository_root), manifest_sha256, name, command,
+                                        self.envs, limits_spec, self.identity_sha256, state)
+
+    def _reuse(self, index: int, name: str, command: str, limits_spec: str,
+               inputs: str) -> Optional[Tuple[str, int, int, str]]:
+        """The remembered pass of this check, or None after noting its key."""
+        started = time.monotonic_ns()
+        key = self._reuse_key(name, command, limits_spec, inputs)
+        if not key:
+            return None
+        receipt_sha256 = _reuse_module().lookup(self.reuse_store, key)
+        with self.lock:
+            if receipt_sha256 is None:
+                self.reuse_keys[index] = key
+                return None
+            self.reused[index] = receipt_sha256
+        return "passed", 0, (time.monotonic_ns() - started) // 1_000_000, ""
+
+    def _started(self, index: int, process: _Child) -> None:
+        with self.lock:
+            self.running[index] = process
+
+    def _run(self, index: int) -> None:
+        if self.cancelled:
+            return
+        _, name, command, limits_spec, _, inputs = self.entries[index]
+        self._say(f"→ {name}")
+        base = self.capture_base(name)
+        url, tree = self._field("remote", 0), self._field("remote", 1)
+        try:
+            limits = parse_limits(limits_spec)
+        except ValueError:
+            limits = {}
+        result = self._reuse(index, name, command, limits_spec, inputs) if self.reuse_store else None
+        try:
+            if result is None:
+                result = run_check(
+                    name, self.timeout_seconds, self.repository_root, self.executable,
+                    url if tree else "", self.material(name, command) if url and tree else b"",
+                    base, limits, lambda process: self._started(index, process))
+        except OSError as exc:
+            print(f"wgx: {name}: {exc}", file=sys.stderr)
+            result = ("failed", 125, 0, "")
+        with self.lock:
+            self.running.pop(index, None)
+            self.results[index] = result
+        if not self.cancelled:
+            self._progress(name, result, base, index in self.reused)
+
+    def _cancel(self) -> None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        self.cancelled = True
+        with self.lock:
+            running = list(self.running.values())
+        for process in running:
+            if process.poll() is None:
+                _terminate(process)
+
+    def run(self) -> None:
+        pool = ThreadPoolExecutor(max_workers=self.jobs)
+        try:
+            pending: List[Future] = []
+            for index, entry in enumerate(self.entries):
+                if entry[0] != "run":
+                    continue
+                if entry[4] == "1":
+                    wait(pending)
+                    pending = []
+                    pool.submit(self._run, index).result()
+                else:
+                    pending.append(pool.submit(self._run, index))
+            wait(pending)
+        except Interrupted:
+            self._cancel()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def records(self) -> List[List[str]]:
+        """Receipt records (see validate_receipt.py) in plan order."""
+        records: List[List[str]] = []
+        for index, (kind, name, a, b, _, _) in enumerate(self.entries):
+            if kind == "skip":
+                records.append(["skip", name, a, b, "", ""])
+                continue
+            status, exit_code, duration_ms, cache = self.results.get(index, ("failed", 125, 0, ""))
+            records.append(["check", name, status, str(exit_code), str(duration_ms), a])
+            if cache:
+                records.append(["cache", name, cache, "", "", ""])
+            if index in self.reused:
+                records.append(["reuse", name, self.reused[index], "", "", ""])
+                continue
+            base = self.capture_base(name)
+            if base and os.path.isfile(base + ".json"):
+                records.append(["output", name, base + ".json", "", "", ""])
+        return records
+
+    def remember(self, receipt_sha256: str) -> None:
+        """Store the checks that ran and passed for later reuse."""
+        if not self.reuse_store:
+            return
+        passed = [(key, self.entries[index][1]) for index, key in sorted(self.reuse_keys.items())
+                  if self.results.get(index, ("",))[0] == "passed"]
+        try:
+            _reuse_module().remember(self.reuse_store, passed, receipt_sha256)
+        except OSError as exc:
+            print(f"wgx: reuse store: {exc}", file=sys.stderr)
+
+
+def supervise(args: List[str]) -> int:
+    """--plan FILE [--jobs N] [--quiet] TIMEOUT_SECONDS REPOSITORY_ROOT WGX_EXECUTABLE"""
+    if len(args) < 1:
+        _usage()
+    plan_path, args = args[0], args[1:]
+    jobs, quiet = 0, False
+    while args[:1] in (["--jobs"], ["--quiet"]):
+        if args[0] == "--quiet":
+            quiet, args = True, args[1:]
+            continue
+        if len(args) < 2 or not args[1].isdigit():
+            _usage()
+        jobs, args = int(args[1]), args[2:]
+    if len(args) != 3 or not args[0].isdigit() or int(args[0]) <= 0:
+        _usage()
+    repository_root, executable = Path(args[1]), Path(args[2])
+    if not repository_root.is_dir() or not executable.is_file():
+        _usage()
+
+    validate_receipt = _receipt_module()
+    supervisor = Supervisor(validate_receipt.read_records(plan_path), jobs, int(args[0]),
+                            repository_root.resolve(), executable, quiet)
+    supervisor.identity_sha256 = validate_receipt.environment_identity()["identity_sha256"]
+    # Input globs are relative to the repository, like for the task cache.
+    os.chdir(repository_root)
+    signal.signal(signal.SIGINT, _raise_interrupted)
+    signal.signal(signal.SIGTERM, _raise_interrupted)
+    started_at = _now()
+    try:
+        supervisor.run()
+    except Interrupted:
+        return 130
+    field = supervisor._field
+    receipt = validate_receipt.build([
+        field("profile", 0), str(repository_root), field("repository", 0),
+        field("repository", 1), field("repository", 2), started_at, _now(),
+        field("manifest", 0), field("manifest", 1), field("manifest", 2), args[0], "",
+    ], supervisor.records())
+    supervisor.remember(receipt["receipt_sha256"])
+    json.dump(receipt, sys.stdout, ensure_ascii=False, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    return 0 if receipt["result"] == "passed" else 1
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args[:1] == ["--plan"]:
+        return supervise(args[1:])
+    remote_url = ""
+    capture_base = ""
+    limits_spec = ""
+    while args[:1] in (["--remote"], ["--capture"], ["--limits"]):
+        if len(args) < 2:
+            _usage()
+        if args[0] == "--remote":
+            remote_url = args[1]
+        elif args[0] == "--capture":
+            capture_base = args[1]
+        else:
+            limits_spec = args[1]
+        args = args[2:]
+    if len(args) != 4:
+        _usage()
+
+    try:
+        timeout_seconds = int(args[0])
+    except ValueError:
+        _usage()
+    if timeout_seconds <= 0:
+        _usage()
+
+    repository_root = Path(args[1])
+    executable = Path(args[2])
+    task = args[3]
+    if not repository_root.is_dir() or not executable.is_file() or not task:
+        _usage()
+    try:
+        limits = parse_limits(limits_spec)
+    except ValueError:
+        _usage()
 
-    print(f"{status} {exit_code} {duration_ms}")
+    material = sys.stdin.buffer.read() if remote_url else b""
+    status, exit_code, duration_ms, cache = run_check(
+        task, timeout_seconds, repository_root, executable,
+        remote_url, material, capture_base, limits)
+    result = f"{status} {exit_code} {duration_ms}"
+    if cache:
+        result += f" {cache}"
+    print(result)
     return 0
 
 
@@ -0,0 +1,66 @@
+#!/usr/bin/env bash
+#
+# Module autoload benchmark.
+#
+# Copies lib/, modules/ and cmd/ into a scratch tree, adds N synthetic
+# modules of ~40 functions each and times `wgx tasks -h` (no module needed)
+# and `wgx tasks` (profile only) with eager sourcing (WGX_AUTOLOAD=0) and
+# with autoload stubs. With autoload the cold start should stay flat as N
+# grows. Per-module source times of one run: WGX_TRACE_MODULES=1 wgx tasks.
+#
+# Usage: scripts/bench/module_autoload.sh [iterations] [extra-module-counts ...]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+ITERATIONS="${1:-20}"
+shift || true
+COUNTS=("$@")
+((${#COUNTS[@]})) || COUNTS=(0 10 40)
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-autoload.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0
+
+mkdir -p "$SCRATCH/project/.wgx"
+cp "$WGX_ROOT/templates/profiles/python-service.yml" "$SCRATCH/project/.wgx/profile.yml"
+
+us_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $(((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)))
+}
+
+make_tree() {
+  local tree="$1" count="$2" m f
+  mkdir -p "$tree/cli"
+  cp -R "$WGX_ROOT/lib" "$WGX_ROOT/modules" "$WGX_ROOT/cmd" "$tree/"
+  cp "$WGX_ROOT/cli/wgx" "$tree/cli/wgx"
+  for ((m = 0; m < count; m++)); do
+    for ((f = 0; f < 40; f++)); do
+      # shellcheck disable=SC2016 # the $ belongs to the generated module source
+      printf 'bench%d::fn%d() {\n  local value="${1:-}"\n  [[ -n $value ]] || return 1\n  printf "%%s\\n" "$value"\n}\n\n' "$m" "$f"
+    done >"$tree/modules/bench${m}.bash"
+  done
+}
+
+run_case() {
+  local tree="$1" autoload="$2" start
+  shift 2
+  (cd "$SCRATCH/project" && WGX_DIR="$tree" WGX_AUTOLOAD="$autoload" "$tree/cli/wgx" "$@" >/dev/null)
+  start="$EPOCHREALTIME"
+  for ((i = 0; i < ITERATIONS; i++)); do
+    (cd "$SCRATCH/project" && WGX_DIR="$tree" WGX_AUTOLOAD="$autoload" "$tree/cli/wgx" "$@" >/dev/null)
+  done
+  printf '%s' "$(($(us_since "$start") / ITERATIONS))"
+}
+
+printf '%-8s %-12s %12s %12s\n' "modules" "command" "eager_us" "autoload_us"
+for count in "${COUNTS[@]}"; do
+  tree="$SCRATCH/wgx-$count"
+  make_tree "$tree" "$count"
+  for command in "tasks -h" "tasks"; do
+    read -r -a args <<<"$command"
+    printf '%-8s %-12s %12s %12s\n' "+$count" "$command" \
+      "$(run_case "$tree" 0 "${args[@]}")" "$(run_case "$tree" 1 "${args[@]}")"
+  done
+done
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Parity and speed of the profile parser backends.
+
+Compiles every profile in templates/profiles/ and synthetic manifests with
+10, 1k and 10k tasks through each available WGX_PROFILE_BACKEND (cyaml,
+pyyaml, builtin) and times the full compilation (best of N runs). The record
+streams must be identical apart from the backend record itself; the script
+exits 1 otherwise.
+
+Usage: scripts/bench/profile_backends.py [tasks ...]
+"""
+
+from __future__ import annotations
+
+import glob
+import io
+import os
+import sys
+import tempfile
+import timeit
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from modules import profile_parser  # noqa: E402
+from yaml_fallback import manifest  # noqa: E402
+
+REPEAT = 3
+BACKEND_RECORD = "PROFILE_PARSER_BACKEND\0\0"
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name in ("cyaml", "pyyaml", "builtin"):
+        try:
+            profile_parser.resolve_backend(name)
+        except profile_parser.ProfileError:
+            continue
+        names.append(name)
+    return names
+
+
+def compile_records(path: str, backend: str) -> str:
+    stream = io.StringIO()
+    profile_parser.compile_profile(path, profile_parser.RecordWriter(stream), backend)
+    text = stream.getvalue()
+    return text.replace(f"{BACKEND_RECORD}{backend}\0", "", 1)
+
+
+def main() -> int:
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000]
+    backends = available_backends()
+    os.environ.setdefault("WGX_PROFILE_DEPRECATION", "quiet")
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases: List[Tuple[str, str]] = [
+            (os.path.basename(path), path)
+            for path in sorted(glob.glob(os.path.join(ROOT, "templates", "profiles", "*.yml")))
+        ]
+        for count in counts:
+            path = os.path.join(tmp_dir, f"synthetic-{count}.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(manifest(count))
+            cases.append((f"synthetic-{count}", path))
+
+        print(f"{'manifest':<22}" + "".join(f"{name + ' ms':>14}" for name in backends) + f"{'parity':>8}")
+        for label, path in cases:
+            outputs: Dict[str, str] = {}
+            row = f"{label:<22}"
+            for backend in backends:
+                outputs[backend] = compile_records(path, backend)
+                seconds = min(timeit.repeat(lambda: compile_records(path, backend), number=1, repeat=REPEAT))
+                row += f"{seconds * 1000:>14.1f}"
+            same = len(set(outputs.values())) <= 1
+            failed = failed or not same
+            print(row + f"{'ok' if same else 'DIFF':>8}")
+
+    if failed:
+        print("FAIL: parser backends disagree", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
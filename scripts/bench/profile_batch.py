@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""One parser process per manifest versus profile_parser.py --batch.
+
+Copies the profiles from templates/profiles/ round-robin into N manifests
+(default 200) and compiles all of them three ways:
+
+  spawn   one `profile_parser.py --format=records <file>` process per manifest
+  batch   one `--batch` process for the whole list
+  jobs    `--batch --jobs J` (default: CPU count)
+
+Every batch section must equal the corresponding single-file output; the
+script exits 1 otherwise.
+
+Usage: scripts/bench/profile_batch.py [manifests] [jobs]
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from modules import profile_parser  # noqa: E402
+
+PARSER = os.path.join(ROOT, "modules", "profile_parser.py")
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    os.environ.setdefault("WGX_PROFILE_DEPRECATION", "quiet")
+    templates = sorted(glob.glob(os.path.join(ROOT, "templates", "profiles", "*.yml")))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths: List[str] = []
+        for i in range(count):
+            path = os.path.join(tmp_dir, f"repo-{i}", ".wgx", "profile.yml")
+            os.makedirs(os.path.dirname(path))
+            shutil.copyfile(templates[i % len(templates)], path)
+            paths.append(path)
+        stdin = b"".join(os.fsencode(path) + b"\0" for path in paths)
+
+        singles: List[bytes] = []
+
+        def spawn() -> None:
+            for path in paths:
+                singles.append(subprocess.run(
+                    [sys.executable, PARSER, "--format=records", path],
+                    capture_output=True, check=True).stdout)
+
+        outputs = {}
+
+        def batch(label: str, *extra: str) -> None:
+            outputs[label] = subprocess.run(
+                [sys.executable, PARSER, "--format=records", "--batch", "-0", *extra],
+                input=stdin, capture_output=True, check=True).stdout
+
+        rows = [
+            ("spawn", timed(spawn)),
+            ("batch", timed(lambda: batch("batch"))),
+            (f"jobs={jobs}", timed(lambda: batch("jobs", "--jobs", str(jobs)))),
+        ]
+
+    print(f"{'mode':<10} {'manifests':>10} {'total_ms':>10} {'per_file_ms':>12}")
+    for label, seconds in rows:
+        print(f"{label:<10} {count:>10} {seconds * 1000:>10.0f} {seconds * 1000 / count:>12.2f}")
+
+    failed = False
+    for label, data in outputs.items():
+        sections = [section[2] for section in profile_parser.iter_sections(data)]
+        if sections != singles:
+            print(f"FAIL: {label} output differs from single-file runs", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env bash
+#
+# Profile ingest benchmark.
+#
+# Compiles a synthetic manifest once per format and then measures only the
+# Bash side of loading it:
+#   assign   legacy assignment stream through profile::_apply_parser_line plus
+#            the former compgen-based flat-to-map conversion
+#   records  NUL-delimited record stream through profile::_apply_record_stream
+# Both variants must yield identical task maps; the script fails otherwise.
+#
+# Usage: scripts/bench/profile_ingest.sh [tasks] [iterations]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+TASKS="${1:-300}"
+ITERATIONS="${2:-10}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-ingest.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+
+manifest="$SCRATCH/profile.yml"
+{
+  printf 'wgx:\n  apiVersion: v1\n  env:\n'
+  for ((i = 0; i < TASKS / 10 + 1; i++)); do
+    printf '    VAR_%d: "value %d"\n' "$i" "$i"
+  done
+  printf '  tasks:\n'
+  for ((i = 0; i < TASKS; i++)); do
+    printf '    task-%d:\n      desc: Task %d\n      group: g%d\n      cmd: echo %d\n' "$i" "$i" $((i % 7)) "$i"
+  done
+} >"$manifest"
+
+python3 "$WGX_ROOT/modules/profile_parser.py" --format=assign "$manifest" >"$SCRATCH/assign.txt"
+python3 "$WGX_ROOT/modules/profile_parser.py" --format=records "$manifest" >"$SCRATCH/records.bin"
+
+cat >"$SCRATCH/ingest.sh" <<'SH'
+#!/usr/bin/env bash
+set -euo pipefail
+WGX_ROOT="$1" MODE="$2" STREAM="$3" ITERATIONS="$4"
+source "$WGX_ROOT/lib/core.bash"
+source "$WGX_ROOT/modules/profile.bash"
+
+# The converter the loader used before the record stream: one compgen scan and
+# one subshell per task key to turn flat variables back into maps.
+legacy_convert() {
+  local prefix map var key
+  for prefix in WGX_TASK_CMDS WGX_TASK_DESC WGX_TASK_GROUP WGX_TASK_SAFE; do
+    map="$prefix"
+    while IFS= read -r var; do
+      [[ -n $var ]] || continue
+      key="${var#"${prefix}"_}"
+      [[ $prefix == WGX_TASK_* ]] && key="$(printf '%s' "${key//_/-}")"
+      eval "${map}[\$key]=\${!var}"
+    done < <(compgen -v "${prefix}_")
+  done
+}
+
+start="$EPOCHREALTIME"
+for ((n = 0; n < ITERATIONS; n++)); do
+  profile::_reset
+  if [[ $MODE == assign ]]; then
+    while IFS= read -r line || [[ -n $line ]]; do
+      [[ -n $line ]] || continue
+      profile::_apply_parser_line "$line"
+    done <"$STREAM"
+    legacy_convert
+    unset "${!WGX_TASK_CMDS_@}" "${!WGX_TASK_DESC_@}" "${!WGX_TASK_GROUP_@}" "${!WGX_TASK_SAFE_@}"
+  else
+    profile::_apply_record_stream <"$STREAM"
+  fi
+done
+end="$EPOCHREALTIME"
+s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+printf '%d\n' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+for key in "${WGX_TASK_ORDER[@]}"; do
+  printf '%s\t%s\t%s\n' "$key" "${WGX_TASK_CMDS[$key]}" "${WGX_TASK_DESC[$key]}"
+done >"$STREAM.check"
+SH
+
+printf '%-10s %8s %10s %10s\n' "format" "tasks" "total_ms" "mean_ms"
+for mode in assign records; do
+  stream="$SCRATCH/assign.txt"
+  [[ $mode == records ]] && stream="$SCRATCH/records.bin"
+  total="$(bash "$SCRATCH/ingest.sh" "$WGX_ROOT" "$mode" "$stream" "$ITERATIONS")"
+  printf '%-10s %8s %10s %10s\n' "$mode" "$TASKS" "$total" "$((total / ITERATIONS))"
+done
+
+if ! cmp -s "$SCRATCH/assign.txt.check" "$SCRATCH/records.bin.check"; then
+  echo "FAIL: assign and records streams produced different task maps" >&2
+  exit 1
+fi
@@ -0,0 +1,65 @@
+#!/usr/bin/env bash
+#
+# Resident profile server benchmark.
+#
+# Times `wgx tasks` against one manifest in three loader modes:
+#   parse   WGX_PROFILE_CACHE=0, every call starts profile_parser.py
+#   cache   compiled-profile cache on disk (sha256 key, no Python on a hit)
+#   serve   a running `wgx --serve`, queried through socat or nc -U
+# The serve row needs socat or nc with Unix-socket support and is skipped
+# otherwise.
+#
+# Usage: scripts/bench/profile_server.sh [iterations]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+ITERATIONS="${1:-20}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-serve.XXXXXX")"
+export WGX_DIR="$WGX_ROOT" WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet
+export WGX_SERVE_SOCKET="$SCRATCH/serve.sock"
+server_pid=""
+cleanup() {
+  [[ -n $server_pid ]] && kill "$server_pid" 2>/dev/null
+  rm -rf "$SCRATCH"
+}
+trap cleanup EXIT
+
+mkdir -p "$SCRATCH/project/.wgx"
+cp "$WGX_ROOT/templates/profiles/python-service.yml" "$SCRATCH/project/.wgx/profile.yml"
+cd "$SCRATCH/project"
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+run_case() {
+  local label="$1" start total
+  shift
+  env "$@" "$WGX_ROOT/cli/wgx" tasks >/dev/null
+  start="$EPOCHREALTIME"
+  for ((i = 0; i < ITERATIONS; i++)); do
+    env "$@" "$WGX_ROOT/cli/wgx" tasks >/dev/null
+  done
+  total="$(ms_since "$start")"
+  printf '%-8s %10s %10s\n' "$label" "$total" "$((total / ITERATIONS))"
+}
+
+printf '%-8s %10s %10s\n' "mode" "total_ms" "mean_ms"
+run_case parse WGX_SERVE=0 WGX_PROFILE_CACHE=0
+run_case cache WGX_SERVE=0
+
+if ! command -v socat >/dev/null 2>&1 && ! command -v nc >/dev/null 2>&1; then
+  printf '%-8s %10s\n' "serve" "skipped (no socat/nc)"
+  exit 0
+fi
+"$WGX_ROOT/cli/wgx" --serve 2>/dev/null &
+server_pid=$!
+for ((i = 0; i < 50; i++)); do
+  [[ -S $WGX_SERVE_SOCKET ]] && break
+  sleep 0.1
+done
+run_case serve WGX_PROFILE_CACHE=0
+"$WGX_ROOT/cli/wgx" --serve --stats | grep -E '^(hits|misses):'
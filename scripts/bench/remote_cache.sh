@@ -0,0 +1,81 @@
+#!/usr/bin/env bash
+#
+# End-to-end time saved by the shared check-result cache.
+#
+# Builds a git repository whose quick profile has N checks that each sleep a
+# fixed time (default 4 checks à 0.5 s, standing in for lint/test), clones it
+# twice ("containers") and starts the reference server from
+# modules/remote_cache.py. Times `wgx validate --profile quick` without cache,
+# in the first clone against the empty cache (publishes) and in the second
+# clone against the warm cache (reuses). All runs must pass.
+#
+# Usage: scripts/bench/remote_cache.sh [checks] [seconds-per-check]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+CHECKS="${1:-4}"
+SECONDS_PER_CHECK="${2:-0.5}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-remote.XXXXXX")"
+SERVER_PID=""
+trap '[[ -n $SERVER_PID ]] && kill "$SERVER_PID"; rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0 WGX_DIR="$WGX_ROOT"
+export GIT_AUTHOR_NAME=bench GIT_AUTHOR_EMAIL=bench@example.org
+export GIT_COMMITTER_NAME=bench GIT_COMMITTER_EMAIL=bench@example.org
+
+mkdir -p "$SCRATCH/origin/.wgx"
+{
+  printf 'wgx:\n  apiVersion: v1\n  validate:\n    quick:\n'
+  for ((i = 0; i < CHECKS; i++)); do
+    printf '      - check-%d\n' "$i"
+  done
+  printf '  tasks:\n'
+  for ((i = 0; i < CHECKS; i++)); do
+    printf '    check-%d:\n      cmd: ["sleep", "%s"]\n' "$i" "$SECONDS_PER_CHECK"
+  done
+} >"$SCRATCH/origin/.wgx/profile.yml"
+git -C "$SCRATCH/origin" init -q
+git -C "$SCRATCH/origin" add -A
+git -C "$SCRATCH/origin" commit -qm bench
+git clone -q "$SCRATCH/origin" "$SCRATCH/container-a"
+git clone -q "$SCRATCH/origin" "$SCRATCH/container-b"
+
+python3 "$WGX_ROOT/modules/remote_cache.py" serve "$SCRATCH/store" >"$SCRATCH/server.out" &
+SERVER_PID=$!
+for _ in $(seq 50); do
+  [[ -s $SCRATCH/server.out ]] && break
+  sleep 0.1
+done
+URL="$(sed -n 's/^serving //p' "$SCRATCH/server.out")"
+[[ -n $URL ]] || {
+  echo "reference server did not start" >&2
+  exit 1
+}
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+timed_validate() {
+  local dir="$1" start
+  shift
+  (cd "$dir" && "$WGX_ROOT/cli/wgx" validate --profile quick --json "$@" >/dev/null) # warm the profile cache
+  rm -rf "${SCRATCH:?}/store"
+  start="$EPOCHREALTIME"
+  (cd "$dir" && "$WGX_ROOT/cli/wgx" validate --profile quick --json "$@" >/dev/null)
+  ms_since "$start"
+}
+
+plain="$(timed_validate "$SCRATCH/origin")"
+cold="$(timed_validate "$SCRATCH/container-a" --remote-cache "$URL")"
+start="$EPOCHREALTIME"
+(cd "$SCRATCH/container-b" && "$WGX_ROOT/cli/wgx" validate --profile quick --json --remote-cache "$URL" >/dev/null)
+warm="$(ms_since "$start")"
+
+printf '%-24s %8s %10s\n' "run" "checks" "total_ms"
+printf '%-24s %8s %10s\n' "no cache" "$CHECKS" "$plain"
+printf '%-24s %8s %10s\n' "container a (publish)" "$CHECKS" "$cold"
+printf '%-24s %8s %10s\n' "container b (reuse)" "$CHECKS" "$warm"
+printf 'saved per reusing container: %d ms\n' $((plain - warm))
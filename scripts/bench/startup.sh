@@ -0,0 +1,81 @@
+#!/usr/bin/env bash
+#
+# Startup benchmark for the wgx dispatcher.
+#
+# Measures the wall time of help/list paths and counts Python interpreter
+# starts through a PATH shim. None of these paths needs the profile, so every
+# row must report zero Python processes; the script fails otherwise. Where
+# /proc/sys/kernel/ns_last_pid is readable, the forks of one run (including
+# the wgx process itself) are listed as well; run on an otherwise idle
+# machine.
+#
+# Usage: scripts/bench/startup.sh [iterations]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+ITERATIONS="${1:-20}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-startup.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+
+real_python="$(command -v python3)"
+mkdir -p "$SCRATCH/shim" "$SCRATCH/project/.wgx"
+cat >"$SCRATCH/shim/python3" <<SH
+#!/usr/bin/env bash
+printf '%s\n' "\$*" >>"$SCRATCH/python3.log"
+exec "$real_python" "\$@"
+SH
+chmod +x "$SCRATCH/shim/python3"
+cp "$WGX_ROOT/templates/profiles/python-service.yml" "$SCRATCH/project/.wgx/profile.yml"
+
+CASES=(
+  "--help"
+  "--list"
+  "--version"
+  "validate --help"
+  "tasks -h"
+  "task --help"
+  "no-such-command"
+)
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+count_forks() {
+  local before after
+  [[ -r /proc/sys/kernel/ns_last_pid ]] || {
+    printf '%s' "-"
+    return
+  }
+  before="$(</proc/sys/kernel/ns_last_pid)"
+  WGX_DIR="$WGX_ROOT" "$WGX_ROOT/cli/wgx" "$@" >/dev/null 2>&1 || true
+  after="$(</proc/sys/kernel/ns_last_pid)"
+  ((after >= before)) || after=$((after + $(</proc/sys/kernel/pid_max) - 300))
+  printf '%d' $((after - before))
+}
+
+cd "$SCRATCH/project"
+printf '%-20s %10s %10s %8s %8s\n' "case" "total_ms" "mean_ms" "python" "forks"
+failed=0
+for case_args in "${CASES[@]}"; do
+  read -r -a argv <<<"$case_args"
+  : >"$SCRATCH/python3.log"
+  start="$EPOCHREALTIME"
+  for ((i = 0; i < ITERATIONS; i++)); do
+    PATH="$SCRATCH/shim:$PATH" WGX_DIR="$WGX_ROOT" "$WGX_ROOT/cli/wgx" "${argv[@]}" >/dev/null 2>&1 || true
+  done
+  total="$(ms_since "$start")"
+  spawned="$(wc -l <"$SCRATCH/python3.log")"
+  spawned="${spawned//[[:space:]]/}"
+  printf '%-20s %10s %10s %8s %8s\n' "$case_args" "$total" "$((total / ITERATIONS))" "$spawned" \
+    "$(count_forks "${argv[@]}")"
+  ((spawned == 0)) || failed=1
+done
+
+if ((failed)); then
+  echo "FAIL: a help/list path started a Python interpreter" >&2
+  exit 1
+fi
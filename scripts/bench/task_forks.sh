@@ -0,0 +1,91 @@
+#!/usr/bin/env bash
+#
+# Fork count of task-name lookups.
+#
+# Builds a manifest with many tasks, a workflow over all of them and a full
+# validate profile naming every task, then counts the processes each command
+# starts: with `strace -f -c` when available, otherwise from the PID
+# namespace's ns_last_pid (run on an otherwise idle machine). The profile
+# cache is warmed first, so parser starts are not part of the count.
+#
+# A second wgx checkout (e.g. `git worktree add /tmp/wgx-old HEAD~1`) adds a
+# comparison column.
+#
+# Usage: scripts/bench/task_forks.sh [tasks] [baseline-checkout]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+TASKS="${1:-300}"
+BASELINE="${2:-}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-forks.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0
+
+mkdir -p "$SCRATCH/project/.wgx"
+{
+  printf 'wgx:\n  apiVersion: v1\n  workflows:\n'
+  for wf in ci nightly release; do
+    printf '    %s:\n      steps:\n' "$wf"
+    for ((i = 0; i < TASKS; i++)); do
+      printf '        - task: Task_%d\n' "$i"
+    done
+  done
+  printf '  validate:\n    full:\n'
+  for ((i = 0; i < TASKS; i++)); do
+    printf '      - task-%d\n' "$i"
+  done
+  printf '  tasks:\n'
+  for ((i = 0; i < TASKS; i++)); do
+    printf '    task-%d:\n      desc: Task %d\n      cmd: echo %d\n' "$i" "$i" "$i"
+  done
+} >"$SCRATCH/project/.wgx/profile.yml"
+cd "$SCRATCH/project"
+
+CASES=(
+  "tasks"
+  "validate"
+  "validate --profile full --dry-run"
+  "task Task_$((TASKS / 2))"
+)
+
+count_forks() {
+  local root="$1" before after
+  shift
+  if command -v strace >/dev/null 2>&1; then
+    strace -f -qq -e trace=clone,clone3,fork,vfork -o "$SCRATCH/strace.log" \
+      env DRYRUN=1 "$root/cli/wgx" "$@" >/dev/null 2>&1 || true
+    grep -cE '(clone|clone3|fork|vfork)\(' "$SCRATCH/strace.log" || true
+    return
+  fi
+  before="$(</proc/sys/kernel/ns_last_pid)"
+  env DRYRUN=1 "$root/cli/wgx" "$@" >/dev/null 2>&1 || true
+  after="$(</proc/sys/kernel/ns_last_pid)"
+  if ((after < before)); then
+    # PIDs wrapped; the kernel restarts allocation above 300.
+    after=$((after + $(</proc/sys/kernel/pid_max) - 300))
+  fi
+  printf '%d\n' $((after - before))
+}
+
+if ! command -v strace >/dev/null 2>&1 && [[ ! -r /proc/sys/kernel/ns_last_pid ]]; then
+  echo "task_forks.sh needs strace or /proc/sys/kernel/ns_last_pid" >&2
+  exit 1
+fi
+
+roots=("$WGX_ROOT")
+header="$(printf '%-36s %10s' "command" "current")"
+if [[ -n $BASELINE ]]; then
+  roots+=("$(cd "$BASELINE" && pwd)")
+  header+="$(printf ' %10s' "baseline")"
+fi
+printf '%s\n' "$header"
+for case_args in "${CASES[@]}"; do
+  read -r -a args <<<"$case_args"
+  row="$(printf '%-36s' "$case_args")"
+  for root in "${roots[@]}"; do
+    count_forks "$root" "${args[@]}" >/dev/null # warm the profile cache
+    row+="$(printf ' %10s' "$(count_forks "$root" "${args[@]}")")"
+  done
+  printf '%s\n' "$row"
+done
@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+#
+# Serial `wgx task` calls versus one `wgx task --jobs N` call.
+#
+# Builds a manifest with N independent tasks that each sleep for a fixed time
+# (default 0.5 s, standing in for lint/guard/smoke) and times N serial
+# `wgx task NAME` invocations against `wgx task --jobs N NAME...`. Both must
+# succeed; the script exits 1 otherwise.
+#
+# Usage: scripts/bench/task_jobs.sh [tasks] [seconds-per-task]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+TASKS="${1:-3}"
+SECONDS_PER_TASK="${2:-0.5}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-jobs.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0 WGX_DIR="$WGX_ROOT"
+
+mkdir -p "$SCRATCH/project/.wgx"
+names=()
+{
+  printf 'wgx:\n  apiVersion: v1\n  tasks:\n'
+  for ((i = 0; i < TASKS; i++)); do
+    printf '    job-%d:\n      cmd: ["sleep", "%s"]\n' "$i" "$SECONDS_PER_TASK"
+    names+=("job-$i")
+  done
+} >"$SCRATCH/project/.wgx/profile.yml"
+cd "$SCRATCH/project"
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+"$WGX_ROOT/cli/wgx" tasks >/dev/null # warm the profile cache
+
+start="$EPOCHREALTIME"
+for name in "${names[@]}"; do
+  "$WGX_ROOT/cli/wgx" task "$name" >/dev/null
+done
+serial="$(ms_since "$start")"
+
+start="$EPOCHREALTIME"
+"$WGX_ROOT/cli/wgx" task --jobs "$TASKS" "${names[@]}" >/dev/null
+parallel="$(ms_since "$start")"
+
+printf '%-12s %8s %10s\n' "mode" "tasks" "total_ms"
+printf '%-12s %8s %10s\n' "serial" "$TASKS" "$serial"
+printf '%-12s %8s %10s\n' "jobs=$TASKS" "$TASKS" "$parallel"
@@ -0,0 +1,95 @@
+#!/usr/bin/env bash
+#
+# Startup latency of string tasks per shell: mode.
+#
+# Compiles every example template in templates/profiles/ into one manifest
+# per mode (login, plain, exec) and times `wgx task NAME` for each task. The
+# first word of every simple command (uv, cargo, just, ...) is rewritten to an
+# absolute stub that exits 0, so the numbers are wgx plus shell startup and
+# nothing of the real tools; a login shell that resets PATH cannot escape
+# to them either. The login column includes whatever /etc/profile and
+# ~/.bash_profile of this machine source (nvm, pyenv, conda hooks).
+#
+# Usage: scripts/bench/task_shell.sh [iterations]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+ITERATIONS="${1:-10}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-shell.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0 WGX_DIR="$WGX_ROOT"
+MODES=(login plain exec)
+
+mkdir -p "$SCRATCH/stubs"
+
+# <template> <mode> <output>: rewrite the template's tasks with shell: <mode>
+# and command words pointing at stubs; prints the task names.
+compile_template() {
+  python3 - "$@" "$SCRATCH/stubs" <<'PY'
+import json
+import os
+import re
+import sys
+
+template, mode, output, stubs = sys.argv[1:]
+tasks = {}
+with open(template, encoding="utf-8") as handle:
+    for line in handle:
+        match = re.match(r'^  ([A-Za-z0-9_-]+):\s*"(.*)"\s*$', line)
+        if match:
+            tasks[match.group(1)] = match.group(2)
+
+
+def stub(match):
+    word = match.group(2)
+    path = os.path.join(stubs, word)
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("#!/bin/sh\nexit 0\n")
+        os.chmod(path, 0o755)
+    return match.group(1) + path
+
+
+rewritten = {}
+for name, command in tasks.items():
+    if command.lstrip().startswith("#"):
+        command = "true"
+    rewritten[name] = re.sub(r"(^|&&\s*|\|\|\s*|;\s*|\|\s*)([A-Za-z][A-Za-z0-9_.-]*)", stub, command)
+
+with open(output, "w", encoding="utf-8") as handle:
+    handle.write(f"wgx:\n  apiVersion: v1\n  shell: {mode}\n  tasks:\n")
+    for name, command in rewritten.items():
+        handle.write(f"    {name}: {json.dumps(command)}\n")
+print(" ".join(rewritten))
+PY
+}
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+printf '%-16s %6s' "template" "tasks"
+printf ' %9s' "${MODES[@]/%/_ms}"
+printf '\n'
+for template in "$WGX_ROOT"/templates/profiles/*.yml; do
+  name="$(basename "$template" .yml)"
+  row=""
+  for mode in "${MODES[@]}"; do
+    project="$SCRATCH/$name-$mode"
+    mkdir -p "$project/.wgx"
+    read -r -a tasks <<<"$(compile_template "$template" "$mode" "$project/.wgx/profile.yml")"
+    ((${#tasks[@]})) || continue 2
+    (cd "$project" && "$WGX_ROOT/cli/wgx" tasks >/dev/null) # warm the profile cache
+    start="$EPOCHREALTIME"
+    for ((i = 0; i < ITERATIONS; i++)); do
+      for task in "${tasks[@]}"; do
+        (cd "$project" && "$WGX_ROOT/cli/wgx" task "$task" >/dev/null 2>&1)
+      done
+    done
+    row+="$(printf ' %9s' $(($(ms_since "$start") / (ITERATIONS * ${#tasks[@]}))))"
+  done
+  printf '%-16s %6s%s\n' "$name" "${#tasks[@]}" "$row"
+done
@@ -0,0 +1,70 @@
+#!/usr/bin/env bash
+#
+# Throughput of check output capture in modules/validate_runner.py.
+#
+# One check writes MB megabytes of short lines (default 300) to stdout and
+# stderr. Times validate_runner.py discarding the output (no --capture), with
+# --capture (ring buffer plus capped log, WGX_VALIDATE_LOG_MAX_MB) and with
+# --capture and WGX_VALIDATE_LOG_GZIP=1. The writer alone gives the floor;
+# capture should stay close to the discarding run.
+#
+# Usage: scripts/bench/validate_capture.sh [megabytes] [log-max-mb]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+MEGABYTES="${1:-300}"
+LOG_MAX_MB="${2:-64}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-capture.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0 WGX_DIR="$WGX_ROOT"
+export WGX_VALIDATE_LOG_MAX_MB="$LOG_MAX_MB"
+
+WRITER="yes 'line of chatty check output, 48 bytes long....' | head -c ${MEGABYTES}000000; echo done >&2"
+mkdir -p "$SCRATCH/project/.wgx"
+cat >"$SCRATCH/project/.wgx/profile.yml" <<YAML
+wgx:
+  apiVersion: v1
+  tasks:
+    chatty:
+      cmd: ["sh", "-c", "$WRITER"]
+YAML
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+run_case() {
+  local start result
+  start="$EPOCHREALTIME"
+  result="$(python3 "$WGX_ROOT/modules/validate_runner.py" "$@" \
+    600 "$SCRATCH/project" "$WGX_ROOT/cli/wgx" chatty)"
+  [[ $result == passed* ]] || {
+    echo "check did not pass: $result" >&2
+    exit 1
+  }
+  ms_since "$start"
+}
+
+(cd "$SCRATCH/project" && "$WGX_ROOT/cli/wgx" tasks >/dev/null) # warm the profile cache
+start="$EPOCHREALTIME"
+sh -c "$WRITER" >/dev/null 2>&1
+floor="$(ms_since "$start")"
+discard="$(run_case)"
+capture="$(run_case --capture "$SCRATCH/logs/plain")"
+gzipped="$(WGX_VALIDATE_LOG_GZIP=1 run_case --capture "$SCRATCH/logs/gzip")"
+
+printf '%-24s %10s %10s\n' "case" "total_ms" "MB/s"
+for row in "writer only:$floor" "discard:$discard" "capture:$capture" "capture + gzip:$gzipped"; do
+  printf '%-24s %10s %10s\n' "${row%%:*}" "${row##*:}" "$((MEGABYTES * 1000 / (${row##*:} + 1)))"
+done
+python3 - "$SCRATCH/logs/plain.json" "$SCRATCH/logs/gzip.json" <<'PY'
+import json, sys
+for path in sys.argv[1:]:
+    with open(path, encoding="utf-8") as handle:
+        capture = json.load(handle)
+    print(f"{path.rsplit('/', 1)[-1]}: read {capture['output_bytes']} bytes, logged "
+          f"{capture['log_bytes']} (truncated={capture['truncated']}), tail ends {capture['tail'][-5:]!r}")
+PY
@@ -0,0 +1,92 @@
+#!/usr/bin/env bash
+#
+# Orchestration overhead per check of `wgx validate --profile`.
+#
+# N checks (default 20) each run `true`, sequentially (--jobs 1). Compares the
+# former path, where every check cost the subshells of validate::_run_check
+# (module dir, two `git rev-parse`, executable lookup) plus its own
+# `python3 validate_runner.py` and the run ended in `python3
+# validate_receipt.py`, with one `validate_runner.py --plan` supervisor that
+# runs all checks and builds the receipt in-process. Overhead is the wall time
+# minus the checks' own duration_ms (the `wgx task` process lifetime),
+# divided by N.
+#
+# Usage: scripts/bench/validate_overhead.sh [checks]
+
+set -euo pipefail
+
+WGX_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+CHECKS="${1:-20}"
+SCRATCH="$(mktemp -d "${TMPDIR:-/tmp}/wgx-bench-overhead.XXXXXX")"
+trap 'rm -rf "$SCRATCH"' EXIT
+export WGX_CACHE_DIR="$SCRATCH/cache" WGX_PROFILE_DEPRECATION=quiet WGX_SERVE=0 WGX_DIR="$WGX_ROOT"
+
+PROJECT="$SCRATCH/project"
+mkdir -p "$PROJECT/.wgx"
+{
+  printf 'wgx:\n  apiVersion: v1\n  tasks:\n'
+  for ((i = 0; i < CHECKS; i++)); do
+    printf '    check-%d: ["true"]\n' "$i"
+  done
+} >"$PROJECT/.wgx/profile.yml"
+git -C "$PROJECT" init -q
+
+ms_since() {
+  local start="$1" end="$EPOCHREALTIME"
+  local s_start="${start%.*}" us_start="${start#*.}" s_end="${end%.*}" us_end="${end#*.}"
+  printf '%d' $((((s_end - s_start) * 1000000 + (10#$us_end - 10#$us_start)) / 1000))
+}
+
+record() {
+  local field
+  for field in "$@"; do
+    printf '%s\0' "$field"
+  done
+}
+
+# The per-check steps validate::_run_check took before the supervisor.
+per_check() {
+  local records="$SCRATCH/records" name module_dir repo_root executable result checks_ms=0
+  : >"$records"
+  for ((i = 0; i < CHECKS; i++)); do
+    name="check-$i"
+    module_dir="$(cd "$WGX_ROOT/modules" && pwd)"
+    repo_root="$(git -C "$PROJECT" rev-parse --show-toplevel >/dev/null 2>&1 &&
+      git -C "$PROJECT" rev-parse --show-toplevel)"
+    executable="$(command -v "$WGX_ROOT/cli/wgx")"
+    result="$(python3 "$module_dir/validate_runner.py" 120 "$repo_root" "$executable" "$name")"
+    read -r status code duration _ <<<"$result"
+    checks_ms=$((checks_ms + duration))
+    record check "$name" "$status" "$code" "$duration" '["true"]' >>"$records"
+  done
+  python3 "$WGX_ROOT/modules/validate_receipt.py" quick "$PROJECT" project "" false \
+    start end true "" "" 120 "$records" >/dev/null || true
+  printf '%d' "$checks_ms"
+}
+
+supervised() {
+  local plan="$SCRATCH/plan"
+  {
+    record profile quick "" "" "" ""
+    record repository project "" false "" ""
+    record manifest true "" "" "" ""
+    for ((i = 0; i < CHECKS; i++)); do
+      record run "check-$i" '["true"]' "" 0 ""
+    done
+  } >"$plan"
+  python3 "$WGX_ROOT/modules/validate_runner.py" --plan "$plan" --jobs 1 --quiet \
+    120 "$PROJECT" "$WGX_ROOT/cli/wgx" >"$SCRATCH/receipt.json" || true
+  python3 -c 'import json, sys; print(sum(c["duration_ms"] for c in json.load(open(sys.argv[1]))["checks"]))' \
+    "$SCRATCH/receipt.json"
+}
+
+(cd "$PROJECT" && "$WGX_ROOT/cli/wgx" tasks >/dev/null) # warm the profile cache
+
+printf '%-28s %10s %10s %14s\n' "case" "total_ms" "checks_ms" "overhead/check"
+for case in per_check supervised; do
+  start="$EPOCHREALTIME"
+  checks_ms="$("$case")"
+  total="$(ms_since "$start")"
+  printf '%-28s %10s %10s %14s\n' "$case" "$total" "$checks_ms" \
+    "$(((total - checks_ms) / CHECKS)) ms"
+done
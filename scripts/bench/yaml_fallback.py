@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Parse throughput of the fallback YAML parser in lines per second.
+
+Generates manifests with the given task counts, parses each with
+profile_parser._parse_simple_yaml (best of N runs) and, when PyYAML is
+installed, with yaml.safe_load for reference. The fallback result must equal
+PyYAML's; the script exits 1 otherwise.
+
+Usage: scripts/bench/yaml_fallback.py [tasks ...]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from modules import profile_parser  # noqa: E402
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+REPEAT = 5
+
+
+def manifest(tasks: int) -> str:
+    lines = ["wgx:", "  apiVersion: v1", "  env:"]
+    lines += [f'    VAR_{i}: "value {i}"  # note' for i in range(tasks // 2 + 1)]
+    lines.append("  tasks:")
+    for i in range(tasks):
+        lines += [
+            f"    task-{i}:",
+            f"      desc: 'Task {i}'",
+            f"      cmd: npm run task-{i}",
+            "      args:",
+            "        - --flag",
+            f'        - "x:{i}"',
+            "      safe: yes",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def best_of(func) -> float:
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main() -> int:
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000]
+    failed = False
+    print(f"{'tasks':>8} {'lines':>8} {'builtin l/s':>14} {'pyyaml l/s':>14}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in counts:
+            text = manifest(count)
+            path = os.path.join(tmp_dir, f"profile-{count}.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(text)
+            lines = text.count("\n")
+            builtin = lines / best_of(lambda: profile_parser._parse_simple_yaml(path))
+            reference = "-"
+            if yaml is not None:
+                reference = f"{lines / best_of(lambda: yaml.safe_load(text)):,.0f}"
+                if profile_parser._parse_simple_yaml(path) != yaml.safe_load(text):
+                    failed = True
+            print(f"{count:>8} {lines:>8} {builtin:>14,.0f} {reference:>14}")
+    if failed:
+        print("FAIL: fallback parser and PyYAML disagree", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env bats
+# Command index: --list, help and dispatch read a cached name/file/entry table.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+}
+
+@test "--list writes the command index and reads it on later runs" {
+  run wgx --list
+  assert_success
+  assert_line --index 0 "help"
+  assert_line --index 1 "task"
+  assert_line --index 2 "tasks"
+  assert_line --index 3 "validate"
+  [ "${#lines[@]}" -eq 4 ]
+
+  index="$(printf '%s' "$WGX_CACHE_DIR"/commands/*.tsv)"
+  [ -f "$index" ]
+  run cat "$index"
+  assert_line --index 0 "$(printf 'help\t-\twgx_usage\t0')"
+  assert_line --index 3 "$(printf 'validate\t%s/cmd/validate.bash\tcmd_validate\t1' "$REPO_ROOT")"
+
+  # Ein gültiger Index wird nicht neu geschrieben.
+  before="$(stat -c %i "$index")"
+  run wgx --list
+  assert_success
+  [ "$(stat -c %i "$index")" = "$before" ]
+}
+
+@test "the command index follows added commands and rejects unknown names" {
+  local root="$BATS_TEST_TMPDIR/wgx"
+  mkdir -p "$root"
+  cp -R "$REPO_ROOT/lib" "$REPO_ROOT/modules" "$REPO_ROOT/cmd" "$root/"
+
+  run env WGX_PROJECT_ROOT="$root" wgx --list
+  assert_success
+  [[ $output != *"extra"* ]]
+
+  sleep 0.01
+  cat >"$root/cmd/extra.bash" <<'SH'
+wgx_command_main() { printf 'extra %s\n' "$*"; }
+SH
+  run env WGX_PROJECT_ROOT="$root" wgx --list
+  assert_success
+  assert_line --index 0 "extra"
+
+  run env WGX_PROJECT_ROOT="$root" wgx extra one two
+  assert_success
+  assert_output "extra one two"
+
+  run env WGX_PROJECT_ROOT="$root" wgx ../cmd/extra
+  assert_failure
+  [[ $output != *"extra one"* ]]
+}
+
+@test "a command index writable by others is not trusted" {
+  run wgx --list
+  assert_success
+  index="$(printf '%s' "$WGX_CACHE_DIR"/commands/*.tsv)"
+  [ "$(stat -c %a "$index")" = 600 ]
+
+  printf 'planted\t%s\tcmd_planted\t0\n' "$BATS_TEST_TMPDIR/planted.bash" >"$index"
+  chmod o+w "$index"
+  touch "$index"
+  run wgx --list
+  assert_success
+  [[ $output != *planted* ]]
+  [ "$(stat -c %a "$index")" = 600 ]
+}
@@ -35,3 +35,54 @@ setup() {
     assert_failure
   done
 }
+
+@test "help and list paths start no Python interpreter" {
+  local real_python log="$BATS_TEST_TMPDIR/python3.log"
+  real_python="$(command -v python3)"
+  mkdir -p "$BATS_TEST_TMPDIR/shim" "$BATS_TEST_TMPDIR/project/.wgx"
+  cat >"$BATS_TEST_TMPDIR/shim/python3" <<SH
+#!/usr/bin/env bash
+printf '%s\n' "\$*" >>"$log"
+exec "$real_python" "\$@"
+SH
+  chmod +x "$BATS_TEST_TMPDIR/shim/python3"
+  printf 'wgx:\n  apiVersion: v1\n  tasks:\n    hello: "echo hi"\n' >"$BATS_TEST_TMPDIR/project/.wgx/profile.yml"
+  cd "$BATS_TEST_TMPDIR/project"
+
+  : >"$log"
+  PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx --help >/dev/null
+  PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx --list >/dev/null
+  PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx validate --help >/dev/null
+  PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx tasks -h >/dev/null
+  PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx task --help >/dev/null
+  run env PATH="$BATS_TEST_TMPDIR/shim:$PATH" wgx no-such-command
+  assert_failure
+  [ ! -s "$log" ]
+}
+
+@test "an unmet requiredWgx is reported once by every command that loads the profile" {
+  mkdir -p "$BATS_TEST_TMPDIR/project/.wgx"
+  cat >"$BATS_TEST_TMPDIR/project/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  requiredWgx: "^9.0"
+  tasks:
+    hello: "echo hi"
+YAML
+  cd "$BATS_TEST_TMPDIR/project"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache" WGX_SERVE=0
+
+  run wgx tasks
+  assert_success
+  assert_output --partial "outside required range ^9.0"
+  [ "$(grep -c 'required range' <<<"$output")" -eq 1 ]
+
+  run wgx task hello
+  assert_failure
+  assert_output --partial "Profile requirements not met"
+  [ "$(grep -c 'required range' <<<"$output")" -eq 1 ]
+
+  # Help paths still load nothing.
+  run wgx tasks -h
+  [[ $output != *"required range"* ]]
+}
@@ -0,0 +1,110 @@
+#!/usr/bin/env bats
+# Module autoload: stubs source a module on the first call of its functions.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    hello: "echo hello"
+YAML
+  cd "$WORKDIR"
+}
+
+@test "help paths source no module and commands source only what they call" {
+  run env WGX_TRACE_MODULES=1 wgx tasks -h
+  assert_success
+  [[ $output != *"wgx: module"* ]]
+
+  run env WGX_TRACE_MODULES=1 wgx tasks
+  assert_success
+  assert_output --partial "wgx: autoload index"
+  assert_output --partial "wgx: module profile sourced in"
+  assert_output --partial "(via profile::ensure_loaded)"
+  [[ $output != *"wgx: module json"* ]]
+  [ "${lines[${#lines[@]} - 1]}" = "hello" ]
+}
+
+@test "WGX_AUTOLOAD=0 sources every module up front" {
+  run env WGX_TRACE_MODULES=1 WGX_AUTOLOAD=0 wgx tasks
+  assert_success
+  assert_output --partial "wgx: module json sourced in"
+  assert_output --partial "wgx: module semver sourced in"
+  [[ $output != *"autoload index"* ]]
+  [ "${lines[${#lines[@]} - 1]}" = "hello" ]
+}
+
+@test "the stub index follows added and removed module functions" {
+  local root="$BATS_TEST_TMPDIR/wgx"
+  mkdir -p "$root"
+  cp -R "$REPO_ROOT/lib" "$REPO_ROOT/modules" "$root/"
+  cat >"$root/modules/extra.bash" <<'SH'
+extra_hello() { printf 'hello from extra\n'; }
+SH
+  helper_script="$BATS_TEST_TMPDIR/autoload.sh"
+  cat >"$helper_script" <<'SH'
+#!/usr/bin/env bash
+set -euo pipefail
+source "$WGX_PROJECT_ROOT/lib/core.bash"
+_load_modules
+"$@"
+SH
+
+  run env WGX_PROJECT_ROOT="$root" bash "$helper_script" extra_hello
+  assert_success
+  assert_output "hello from extra"
+
+  sleep 0.01
+  cat >"$root/modules/extra.bash" <<'SH'
+extra_bye() { printf 'bye from extra\n'; }
+SH
+  run env WGX_PROJECT_ROOT="$root" bash "$helper_script" extra_bye
+  assert_success
+  assert_output "bye from extra"
+
+  run env WGX_PROJECT_ROOT="$root" bash "$helper_script" extra_hello
+  assert_failure 127
+  assert_output --partial "command not found"
+}
+
+@test "an index writable by others is regenerated instead of sourced" {
+  run wgx tasks
+  assert_success
+  index="$(printf '%s' "$WGX_CACHE_DIR"/autoload/*.bash)"
+  [ -f "$index" ]
+  [ "$(stat -c %a "${index%/*}")" = 700 ]
+  [ "$(stat -c %a "$index")" = 600 ]
+
+  printf 'printf planted >&2\n' >"$index"
+  chmod g+w "$index"
+  touch "$index"
+  run wgx tasks
+  assert_success
+  [[ $output != *planted* ]]
+  [ "$(stat -c %a "$index")" = 600 ]
+  run grep -c planted "$index"
+  assert_output 0
+}
+
+@test "without a private cache root modules are sourced up front" {
+  run env -u WGX_CACHE_DIR -u XDG_CACHE_HOME -u HOME WGX_TRACE_MODULES=1 \
+    TMPDIR="$BATS_TEST_TMPDIR" "$REPO_ROOT/cli/wgx" tasks
+  assert_success
+  assert_output --partial "wgx: module json sourced in"
+  [[ $output != *"autoload index"* ]]
+  [ "${lines[${#lines[@]} - 1]}" = "hello" ]
+
+  run env -u WGX_CACHE_DIR -u XDG_CACHE_HOME -u HOME "$REPO_ROOT/cli/wgx" --cache stats
+  assert_success
+  assert_line --index 1 "enabled: no"
+}
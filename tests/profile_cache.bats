@@ -0,0 +1,196 @@
+#!/usr/bin/env bats
+# Compiled-profile cache: Python runs only on a miss, edits invalidate.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+
+  # python3 shim that records every interpreter start before delegating.
+  PYTHON_LOG="$BATS_TEST_TMPDIR/python3.log"
+  : >"$PYTHON_LOG"
+  local real_python
+  real_python="$(command -v python3)"
+  mkdir -p "$BATS_TEST_TMPDIR/shim"
+  cat >"$BATS_TEST_TMPDIR/shim/python3" <<SH
+#!/usr/bin/env bash
+printf '%s\n' "\$*" >>"$PYTHON_LOG"
+exec "$real_python" "\$@"
+SH
+  chmod +x "$BATS_TEST_TMPDIR/shim/python3"
+  export PATH="$BATS_TEST_TMPDIR/shim:$PATH"
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    hello: "echo hello"
+YAML
+  cd "$WORKDIR"
+}
+
+parser_runs() {
+  grep -c 'profile_parser.py' "$PYTHON_LOG" || true
+}
+
+@test "second invocation replays the cache without starting the parser" {
+  run wgx tasks
+  assert_success
+  assert_output "hello"
+  [ "$(parser_runs)" -eq 1 ]
+
+  run wgx tasks
+  assert_success
+  assert_output "hello"
+  [ "$(parser_runs)" -eq 1 ]
+}
+
+@test "editing the manifest invalidates the cached compilation" {
+  run wgx tasks
+  assert_success
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    bye: "echo bye"
+YAML
+  run wgx tasks
+  assert_success
+  assert_output "bye"
+  [ "$(parser_runs)" -eq 2 ]
+}
+
+@test "WGX_PROFILE_CACHE=0 always parses" {
+  WGX_PROFILE_CACHE=0 run wgx tasks
+  WGX_PROFILE_CACHE=0 run wgx tasks
+  assert_success
+  [ "$(parser_runs)" -eq 2 ]
+  [ ! -d "$WGX_CACHE_DIR/profiles" ] || [ -z "$(ls -A "$WGX_CACHE_DIR/profiles")" ]
+}
+
+@test "tampered cache entries are rejected by the record reader" {
+  run wgx tasks
+  assert_success
+  local entry
+  entry="$(ls "$WGX_CACHE_DIR"/profiles/*.rec)"
+  marker="$BATS_TEST_TMPDIR/cache-pwned"
+  printf 'WGX_X\0\0$(touch %q)\0' "$marker" >>"$entry"
+
+  run wgx task hello
+  assert_success
+  assert_output --partial "hello"
+  [ ! -e "$marker" ]
+  [ "$(parser_runs)" -eq 2 ]
+}
+
+@test "--cache stats and --cache clear manage the cache" {
+  run wgx tasks
+  assert_success
+  run wgx --cache stats
+  assert_success
+  assert_output --partial "dir: $WGX_CACHE_DIR/profiles"
+  assert_output --partial "entries: 1"
+
+  run wgx --cache clear
+  assert_success
+  assert_output "removed: 1"
+
+  run wgx --cache stats
+  assert_output --partial "entries: 0"
+}
+
+@test "sourced sessions reload edited manifests and skip unchanged ones without commands" {
+  helper_script="$BATS_TEST_TMPDIR/session.sh"
+  cat >"$helper_script" <<'SH'
+#!/usr/bin/env bash
+set -euo pipefail
+source "$WGX_DIR/lib/core.bash"
+source "$WGX_DIR/modules/profile.bash"
+profile::load .wgx/profile.yml
+# Hit path: another spelling of the same file, with no commands available.
+saved_path="$PATH"
+PATH=""
+profile::load "$PWD/.wgx/../.wgx/profile.yml"
+PATH="$saved_path"
+printf 'hit=%s\n' "${WGX_TASK_CMDS[hello]}"
+# Same size, mtime one nanosecond past the stamp: reloaded.
+printf 'wgx:\n  apiVersion: v1\n  tasks:\n    hallo: "echo hello"\n' >.wgx/profile.yml
+STAMP="$PROFILE_STAMP" python3 -c '
+import os
+st = os.stat(os.environ["STAMP"])
+os.utime(".wgx/profile.yml", ns=(st.st_atime_ns, st.st_mtime_ns + 1))'
+profile::load .wgx/profile.yml
+printf 'reloaded=%s\n' "${WGX_TASK_CMDS[hallo]:-missing}"
+SH
+
+  run env WGX_PROFILE_CACHE=0 WGX_SERVE=0 bash "$helper_script"
+  assert_success
+  assert_line --index 0 -- "hit=STR:echo hello"
+  assert_line --index 1 -- "reloaded=STR:echo hello"
+  [ "$(parser_runs)" -eq 2 ]
+}
+
+@test "array tasks start without Python and keep newlines inside arguments" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    argv:
+      cmd: ["printf", "<%s>\n", "line one\nline two", "tab\there"]
+YAML
+
+  run wgx task argv
+  assert_success
+  assert_line --index 0 "<line one"
+  assert_line --index 1 "line two>"
+  assert_line --index 2 "<tab	here>"
+  [ "$(grep -c 'json_decode.py' "$PYTHON_LOG" || true)" -eq 0 ]
+
+  : >"$PYTHON_LOG"
+  run wgx task argv -- "extra arg"
+  assert_success
+  assert_line --index 3 "<extra arg>"
+  [ ! -s "$PYTHON_LOG" ]
+}
+
+@test "parser notes are replayed on a cache hit" {
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+apiVersion: v1
+tasks:
+  hello: "echo hello"
+YAML
+
+  run env WGX_PROFILE_DEPRECATION=warn wgx tasks
+  assert_success
+  assert_output --partial "root-level profile keys"
+  [ "$(parser_runs)" -eq 1 ]
+
+  run env WGX_PROFILE_DEPRECATION=warn wgx tasks
+  assert_success
+  assert_output --partial "root-level profile keys"
+  [ "$(parser_runs)" -eq 1 ]
+
+  run wgx tasks
+  assert_success
+  assert_output "hello"
+}
+
+@test "reload stamps are kept per manifest content, not per process" {
+  for _ in 1 2 3; do
+    run wgx tasks
+    assert_success
+  done
+  run ls -A "$WGX_CACHE_DIR/stamps"
+  assert_output "$(sha256sum .wgx/profile.yml | cut -d' ' -f1).stamp"
+
+  printf 'wgx:\n  apiVersion: v1\n  tasks:\n    bye: "echo bye"\n' >.wgx/profile.yml
+  run env WGX_PROFILE_CACHE_MAX=1 wgx tasks
+  assert_success
+  run ls -A "$WGX_CACHE_DIR/stamps"
+  assert_output "$(sha256sum .wgx/profile.yml | cut -d' ' -f1).stamp"
+}
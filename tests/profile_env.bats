@@ -0,0 +1,90 @@
+#!/usr/bin/env bats
+# Effective task env: merged by the parser, ${VAR} expanded, exported once.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  envDefaults:
+    LEVEL: info
+    OUT: default
+  env:
+    ROOT: ${BASE_DIR}/proj
+    OUT: ${ROOT}/out
+    PRICE: "$${ROOT} costs $5"
+  envOverrides:
+    LEVEL: debug
+  tasks:
+    show: ["sh", "-c", "printf '%s|%s|%s\\n' \"$LEVEL\" \"$OUT\" \"$PRICE\""]
+YAML
+  cd "$WORKDIR"
+}
+
+@test "tasks --env lists one value per key with precedence and expansion" {
+  run env BASE_DIR=/srv wgx tasks --env
+  assert_success
+  assert_line --index 0 "LEVEL=debug"
+  assert_line --index 1 "OUT=/srv/proj/out"
+  assert_line --index 2 "PRICE=\${ROOT} costs \$5"
+  assert_line --index 3 "ROOT=/srv/proj"
+  [ "${#lines[@]}" -eq 4 ]
+
+  run env BASE_DIR='a"b' wgx tasks --env --json
+  assert_success
+  assert_output '{"env":{"LEVEL":"debug","OUT":"a\"b/proj/out","PRICE":"${ROOT} costs $5","ROOT":"a\"b/proj"}}'
+}
+
+@test "process references resolve per run, not from the compiled cache" {
+  run env BASE_DIR=/one wgx task show
+  assert_success
+  assert_output "debug|/one/proj/out|\${ROOT} costs \$5"
+
+  run env BASE_DIR=/two wgx task show
+  assert_output "debug|/two/proj/out|\${ROOT} costs \$5"
+
+  # Unset or unexported names expand to nothing.
+  run env -u BASE_DIR wgx task show
+  assert_output "debug|/proj/out|\${ROOT} costs \$5"
+}
+
+@test "reference cycles are rejected at parse time" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  env:
+    A: ${B}
+    B: ${A}
+  tasks:
+    show: "true"
+YAML
+  run wgx tasks --env
+  assert_failure
+  assert_output --partial "env references form a cycle: A -> B -> A"
+}
+
+@test "a value that names its own key extends the lower layer or the process env" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  envDefaults:
+    FLAGS: -O2
+  env:
+    PATH: ${HOME}/bin:${PATH}
+  envOverrides:
+    FLAGS: ${FLAGS} -Wall
+YAML
+  run env HOME=/home/dev PATH="/usr/bin:$PATH" wgx tasks --env
+  assert_success
+  assert_line --index 0 "FLAGS=-O2 -Wall"
+  assert_line --index 1 --partial "PATH=/home/dev/bin:/usr/bin:"
+}
@@ -0,0 +1,123 @@
+#!/usr/bin/env bats
+# Resident profile server: the loader asks the socket first and falls back.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE_SOCKET="$BATS_TEST_TMPDIR/serve.sock"
+  export WGX_PROFILE_DEPRECATION=quiet
+
+  local real_python
+  real_python="$(command -v python3)"
+  PYTHON_LOG="$BATS_TEST_TMPDIR/python3.log"
+  : >"$PYTHON_LOG"
+  mkdir -p "$BATS_TEST_TMPDIR/shim"
+  cat >"$BATS_TEST_TMPDIR/shim/python3" <<SH
+#!/usr/bin/env bash
+printf '%s\n' "\$*" >>"$PYTHON_LOG"
+exec "$real_python" "\$@"
+SH
+  # socat stand-in for hosts without it: relays stdin to the socket.
+  cat >"$BATS_TEST_TMPDIR/shim/socat" <<SH
+#!$real_python
+import socket, sys
+client = socket.socket(socket.AF_UNIX)
+client.connect(sys.argv[-1].split(":", 1)[1])
+client.sendall(sys.stdin.buffer.read())
+client.shutdown(socket.SHUT_WR)
+while True:
+    chunk = client.recv(65536)
+    if not chunk:
+        break
+    sys.stdout.buffer.write(chunk)
+SH
+  chmod +x "$BATS_TEST_TMPDIR/shim/python3" "$BATS_TEST_TMPDIR/shim/socat"
+  export PATH="$BATS_TEST_TMPDIR/shim:$PATH"
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    hello: "echo hello"
+YAML
+  cd "$WORKDIR"
+}
+
+teardown() {
+  if [[ -S $WGX_SERVE_SOCKET ]]; then
+    wgx --serve --stop >/dev/null 2>&1 || true
+  fi
+}
+
+start_server() {
+  wgx --serve >/dev/null 2>&1 &
+  local i
+  for ((i = 0; i < 50; i++)); do
+    [[ -S $WGX_SERVE_SOCKET ]] && return 0
+    sleep 0.1
+  done
+  return 1
+}
+
+parser_runs() {
+  grep -c 'profile_parser.py' "$PYTHON_LOG" || true
+}
+
+@test "loader answers from the running server without starting Python" {
+  start_server
+  : >"$PYTHON_LOG"
+
+  run wgx tasks
+  assert_success
+  assert_output "hello"
+  run wgx task hello
+  assert_success
+  assert_output --partial "hello"
+  [ "$(parser_runs)" -eq 0 ]
+  [ ! -s "$PYTHON_LOG" ]
+
+  run wgx --serve --stats
+  assert_success
+  assert_output --partial "hits: 1"
+  assert_output --partial "misses: 1"
+}
+
+@test "server notices manifest edits" {
+  start_server
+  run wgx tasks
+  assert_output "hello"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    bye: "echo bye bye"
+YAML
+  run wgx tasks
+  assert_success
+  assert_output "bye"
+  run wgx --serve --stats
+  assert_output --partial "invalidations: 1"
+}
+
+@test "without a socket client the loader falls back to the parser" {
+  start_server
+  rm "$BATS_TEST_TMPDIR/shim/socat"
+  run wgx tasks
+  assert_success
+  assert_output "hello"
+  [ "$(parser_runs)" -eq 1 ]
+}
+
+@test "WGX_SERVE=0 bypasses the server" {
+  start_server
+  WGX_SERVE=0 run wgx tasks
+  assert_success
+  assert_output "hello"
+  [ "$(parser_runs)" -eq 1 ]
+}
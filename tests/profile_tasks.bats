@@ -219,3 +219,106 @@ SH
     [[ ! -e "$marker" ]]
   done
 }
+
+@test "profile::load keeps dotted task names and multi-line values verbatim" {
+  WORKDIR="$BATS_TEST_TMPDIR/records"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  env:
+    GREETING: "line one\nline two $(touch pwned)"
+  workflows:
+    release flow:
+      steps:
+        - task: build.web
+  tasks:
+    build.web: echo web
+YAML
+
+  helper_script="$BATS_TEST_TMPDIR/check_records.sh"
+  cat >"$helper_script" <<'SH'
+#!/usr/bin/env bash
+set -euo pipefail
+REPO_ROOT="$1"
+WORKDIR="$2"
+source "$REPO_ROOT/lib/core.bash"
+source "$REPO_ROOT/modules/profile.bash"
+cd "$WORKDIR"
+profile::load ".wgx/profile.yml"
+printf 'cmd=%s\n' "${WGX_TASK_CMDS[build.web]}"
+printf 'workflow=%s\n' "${WGX_WORKFLOW_TASKS[release flow]}"
+printf 'env=%s\n' "${WGX_ENV_EXPORTS[0]}"
+SH
+  chmod +x "$helper_script"
+
+  run env WGX_PROFILE_DEPRECATION=quiet WGX_PROFILE_CACHE=0 "$helper_script" "$REPO_ROOT" "$WORKDIR"
+  assert_success
+  assert_line --index 0 -- "cmd=STR:echo web"
+  assert_line --index 1 -- "workflow=build.web"
+  assert_line --index 2 -- "env=GREETING=line one"
+  assert_line --index 3 -- "line two \$(touch pwned)"
+  [ ! -e "$WORKDIR/pwned" ]
+}
+
+@test "task lookups use the parser index without subshells" {
+  WORKDIR="$BATS_TEST_TMPDIR/index"
+  mkdir -p "$WORKDIR/.wgx" "$BATS_TEST_TMPDIR/shim"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  workflows:
+    ci:
+      steps:
+        - task: Build_App
+        - task: missing__step
+  validate:
+    quick: [Zeta]
+    unsupported:
+      Build_App: no toolchain
+  tasks:
+    build_app: echo build
+    Zeta: echo zeta
+    a.b: echo ab
+YAML
+  for tool in tr sort; do
+    printf '#!/bin/sh\necho "%s $*" >>"%s/forks.log"\nexit 1\n' "$tool" "$BATS_TEST_TMPDIR" >"$BATS_TEST_TMPDIR/shim/$tool"
+    chmod +x "$BATS_TEST_TMPDIR/shim/$tool"
+  done
+
+  helper_script="$BATS_TEST_TMPDIR/check_index.sh"
+  cat >"$helper_script" <<'SH'
+#!/usr/bin/env bash
+set -euo pipefail
+REPO_ROOT="$1"
+WORKDIR="$2"
+source "$REPO_ROOT/lib/core.bash"
+source "$REPO_ROOT/modules/profile.bash"
+cd "$WORKDIR"
+profile::load ".wgx/profile.yml"
+PATH="$3:$PATH"
+printf 'keys=%s\n' "${WGX_TASK_KEYS[*]}"
+for name in Build_App build_app Zeta a.b "Build  __App" missing__step; do
+  profile::_task_key_into key "$name"
+  printf '%s=%s\n' "$name" "$key"
+done
+printf 'tasks=%s\n' "$(profile::_task_keys | paste -sd' ')"
+printf 'quick=%s\n' "$(profile::validate_profile_checks quick)"
+printf 'skip=%s\n' "$(profile::validate_skip_reason Build_App)"
+SH
+  chmod +x "$helper_script"
+
+  run env WGX_PROFILE_DEPRECATION=quiet WGX_PROFILE_CACHE=0 "$helper_script" "$REPO_ROOT" "$WORKDIR" "$BATS_TEST_TMPDIR/shim"
+  assert_success
+  assert_line --index 0 -- "keys=a.b build-app zeta"
+  assert_line --index 1 -- "Build_App=build-app"
+  assert_line --index 2 -- "build_app=build-app"
+  assert_line --index 3 -- "Zeta=zeta"
+  assert_line --index 4 -- "a.b=a.b"
+  assert_line --index 5 -- "Build  __App=build-app"
+  assert_line --index 6 -- "missing__step=missing-step"
+  assert_line --index 7 -- "tasks=a.b build-app zeta"
+  assert_line --index 8 -- "quick=zeta"
+  assert_line --index 9 -- "skip=unsupported:no toolchain"
+  [ ! -e "$BATS_TEST_TMPDIR/forks.log" ]
+}
@@ -0,0 +1,99 @@
+#!/usr/bin/env bats
+# Shared check-result cache: clones of one tree reuse each other's passes.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+  # Reruns must reach the shared result cache, not the local reuse of validate passes.
+  export WGX_VALIDATE_REUSE=0
+  export GIT_AUTHOR_NAME=t GIT_AUTHOR_EMAIL=t@example.org
+  export GIT_COMMITTER_NAME=t GIT_COMMITTER_EMAIL=t@example.org
+
+  local origin="$BATS_TEST_TMPDIR/origin"
+  mkdir -p "$origin/.wgx"
+  cat >"$origin/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - test
+      - flaky
+  tasks:
+    test:
+      cmd: ["sh", "-c", "echo ran >>\"$RUNS\"; echo test output"]
+    flaky:
+      cmd: ["sh", "-c", "echo ran >>\"$RUNS\"; exit 1"]
+YAML
+  git -C "$origin" init -q
+  git -C "$origin" add -A
+  git -C "$origin" commit -qm init
+  git clone -q "$origin" "$BATS_TEST_TMPDIR/a"
+  git clone -q "$origin" "$BATS_TEST_TMPDIR/b"
+  export RUNS="$BATS_TEST_TMPDIR/runs.log"
+  : >"$RUNS"
+}
+
+teardown() {
+  [[ -n ${SERVER_PID:-} ]] && kill "$SERVER_PID" 2>/dev/null || true
+}
+
+runs() {
+  wc -l <"$RUNS" | tr -d ' '
+}
+
+checks() {
+  python3 -c 'import json, sys
+for check in json.loads(sys.argv[1])["checks"]:
+    print(check["name"], check["status"], check.get("cache", "-"))' "$1"
+}
+
+@test "a pass published by one clone is reused by another over http" {
+  python3 "$REPO_ROOT/modules/remote_cache.py" serve "$BATS_TEST_TMPDIR/store" >"$BATS_TEST_TMPDIR/server.out" &
+  SERVER_PID=$!
+  for _ in $(seq 50); do
+    [[ -s $BATS_TEST_TMPDIR/server.out ]] && break
+    sleep 0.1
+  done
+  url="$(sed -n 's/^serving //p' "$BATS_TEST_TMPDIR/server.out")"
+  [ -n "$url" ]
+
+  cd "$BATS_TEST_TMPDIR/a"
+  run wgx validate --profile quick --json --remote-cache "$url"
+  assert_failure
+  [ "$(runs)" -eq 2 ]
+
+  cd "$BATS_TEST_TMPDIR/b"
+  run wgx validate --profile quick --json --remote-cache "$url"
+  assert_failure
+  [ "$(runs)" -eq 3 ]
+  run checks "$output"
+  assert_line --index 0 "test passed remote"
+  assert_line --index 1 "flaky failed -"
+
+  log="$(find "$BATS_TEST_TMPDIR/store/cas" -type f)"
+  [ "$(cat "$log")" = "test output" ]
+}
+
+@test "file:// caches follow the working tree, not the commit" {
+  export WGX_REMOTE_CACHE="file://$BATS_TEST_TMPDIR/store"
+  cd "$BATS_TEST_TMPDIR/a"
+  run wgx validate --profile quick
+  [ "$(runs)" -eq 2 ]
+
+  cd "$BATS_TEST_TMPDIR/b"
+  printf 'change\n' >untracked.txt
+  run wgx validate --profile quick
+  [ "$(runs)" -eq 4 ]
+  rm untracked.txt
+  run wgx validate --profile quick
+  [ "$(runs)" -eq 5 ]
+  assert_output --partial "remote cache)"
+
+  run env WGX_REMOTE_CACHE= wgx validate --profile quick
+  [ "$(runs)" -eq 7 ]
+}
@@ -0,0 +1,143 @@
+#!/usr/bin/env bats
+# Task result cache: tasks with inputs: are skipped when nothing relevant changed.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+  # Reruns must reach the task cache, not the local reuse of validate passes.
+  export WGX_VALIDATE_REUSE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx" "$WORKDIR/src"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - build
+      - plain
+  tasks:
+    build:
+      cmd: ["sh", "-c", "echo run >>runs.log; mkdir -p dist; cat src/* >dist/app.txt"]
+      inputs: ["src/**"]
+      outputs: dist
+    plain:
+      cmd: ["true"]
+YAML
+  printf 'one\n' >"$WORKDIR/src/a.txt"
+  cd "$WORKDIR"
+}
+
+runs() {
+  wc -l <runs.log | tr -d ' '
+}
+
+@test "unchanged inputs skip the task and restore its outputs" {
+  run wgx task build
+  assert_success
+  [ "$(runs)" -eq 1 ]
+
+  rm -rf dist
+  run wgx task build
+  assert_success
+  assert_output --partial "wgx: build cached ("
+  [ "$(runs)" -eq 1 ]
+  [ "$(cat dist/app.txt)" = "one" ]
+  [ -f .wgx/cache/tasks/.gitignore ]
+
+  printf 'two\n' >>src/a.txt
+  run env DRYRUN=1 wgx task build
+  assert_success
+  assert_line --index 1 --regexp '^cache=miss [0-9a-f]{12}$'
+
+  run wgx task build
+  assert_success
+  [ "$(runs)" -eq 2 ]
+  run env DRYRUN=1 wgx task build
+  assert_line --index 1 --regexp '^cache=hit [0-9a-f]{12}$'
+}
+
+@test "shell mode and limits are part of the cache key" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    build:
+      cmd: "echo run >>runs.log"
+      inputs: ["src/**"]
+YAML
+  run wgx task build
+  assert_success
+  run wgx task build
+  [ "$(runs)" -eq 1 ]
+
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    build:
+      cmd: "echo run >>runs.log"
+      shell: plain
+      inputs: ["src/**"]
+YAML
+  run wgx task build
+  assert_success
+  [ "$(runs)" -eq 2 ]
+
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    build:
+      cmd: "echo run >>runs.log"
+      shell: plain
+      limits: {timeout: 60}
+      inputs: ["src/**"]
+YAML
+  run wgx task build
+  assert_success
+  [ "$(runs)" -eq 3 ]
+  run wgx task build
+  [ "$(runs)" -eq 3 ]
+}
+
+@test "--force reruns and --no-cache bypasses the cache" {
+  run wgx task build
+  [ "$(runs)" -eq 1 ]
+
+  run wgx task --force build
+  assert_success
+  [ "$(runs)" -eq 2 ]
+  [[ $output != *"cached"* ]]
+
+  rm -rf .wgx/cache
+  run wgx task --no-cache build
+  assert_success
+  [ "$(runs)" -eq 3 ]
+  [ ! -d .wgx/cache ]
+}
+
+@test "validate shows cache state in dry runs and receipts" {
+  run wgx validate --profile quick --dry-run
+  assert_success
+  assert_line --index 0 "$(printf 'run\tbuild\tcache=miss')"
+  assert_line --index 1 "$(printf 'run\tplain')"
+
+  run wgx validate --profile quick --json
+  assert_success
+  run wgx validate --profile quick --json
+  assert_success
+  [ "$(runs)" -eq 1 ]
+  python3 - "$output" <<'PY'
+import json, sys
+
+checks = {check["name"]: check for check in json.loads(sys.argv[1])["checks"]}
+assert checks["build"]["cache"] == "hit", checks["build"]
+assert "cache" not in checks["plain"], checks["plain"]
+PY
+}
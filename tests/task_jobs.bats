@@ -0,0 +1,157 @@
+#!/usr/bin/env bats
+# wgx task --jobs: several tasks in a bounded pool of process groups.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    waiter:
+      cmd: ["sh", "-c", "for i in 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16 17 18 19 20; do [ -e started ] && echo saw-peer && exit 0; sleep 0.1; done; echo alone; exit 1"]
+    peer:
+      cmd: ["sh", "-c", "touch started; echo peer-ran"]
+    broken:
+      cmd: ["sh", "-c", "echo broken-ran; exit 3"]
+    slow:
+      cmd: ["sleep", "30"]
+    ok:
+      cmd: ["echo", "ok-ran"]
+    background:
+      cmd: ["sh", "-c", "sleep 30 & echo $! >background.pid; echo background-ran"]
+YAML
+  cd "$WORKDIR"
+}
+
+@test "task --jobs runs tasks concurrently with prefixed output and a summary" {
+  run wgx task --jobs 2 waiter peer
+  assert_success
+  assert_output --partial "waiter | saw-peer"
+  assert_output --partial "peer   | peer-ran"
+  assert_output --partial "task    status     exit  duration_ms"
+  [[ $output =~ waiter\ +passed\ +0\ +[0-9]+ ]]
+  [[ $output =~ peer\ +passed\ +0\ +[0-9]+ ]]
+
+  rm -f started
+  run wgx task --jobs 1 waiter peer
+  assert_failure 1
+  assert_output --partial "waiter | alone"
+  [[ $output =~ waiter\ +failed\ +1 ]]
+}
+
+@test "task --fail-fast cancels running tasks and skips queued ones" {
+  start="$SECONDS"
+  run wgx task --jobs 2 --fail-fast --group broken slow ok
+  assert_failure 3
+  ((SECONDS - start < 20))
+  assert_output --partial "── broken (failed, exit 3,"
+  assert_output --partial "broken-ran"
+  [[ $output =~ slow\ +cancelled\ +143 ]]
+  [[ $output =~ ok\ +skipped\ +-\ +- ]]
+  [[ $output != *"ok-ran"* ]]
+}
+
+@test "task --jobs finishes a task that leaves a background process holding its output" {
+  start="$SECONDS"
+  run wgx task --jobs 2 background ok
+  assert_success
+  ((SECONDS - start < 20))
+  assert_output --partial "background | background-ran"
+  [[ $output =~ background\ +passed\ +0 ]]
+  [[ $output =~ ok\ +passed\ +0 ]]
+  # The leftover process went down with the task's process group; give its
+  # new parent a moment to reap it.
+  pid="$(cat background.pid)"
+  for _ in 1 2 3 4 5 6 7 8 9 10; do
+    kill -0 "$pid" 2>/dev/null || break
+    sleep 0.2
+  done
+  ! kill -0 "$pid" 2>/dev/null
+}
+
+@test "task --jobs rejects undefined tasks before starting any" {
+  run wgx task --jobs 2 peer nope
+  assert_failure 1
+  assert_output --partial "Task not defined: nope"
+  [ ! -e started ]
+
+  run wgx task --jobs 2 peer -- --flag
+  assert_failure 2
+  [ ! -e started ]
+}
+
+@test "task --workflow runs steps along their needs and names the critical path" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  workflows:
+    ci:
+      steps:
+        - task: waiter
+          needs: []
+        - task: peer
+          needs: []
+        - task: ok
+          needs: [waiter, peer]
+    broken:
+      steps:
+        - task: broken
+        - task: ok
+  tasks:
+    waiter:
+      cmd: ["sh", "-c", "for i in 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16 17 18 19 20; do [ -e started ] && echo saw-peer && exit 0; sleep 0.1; done; echo alone; exit 1"]
+    peer:
+      cmd: ["sh", "-c", "touch started; echo peer-ran"]
+    broken:
+      cmd: ["sh", "-c", "echo broken-ran; exit 3"]
+    ok:
+      cmd: ["echo", "ok-ran"]
+YAML
+
+  run wgx task --workflow ci --jobs 2
+  assert_success
+  assert_output --partial "→ waiter"
+  assert_output --partial "waiter | saw-peer"
+  assert_output --partial "── ok (passed, exit 0,"
+  [[ $output =~ critical\ path:\ waiter\ \([0-9]+\ ms\)\ →\ ok\ \([0-9]+\ ms\) ]]
+
+  run wgx task --workflow broken
+  assert_failure 3
+  assert_output --partial "── ok (skipped: a needed task did not pass)"
+  [[ $output =~ ok\ +skipped\ +-\ +- ]]
+  [[ $output != *"ok-ran"* ]]
+
+  run wgx task --workflow nope
+  assert_failure 1
+  assert_output --partial "Workflow not defined: nope"
+}
+
+@test "validate reports workflow needs outside the workflow" {
+  cat >.wgx/profile.yml <<'YAML'
+wgx:
+  apiVersion: v1
+  workflows:
+    ci:
+      steps:
+        - task: ok
+          needs: [peer]
+  tasks:
+    ok:
+      cmd: ["echo", "ok-ran"]
+    peer:
+      cmd: ["echo", "peer-ran"]
+YAML
+
+  run wgx validate --json
+  assert_failure
+  assert_output --partial '"workflow_unknown_need:ci:ok:peer"'
+}
@@ -0,0 +1,132 @@
+#!/usr/bin/env bats
+# limits: {memory_mb, cpu_seconds, open_files, timeout} je Task.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - mem
+      - slow
+      - fine
+  tasks:
+    mem:
+      cmd: ["python3", "-c", "b = bytearray(400 * 1024 * 1024)"]
+      limits: {memory_mb: 200}
+    slow:
+      cmd: ["sleep", "5"]
+      limits: {timeout: 1}
+    fine:
+      cmd: ["python3", "-c", "print('ok')"]
+      limits: {memory_mb: 1024, open_files: 64, timeout: 1m}
+YAML
+  cd "$WORKDIR"
+}
+
+@test "wgx task reports which limit stopped it" {
+  run wgx task slow
+  assert_failure 124
+  assert_output --partial "wgx: task slow exceeded limits.timeout (1)"
+
+  run wgx task mem
+  assert_failure
+  assert_output --partial "MemoryError"
+
+  run wgx task fine
+  assert_success
+  assert_output --partial "ok"
+}
+
+@test "validate marks checks over a limit as resource_exceeded" {
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/receipt.json"
+  assert_failure
+  run python3 - "$BATS_TEST_TMPDIR/receipt.json" <<'PY'
+import json, sys
+with open(sys.argv[1], encoding="utf-8") as handle:
+    checks = json.load(handle)["checks"]
+for check in checks:
+    limit = check.get("limit") or {}
+    print(check["name"], check["status"], limit.get("name"), limit.get("value"))
+print("MemoryError" in checks[0]["output"]["tail"])
+PY
+  # The refused allocation shows in the output, not as a guessed limit.
+  assert_line --index 0 "mem failed None None"
+  assert_line --index 1 "slow resource_exceeded timeout 1"
+  assert_line --index 2 "fine passed None None"
+  assert_line --index 3 "True"
+}
+
+@test "limits bind the task command, not wgx's own cache and receipt work" {
+  mkdir -p src
+  printf 'one\n' >src/a.txt
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - build
+  tasks:
+    build:
+      cmd: ["true"]
+      inputs: ["src/**"]
+      limits: {memory_mb: 20}
+YAML
+  run wgx validate --profile quick --no-reuse --output "$BATS_TEST_TMPDIR/receipt.json"
+  assert_success
+  [[ $output != *MemoryError* ]]
+  run python3 -c 'import json, sys; c = json.load(open(sys.argv[1]))["checks"][0]; print(c["status"], c.get("cache"), c.get("limit"))' \
+    "$BATS_TEST_TMPDIR/receipt.json"
+  assert_output "passed miss None"
+
+  run wgx validate --profile quick --no-reuse --output "$BATS_TEST_TMPDIR/receipt.json"
+  assert_success
+  run python3 -c 'import json, sys; print(json.load(open(sys.argv[1]))["checks"][0].get("cache"))' \
+    "$BATS_TEST_TMPDIR/receipt.json"
+  assert_output "hit"
+}
+
+@test "a SIGKILL without spent CPU time is a plain failure, not cpu_seconds" {
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    killed:
+      cmd: ["sh", "-c", "kill -9 $$"]
+      limits: {cpu_seconds: 5}
+    burn:
+      cmd: ["sh", "-c", "while :; do :; done"]
+      limits: {cpu_seconds: 1}
+YAML
+  run wgx task killed
+  assert_failure 137
+  [[ $output != *"exceeded limits"* ]]
+
+  run wgx task burn
+  assert_failure
+  assert_output --partial "wgx: task burn exceeded limits.cpu_seconds (1)"
+}
+
+@test "unknown limits are a profile error" {
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    t:
+      cmd: ["true"]
+      limits: {memory: 1}
+YAML
+  run wgx task t
+  assert_failure
+  assert_output --partial "unknown limit 'memory'"
+}
@@ -0,0 +1,56 @@
+#!/usr/bin/env bats
+# shell: login (default), plain (bash -c) and exec (no shell) for string tasks.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  shell: plain
+  tasks:
+    probe: shopt -q login_shell && echo login || echo plain
+    login:
+      cmd: shopt -q login_shell && echo login || echo plain
+      shell: login
+    level:
+      cmd: printenv SHLVL
+      shell: exec
+    level-shell:
+      cmd: printenv SHLVL | cat
+      shell: exec
+YAML
+  cd "$WORKDIR"
+}
+
+@test "the global shell: applies unless the task sets its own" {
+  run wgx task probe
+  assert_success
+  assert_output "plain"
+
+  run wgx task login
+  assert_success
+  [ "${lines[${#lines[@]} - 1]}" = "login" ]
+}
+
+@test "shell: exec starts simple commands without a shell and falls back otherwise" {
+  run env SHLVL=5 wgx task level
+  assert_success
+  assert_output "6"
+
+  run env SHLVL=5 wgx task level-shell
+  assert_success
+  assert_output "7"
+
+  run env DRYRUN=1 wgx task level extra
+  assert_success
+  assert_line --index 1 "[DRY-RUN] printenv SHLVL extra"
+}
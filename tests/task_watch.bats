@@ -0,0 +1,88 @@
+#!/usr/bin/env bats
+# Watch mode: wgx task --watch reruns a task when its inputs change.
+
+load test_helper
+
+setup() {
+  REPO_ROOT="$(pwd)"
+  export WGX_DIR="$REPO_ROOT"
+  export PATH="$REPO_ROOT/cli:$PATH"
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  export WGX_SERVE=0 WGX_WATCH_DEBOUNCE_MS=100
+
+  WORKDIR="$BATS_TEST_TMPDIR/project"
+  mkdir -p "$WORKDIR/.wgx" "$WORKDIR/src"
+  cat >"$WORKDIR/.wgx/profile.yml" <<'YAML'
+wgx:
+  apiVersion: v1
+  tasks:
+    build:
+      cmd: "echo start >>runs.log; sleep ${BUILD_SLEEP:-0}; echo end >>runs.log"
+      shell: plain
+      inputs: [src]
+      outputs: runs.log
+YAML
+  printf 'one\n' >"$WORKDIR/src/a.txt"
+  cd "$WORKDIR"
+}
+
+# Wartet, bis runs.log genau $1 Zeilen hat (höchstens 10 s).
+await_lines() {
+  local i
+  for ((i = 0; i < 100; i++)); do
+    [[ -f runs.log && $(wc -l <runs.log) -eq $1 ]] && return 0
+    sleep 0.1
+  done
+  cat runs.log >&2
+  return 1
+}
+
+start_watch() {
+  setsid bash -c 'echo $$ >watch.pid; exec wgx task --watch build' >watch.out 2>&1 &
+  WATCH_JOB=$!
+}
+
+stop_watch() {
+  kill -INT -- "-$(cat watch.pid)"
+  WATCH_STATUS=0
+  wait "$WATCH_JOB" || WATCH_STATUS=$?
+}
+
+@test "a burst of edits reruns the task once and Ctrl-C exits 130" {
+  export WGX_WATCH_POLL=1
+  start_watch
+  await_lines 2
+  printf 'two\n' >src/a.txt
+  printf 'new\n' >src/b.txt
+  await_lines 4
+  sleep 1
+  stop_watch
+  [ "$WATCH_STATUS" -eq 130 ]
+  [ "$(wc -l <runs.log)" -eq 4 ]
+  run cat watch.out
+  assert_line --index 0 "wgx: watching 1 files (polling) for build; Ctrl-C stops"
+  [[ $output == *"src/a.txt (+1 more) changed; running build"* ]]
+}
+
+@test "a change during a run cancels it and starts over" {
+  export BUILD_SLEEP=3
+  start_watch
+  await_lines 1
+  printf 'two\n' >src/a.txt
+  await_lines 2
+  await_lines 3
+  stop_watch
+  [ "$WATCH_STATUS" -eq 130 ]
+  run cat runs.log
+  assert_line --index 0 "start"
+  assert_line --index 1 "start"
+  assert_line --index 2 "end"
+  run cat watch.out
+  [[ $output == *"src/a.txt changed; restarting build"* ]]
+}
+
+@test "--watch refuses several tasks" {
+  run wgx task --watch --jobs 2 build build
+  assert_failure
+  [[ $output == *"--watch beobachtet genau einen Task"* ]]
+}
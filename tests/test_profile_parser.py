@@ -10,6 +10,38 @@ from pathlib import Path
 
 from modules import profile_parser
 
+try:
+    import yaml
+except ImportError:  # pragma: no cover - exercised on hosts without PyYAML
+    yaml = None
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _generated_manifest(seed: int, tasks: int) -> str:
+    """A manifest inside the fallback subset, with comments and quoting."""
+    import random
+    rnd = random.Random(seed)
+    words = ["build", "lint", "echo hi", "npm run test", "cargo fmt -- --check", "a#b", "x:y"]
+    env_values = ["1", "on", "plain text", "'q # not a comment'", '"d: q"']
+    lines = ["# generated", "wgx:", "  apiVersion: v1  # inline", "  env:"]
+    for i in range(tasks // 4 + 1):
+        lines.append(f"    VAR_{i}: {rnd.choice(env_values)}")
+    lines += ["  workflows:", "    ci:", "      steps:"]
+    lines += [f"        - task: t{i}" for i in range(3)]
+    lines.append("  tasks:")
+    for i in range(tasks):
+        lines.append(f"    t{i}:")
+        lines.append(f"      desc: '{rnd.choice(words)} ''{i}'''")
+        if rnd.random() < 0.5:
+            lines.append(f"      cmd: {rnd.choice(words)}")
+        else:
+            lines.append("      cmd:")
+            lines.extend(f"        - {rnd.choice(words)}" for _ in range(rnd.randint(1, 3)))
+        lines.append(f"      safe: {rnd.choice(['true', 'no', '0'])}  # comment")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
 class TestProfileParser(unittest.TestCase):
 
     def test_split_key_value_standard(self):
@@ -148,6 +180,268 @@ class TestProfileParser(unittest.TestCase):
                 {"SAFE=$'x'$(touch /tmp/nope)$'y'": "value"},
             )
 
+    def test_record_format_emits_nul_delimited_triples(self):
+        content = (
+            "wgx:\n"
+            "  env:\n"
+            "    GREETING: \"a\\nb\"\n"
+            "  workflows:\n"
+            "    release flow:\n"
+            "      steps:\n"
+            "        - task: build.web\n"
+            "  tasks:\n"
+            "    build.web: echo web\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, "profile.yml")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            argv = ['profile_parser.py', '--format=records', tmp_path]
+            with patch.object(sys, 'argv', argv):
+                with patch('sys.stdout', new=io.StringIO()) as mock_stdout:
+                    profile_parser.main()
+        fields = mock_stdout.getvalue().split("\0")
+        self.assertEqual(fields.pop(), "")
+        self.assertEqual(len(fields) % 3, 0)
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        self.assertIn(("WGX_ENV_EXPORTS", "", "GREETING=a\nb"), records)
+        self.assertIn(("WGX_WORKFLOW_TASKS", "release flow", "build.web"), records)
+        self.assertIn(("WGX_TASK_ORDER", "", "build.web"), records)
+        self.assertIn(("WGX_TASK_CMDS", "build.web", "STR:echo web"), records)
+
+    def test_task_index_maps_manifest_spellings_to_sorted_keys(self):
+        content = (
+            "wgx:\n"
+            "  workflows:\n"
+            "    ci:\n"
+            "      steps:\n"
+            "        - task: Build_App\n"
+            "        - task: lint__all\n"
+            "  tasks:\n"
+            "    zeta: echo z\n"
+            "    build app: echo b\n"
+            "    Build--Web: echo w\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        index = {key: value for target, key, value in records if target == "WGX_TASK_INDEX"}
+        keys = [value for target, _, value in records if target == "WGX_TASK_KEYS"]
+        self.assertEqual(keys, ["build-web", "buildapp", "zeta"])
+        self.assertEqual(index, {
+            "Build_App": "build-app", "lint__all": "lint-all", "zeta": "zeta",
+            "build app": "buildapp", "Build--Web": "build-web",
+            "buildapp": "buildapp", "build-web": "build-web",
+        })
+        for spelling, key in index.items():
+            self.assertEqual(profile_parser.normalize_task_name(spelling), key)
+
+    def test_workflow_needs_default_to_the_previous_step(self):
+        content = (
+            "wgx:\n"
+            "  workflows:\n"
+            "    ci:\n"
+            "      steps:\n"
+            "        - task: Fetch\n"
+            "        - task: lint\n"
+            "        - task: build_app\n"
+            "          needs: []\n"
+            "        - task: package\n"
+            "          needs: [lint, Build_App]\n"
+            "  tasks:\n"
+            "    fetch: echo f\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+        self.assertIn(
+            "WGX_WORKFLOW_NEEDS\0ci\0fetch\nlint fetch\nbuild-app\npackage lint build-app\0",
+            stream.getvalue(),
+        )
+
+    def test_task_inputs_and_outputs_are_emitted_as_glob_lines(self):
+        content = (
+            "wgx:\n"
+            "  tasks:\n"
+            "    lint:\n"
+            "      cmd: ruff check .\n"
+            "      inputs: ['**/*.py', pyproject.toml]\n"
+            "    build:\n"
+            "      cmd: make\n"
+            "      inputs: src\n"
+            "      outputs: dist\n"
+            "    plain: echo hi\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("wgx:\n  tasks:\n    lint:\n      cmd: x\n      inputs: {a: b}\n")
+            with self.assertRaises(profile_parser.ProfileError):
+                profile_parser.compile_profile(path, profile_parser.RecordWriter(io.StringIO()))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        inputs = {key: value for target, key, value in records if target == "WGX_TASK_INPUTS"}
+        outputs = {key: value for target, key, value in records if target == "WGX_TASK_OUTPUTS"}
+        self.assertEqual(inputs, {"lint": "**/*.py\npyproject.toml", "build": "src"})
+        self.assertEqual(outputs, {"build": "dist"})
+
+    def test_validate_profile_map_emits_jobs_and_serial_checks(self):
+        stream = io.StringIO()
+        profile_parser.emit_validate({
+            "quick": ["lint", {"task": "test", "serial": True}, "test"],
+            "full": {"jobs": 4, "checks": ["lint", {"task": "e2e", "serial": "yes"}]},
+        }, profile_parser.RecordWriter(stream))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        self.assertEqual(records, [
+            ("WGX_VALIDATE_PROFILES", "quick", "lint test"),
+            ("WGX_VALIDATE_SERIAL", "quick", "test"),
+            ("WGX_VALIDATE_PROFILES", "full", "lint e2e"),
+            ("WGX_VALIDATE_SERIAL", "full", "e2e"),
+            ("WGX_VALIDATE_JOBS", "full", "4"),
+        ])
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            profile_parser.emit_validate({"full": {"jobs": 0, "checks": ["lint"]}},
+                                         profile_parser.RecordWriter(io.StringIO()))
+        self.assertIn("validate.full.jobs must be a positive integer", stderr.getvalue())
+
+    def test_task_limits_are_emitted_in_fixed_order(self):
+        content = (
+            "wgx:\n"
+            "  tasks:\n"
+            "    test:\n"
+            "      cmd: pytest\n"
+            "      limits: {timeout: 20m, open_files: 256, memory_mb: 4096}\n"
+            "    lint:\n"
+            "      cmd: ruff check .\n"
+            "      limits: {cpu_seconds: 30, timeout: 90}\n"
+            "    plain: echo hi\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+            for invalid in ("{memory: 1}", "{memory_mb: 0}", "{timeout: soon}",
+                            "{open_files: true}", "[1]"):
+                with open(path, "w", encoding="utf-8") as handle:
+                    handle.write(f"wgx:\n  tasks:\n    t:\n      cmd: x\n      limits: {invalid}\n")
+                with self.assertRaises(profile_parser.ProfileError, msg=invalid):
+                    profile_parser.compile_profile(path, profile_parser.RecordWriter(io.StringIO()))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        limits = {key: value for target, key, value in records if target == "WGX_TASK_LIMITS"}
+        self.assertEqual(limits, {
+            "test": "memory_mb=4096 open_files=256 timeout=1200",
+            "lint": "cpu_seconds=30 timeout=90",
+        })
+
+    def test_array_commands_are_emitted_pre_split(self):
+        content = (
+            "wgx:\n"
+            "  tasks:\n"
+            "    first:\n"
+            "      cmd: [printf, \"%s\\n\", \"a\\nb\"]\n"
+            "      args: [--x]\n"
+            "    plain: echo hi\n"
+            "    second: [\"\", two]\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        spans = {key: value for target, key, value in records if target == "WGX_TASK_ARGV"}
+        items = [value for target, _, value in records if target == "WGX_TASK_ARGV_ITEMS"]
+        self.assertEqual(spans, {"first": "0 4", "second": "4 2"})
+        self.assertEqual(items, ["printf", "%s\n", "a\nb", "--x", "", "two"])
+
+    def test_shell_modes_pick_exec_plain_or_login(self):
+        content = (
+            "wgx:\n"
+            "  shell: exec\n"
+            "  tasks:\n"
+            "    direct: pytest -q \"tests/a b\"\n"
+            "    piped: make | tee log\n"
+            "    builtin: cd src\n"
+            "    login:\n"
+            "      cmd: make\n"
+            "      shell: login\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream))
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("wgx:\n  tasks:\n    a:\n      cmd: x\n      shell: zsh\n")
+            with self.assertRaises(profile_parser.ProfileError):
+                profile_parser.compile_profile(path, profile_parser.RecordWriter(io.StringIO()))
+        fields = stream.getvalue().split("\0")[:-1]
+        records = [tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)]
+        cmds = {key: value for target, key, value in records if target == "WGX_TASK_CMDS"}
+        shells = {key: value for target, key, value in records if target == "WGX_TASK_SHELL"}
+        items = [value for target, _, value in records if target == "WGX_TASK_ARGV_ITEMS"]
+        self.assertTrue(cmds["direct"].startswith("ARRJSON:"))
+        self.assertEqual(items, ["pytest", "-q", "tests/a b"])
+        self.assertEqual(cmds["login"], "STR:make")
+        self.assertEqual(shells, {"piped": "plain", "builtin": "plain"})
+
+    def test_merge_env_applies_precedence_and_expands_references(self):
+        merged = profile_parser.merge_env(
+            {"LEVEL": "info", "OUT": "default"},
+            {"OUT": "${ROOT}/out", "ROOT": "/srv", "HOMEDIR": "${HOME}/x $5",
+             "LIT": "$${ROOT}"},
+            {"LEVEL": "debug"},
+        )
+        self.assertEqual(merged, {
+            "HOMEDIR": ("${HOME}/x $$5", True),
+            "LEVEL": ("debug", False),
+            "LIT": ("${ROOT}", False),
+            "OUT": ("/srv/out", False),
+            "ROOT": ("/srv", False),
+        })
+        with self.assertRaises(profile_parser.ProfileError):
+            profile_parser.merge_env({"A": "${B}", "B": "x${A}"})
+
+    def test_merge_env_self_reference_extends_the_lower_layer(self):
+        self.assertEqual(profile_parser.merge_env({}, {"PATH": "${HOME}/bin:${PATH}"}, {}), {
+            "PATH": ("${HOME}/bin:${PATH}", True),
+        })
+        merged = profile_parser.merge_env(
+            {"FLAGS": "-O2"},
+            {"FLAGS": "${FLAGS} -g", "CC": "cc"},
+            {"FLAGS": "${FLAGS} -Wall", "CC": "${CC} -m64"},
+        )
+        self.assertEqual(merged, {
+            "CC": ("cc -m64", False),
+            "FLAGS": ("-O2 -g -Wall", False),
+        })
+        with self.assertRaisesRegex(profile_parser.ProfileError, "A -> B -> A"):
+            profile_parser.merge_env({"A": "x"}, {"A": "${A}${B}", "B": "${A}"})
+
+    def test_record_writer_rejects_nul_bytes(self):
+        with patch('sys.stdout', new=io.StringIO()):
+            with self.assertRaisesRegex(ValueError, "NUL"):
+                profile_parser.RecordWriter().entry("WGX_TASK_DESC", "x", "a\0b")
+
     def test_profile_loader_runs_multiline_task_with_single_quotes(self):
         root = Path(__file__).resolve().parents[1]
         content = (
@@ -253,6 +547,140 @@ class TestProfileParser(unittest.TestCase):
                     stderr = mock_stderr.getvalue()
                     self.assertIn("task name collision", stderr)
 
+    @unittest.skipIf(yaml is None, "PyYAML is not installed")
+    def test_simple_yaml_matches_pyyaml(self):
+        """Differential check of the fallback parser against PyYAML."""
+        corpus = sorted((ROOT / "templates" / "profiles").glob("*.yml"))
+        corpus.append(ROOT / ".wgx" / "profile.example.yml")
+        for path in corpus:
+            with self.subTest(path=path.name):
+                with open(path, "r", encoding="utf-8") as handle:
+                    expected = yaml.safe_load(handle) or {}
+                self.assertEqual(profile_parser._parse_simple_yaml(str(path)), expected)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for seed in range(5):
+                path = os.path.join(tmp_dir, f"generated-{seed}.yml")
+                content = _generated_manifest(seed, 40)
+                with open(path, "w", encoding="utf-8") as handle:
+                    handle.write(content)
+                with self.subTest(seed=seed):
+                    self.assertEqual(profile_parser._parse_simple_yaml(path), yaml.safe_load(content))
+
+    def test_line_fast_path_agrees_with_token_scan(self):
+        """RE_LINE and _scan_line must tokenize a line identically."""
+        lines = [
+            "key: value", "  key: 'a: b'  # c", "- item", '- key: "v # x"', "- key:",
+            "key:", "# only a comment", "bare", "  - 'q''s'", "a b: c d", "k: x:y",
+            "k: http://example.com # c", "- - nested", "key: [1, 2]",
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                match = profile_parser.RE_LINE.fullmatch(line)
+                self.assertIsNotNone(match)
+                indent, dash, key, value, item = match.groups()
+                token = profile_parser._scan_line(line)
+                if indent is None:
+                    self.assertIsNone(token)
+                    continue
+                expected = (len(indent), dash is not None, key, item if key is None else value or "")
+                scanned = (token[0], token[1], None if token[2] is None else token[2].strip(), token[3].strip())
+                self.assertEqual(scanned, expected)
+
+    def test_resolve_backend_prefers_libyaml(self):
+        fake_yaml = type("yaml", (), {"CSafeLoader": object, "SafeLoader": object})
+        with patch.object(profile_parser, "_import_yaml", return_value=fake_yaml):
+            self.assertEqual(profile_parser.resolve_backend("auto"), "cyaml")
+            self.assertEqual(profile_parser.resolve_backend("pyyaml"), "pyyaml")
+        pure_yaml = type("yaml", (), {"SafeLoader": object})
+        with patch.object(profile_parser, "_import_yaml", return_value=pure_yaml):
+            self.assertEqual(profile_parser.resolve_backend("auto"), "pyyaml")
+            with self.assertRaises(profile_parser.ProfileError) as cm:
+                profile_parser.resolve_backend("cyaml")
+            self.assertEqual(cm.exception.code, 2)
+        with patch.object(profile_parser, "_import_yaml", return_value=None):
+            self.assertEqual(profile_parser.resolve_backend("auto"), "builtin")
+            with self.assertRaises(profile_parser.ProfileError):
+                profile_parser.resolve_backend("pyyaml")
+
+    def test_resolve_backend_reads_environment_and_rejects_unknown_names(self):
+        with patch.dict(os.environ, {"WGX_PROFILE_BACKEND": "builtin"}):
+            self.assertEqual(profile_parser.resolve_backend(), "builtin")
+        with self.assertRaisesRegex(profile_parser.ProfileError, "unknown WGX_PROFILE_BACKEND"):
+            profile_parser.resolve_backend("libfast")
+
+    def test_builtin_backend_reports_errors_instead_of_empty_profile(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "wb") as handle:
+                handle.write(b"wgx:\n  tasks:\n    bad: \xff\xfe\n")
+            with self.assertRaises(profile_parser.ProfileError) as cm:
+                profile_parser._load_manifest(path, "builtin")
+            self.assertEqual(cm.exception.code, 1)
+            self.assertIn("(builtin)", str(cm.exception))
+
+    def test_compile_profile_records_the_backend(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.yml")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write("wgx:\n  tasks:\n    hello: echo hello\n")
+            stream = io.StringIO()
+            profile_parser.compile_profile(path, profile_parser.RecordWriter(stream), "builtin")
+            self.assertIn("PROFILE_PARSER_BACKEND\0\0builtin\0", stream.getvalue())
+
+    def _run_batch(self, tmp_dir, stdin, *args):
+        return subprocess.run(
+            [sys.executable, str(ROOT / "modules" / "profile_parser.py"), *args],
+            input=stdin, capture_output=True, cwd=tmp_dir, check=False,
+            env={**os.environ, "WGX_PROFILE_DEPRECATION": "warn"},
+        )
+
+    def _batch_fixture(self, tmp_dir):
+        manifests = {
+            "ok.yml": "wgx:\n  tasks:\n    hello: echo hello\n",
+            "collision.yml": "wgx:\n  tasks:\n    foo-bar: echo a\n    foo_bar: echo b\n",
+            "root.yml": "tasks:\n  legacy: echo legacy\n",
+        }
+        for name, content in manifests.items():
+            with open(os.path.join(tmp_dir, name), "w", encoding="utf-8") as handle:
+                handle.write(content)
+        return ["ok.yml", "collision.yml", "missing.yml", "root.yml"]
+
+    def test_batch_emits_one_section_per_path_and_survives_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = self._batch_fixture(tmp_dir)
+            completed = self._run_batch(tmp_dir, ("\n".join(paths) + "\n\n").encode(), "--format=records", "--batch")
+            self.assertEqual(completed.returncode, 1)
+            sections = list(profile_parser.iter_sections(completed.stdout))
+            self.assertEqual([s[0] for s in sections], paths)
+            self.assertEqual([s[1] for s in sections], [0, 3, 1, 0])
+            for path, code, output, message in sections:
+                with self.subTest(path=path):
+                    if code:
+                        self.assertEqual(output, b"")
+                        self.assertIn(b"wgx: error:", message)
+                        continue
+                    single = self._run_batch(tmp_dir, b"", "--format=records", path)
+                    self.assertEqual(output, single.stdout)
+                    self.assertEqual(message, single.stderr)
+            self.assertIn(b"task name collision", sections[1][3])
+            self.assertIn(b"root-level profile keys", sections[3][3])
+
+    def test_batch_reads_nul_separated_paths_and_keeps_order_with_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = self._batch_fixture(tmp_dir) * 3
+            stdin = b"".join(p.encode() + b"\0" for p in paths)
+            serial = self._run_batch(tmp_dir, stdin, "--batch", "-0")
+            parallel = self._run_batch(tmp_dir, stdin, "--batch", "-0", "--jobs", "3")
+            self.assertEqual(parallel.returncode, serial.returncode)
+            self.assertEqual(parallel.stdout, serial.stdout)
+            self.assertEqual([s[0] for s in profile_parser.iter_sections(serial.stdout)], paths)
+
+    def test_batch_rejects_file_arguments(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            completed = self._run_batch(tmp_dir, b"", "--batch", "profile.yml")
+            self.assertEqual(completed.returncode, 1)
+            self.assertIn(b"Usage:", completed.stderr)
+
     def test_parse_scalar(self):
         """Test _parse_scalar for common scalar values and JSON fallbacks."""
         # Empty/Whitespace
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from modules import profile_parser
+from modules import profile_server
+
+
+def _split(answer: bytes):
+    header, _, rest = answer.partition(b"\n")
+    state, code, count = header.decode().split(" ")
+    lines = []
+    for _ in range(int(count)):
+        line, _, rest = rest.partition(b"\n")
+        lines.append(line.decode())
+    return state, int(code), lines, rest
+
+
+class TestProfileServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.mkdir(os.path.join(self.tmp.name, ".wgx"))
+        self.path = os.path.join(self.tmp.name, ".wgx", "profile.yml")
+        self._write("wgx:\n  tasks:\n    hello: echo hello\n")
+        self.server = profile_server.ProfileServer(os.path.join(self.tmp.name, "s.sock"), 60)
+
+    def _write(self, content):
+        with open(self.path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+
+    def test_compile_matches_record_format_and_hits_second_time(self):
+        first = self.server.handle(f"compile\t{self.path}")
+        state, code, notes, body = _split(first)
+        self.assertEqual((state, code, notes), ("ok", 0, []))
+        self.assertIn(b"WGX_TASK_CMDS\0hello\0STR:echo hello\0", body)
+
+        self.assertEqual(self.server.handle(f"compile\t{self.path}"), first)
+        self.assertEqual((self.server.hits, self.server.misses), (1, 1))
+        _, _, _, builtin = _split(self.server.handle(f"compile\t{self.path}\tbuiltin"))
+        self.assertIn(b"PROFILE_PARSER_BACKEND\0\0builtin\0", builtin)
+        self.assertEqual(self.server.misses, 2)
+        self.assertEqual(profile_server.repo_root(self.path), self.tmp.name)
+
+    def test_edit_invalidates_entry(self):
+        self.server.handle(f"compile\t{self.path}")
+        self._write("wgx:\n  tasks:\n    bye: echo bye, and more\n")
+        _, _, _, body = _split(self.server.handle(f"compile\t{self.path}"))
+        self.assertIn(b"WGX_TASK_CMDS\0bye\0", body)
+        self.assertEqual(self.server.invalidations, 1)
+
+    def test_parser_errors_keep_exit_code(self):
+        self._write("wgx:\n  tasks:\n    foo-bar: a\n    foo_bar: b\n")
+        state, code, lines, body = _split(self.server.handle(f"compile\t{self.path}"))
+        self.assertEqual((state, code, body), ("error", 3, b""))
+        self.assertIn("task name collision", lines[0])
+
+    def test_relative_and_missing_paths_are_errors(self):
+        self.assertEqual(_split(self.server.handle("compile\tprofile.yml"))[0], "error")
+        missing = os.path.join(self.tmp.name, "missing.yml")
+        self.assertEqual(_split(self.server.handle(f"compile\t{missing}"))[0], "error")
+
+    def test_changed_parser_answers_stale_and_stops(self):
+        self.server.parser_fingerprint = (0, 0, 0, 0)
+        self.assertEqual(_split(self.server.handle(f"compile\t{self.path}"))[0], "stale")
+        self.assertFalse(self.server.running)
+
+    def test_stats_report(self):
+        self.server.handle(f"compile\t{self.path}")
+        _, _, lines, _ = _split(self.server.handle("stats"))
+        self.assertIn("misses: 1", lines)
+        self.assertIn("entries: 1", lines)
+
+    def test_notes_are_returned_not_printed(self):
+        self._write("tasks:\n  hello: echo hello\n")
+        _, _, notes, _ = _split(self.server.handle(f"compile\t{self.path}"))
+        self.assertEqual(notes, [profile_parser.ROOT_FALLBACK_NOTE])
+
+
+if __name__ == '__main__':
+    unittest.main()
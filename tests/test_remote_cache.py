@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import unittest
+
+from modules import remote_cache
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.org", *args],
+                   cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class TestRemoteCacheServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = remote_cache.make_server(self.tmp.name)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address[:2]
+        self.url = f"http://{host}:{port}/wgx"
+
+    def test_published_result_is_found_over_http_and_on_disk(self):
+        key = "a" * 64
+        self.assertIsNone(remote_cache.lookup(self.url, key))
+        remote_cache.publish(self.url, key, "test", 1500, b"ok\n")
+
+        result = remote_cache.lookup(self.url, key)
+        self.assertEqual((result["task"], result["duration_ms"]), ("test", 1500))
+        log = remote_cache.backend_for(self.url).get(f"cas/{result['log']}")
+        self.assertEqual(log, b"ok\n")
+        self.assertEqual(remote_cache.lookup(f"file://{self.tmp.name}", key), result)
+
+    def test_server_rejects_bad_paths_and_mismatched_blobs(self):
+        backend = remote_cache.backend_for(self.url)
+        with self.assertRaises(remote_cache.CacheError):
+            backend._request("PUT", "cas/" + "0" * 64, b"not that")
+        with self.assertRaises(remote_cache.CacheError):
+            backend.get("../etc/passwd")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_failed_results_are_not_reused(self):
+        key = "b" * 64
+        remote_cache.backend_for(self.url).put(
+            f"ac/{key}", json.dumps({"status": "failed"}).encode())
+        self.assertIsNone(remote_cache.lookup(self.url, key))
+
+    def test_unreachable_server_raises_cache_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.environ["WGX_REMOTE_CACHE_TIMEOUT"] = "1"
+        self.addCleanup(os.environ.pop, "WGX_REMOTE_CACHE_TIMEOUT", None)
+        with self.assertRaises(remote_cache.CacheError):
+            remote_cache.lookup(self.url, "c" * 64)
+
+
+class TestRemoteCacheKey(unittest.TestCase):
+
+    def test_key_needs_a_tree_and_ignores_env_order(self):
+        material = remote_cache.read_material(b"tree=abc\0task=t\0cmd=STR:x\0env=B=2\0env=A=1\0")
+        reordered = dict(material, env=["A=1", "B=2"])
+        self.assertEqual(remote_cache.result_key(material), remote_cache.result_key(reordered))
+        self.assertNotEqual(remote_cache.result_key(material),
+                            remote_cache.result_key(dict(material, cmd=["STR:y"])))
+        self.assertIsNone(remote_cache.result_key(dict(material, tree=[])))
+
+    def test_tree_hash_is_shared_by_clones_and_covers_untracked_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "a")
+            os.makedirs(first)
+            _git(first, "init", "-q")
+            with open(os.path.join(first, "file.txt"), "w", encoding="utf-8") as handle:
+                handle.write("content\n")
+            with open(os.path.join(first, ".gitignore"), "w", encoding="utf-8") as handle:
+                handle.write("ignored/\n")
+            _git(first, "add", "-A")
+            _git(first, "commit", "-qm", "init")
+            second = os.path.join(tmp, "b")
+            _git(tmp, "clone", "-q", first, second)
+
+            tree = remote_cache.tree_hash(first)
+            self.assertEqual(remote_cache.tree_hash(second), tree)
+            os.makedirs(os.path.join(second, "ignored"))
+            with open(os.path.join(second, "ignored", "x"), "w", encoding="utf-8") as handle:
+                handle.write("x")
+            self.assertEqual(remote_cache.tree_hash(second), tree)
+            with open(os.path.join(second, "new.txt"), "w", encoding="utf-8") as handle:
+                handle.write("new")
+            self.assertNotEqual(remote_cache.tree_hash(second), tree)
+            # The real index is untouched.
+            status = subprocess.run(["git", "status", "--porcelain"], cwd=second,
+                                    check=True, capture_output=True, text=True).stdout
+            self.assertEqual(status, "?? new.txt\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
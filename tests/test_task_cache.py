@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from modules import task_cache
+
+
+class TestTaskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        self.cache = os.path.join(self.tmp.name, ".wgx", "cache", "tasks")
+        self._write("src/a.txt", "a")
+        self._write("src/sub/b.txt", "b")
+        self._write("src/skip.log", "log")
+        self.material = task_cache.read_material(
+            b"task=build\0cmd=STR:make\0env=B=2\0env=A=1\0in=src\0in=!src/*.log\0out=dist/**\0"
+        )
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+
+    def test_expand_walks_directories_and_applies_exclusions(self):
+        self._write(".wgx/cache/tasks/x/meta.json", "{}")
+        self.assertEqual(task_cache.expand(["src", "!src/*.log", ".wgx/**"], self.cache),
+                         ["src/a.txt", "src/sub/b.txt"])
+
+    def test_key_covers_contents_but_not_env_order(self):
+        key, count = task_cache.cache_key(self.material, self.cache)
+        self.assertEqual(count, 2)
+        reordered = dict(self.material, env=["A=1", "B=2"])
+        self.assertEqual(task_cache.cache_key(reordered, self.cache)[0], key)
+        self._write("src/skip.log", "changed")
+        self.assertEqual(task_cache.cache_key(self.material, self.cache)[0], key)
+        self._write("src/sub/b.txt", "changed")
+        self.assertNotEqual(task_cache.cache_key(self.material, self.cache)[0], key)
+
+    def test_store_then_hit_restores_outputs(self):
+        miss = task_cache.check(self.cache, self.material, restore=True, refresh=False)
+        self.assertTrue(miss.startswith("miss "))
+        key = miss.split()[1]
+        self._write("dist/app.js", "built")
+        task_cache.store(self.cache, key, self.material)
+        os.remove("dist/app.js")
+
+        self.assertEqual(task_cache.check(self.cache, self.material, restore=True, refresh=False),
+                         f"hit {key}")
+        with open("dist/app.js", encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "built")
+        self.assertEqual(task_cache.check(self.cache, self.material, restore=False, refresh=True),
+                         f"miss {key}")
+        with open(os.path.join(self.cache, ".gitignore"), encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "*\n")
+
+    def test_prune_drops_least_recently_used_entries(self):
+        keys = []
+        for index in range(3):
+            material = dict(self.material, cmd=[f"STR:make {index}"])
+            key = task_cache.cache_key(material, self.cache)[0]
+            with patch.dict(os.environ, {"WGX_TASK_CACHE_MAX": "2"}):
+                task_cache.store(self.cache, key, material)
+            os.utime(os.path.join(self.cache, key, "meta.json"), (1000 + index, 1000 + index))
+            keys.append(key)
+        self.assertEqual(sorted(os.listdir(self.cache)), sorted([".gitignore"] + keys[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
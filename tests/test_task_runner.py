@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import io
+import unittest
+
+from modules import task_runner
+
+
+def _graph(text, names):
+    return task_runner.read_graph(io.BytesIO(text.encode()), names)
+
+
+class TestTaskGraph(unittest.TestCase):
+
+    def test_reads_needs_per_task(self):
+        needs = _graph("fetch\nlint fetch\nbuild fetch\npackage lint build\n",
+                       ["fetch", "lint", "build", "package"])
+        self.assertEqual(needs, {
+            "fetch": [], "lint": ["fetch"], "build": ["fetch"], "package": ["lint", "build"],
+        })
+
+    def test_rejects_unknown_needs_cycles_and_duplicates(self):
+        with self.assertRaisesRegex(ValueError, "'lint' needs 'fetch'"):
+            _graph("lint fetch\n", ["lint"])
+        with self.assertRaisesRegex(ValueError, "cycle between build, lint"):
+            _graph("fetch\nlint build\nbuild lint\n", ["fetch", "lint", "build"])
+        with self.assertRaisesRegex(ValueError, "listed twice"):
+            _graph("lint\n", ["lint", "lint"])
+
+
+if __name__ == "__main__":
+    unittest.main()
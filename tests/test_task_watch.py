@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from modules import task_watch
+
+
+class TestTaskWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        self.cache = os.path.join(".wgx", "cache", "tasks")
+        self._write("src/a.py", "a")
+        self._write("src/gen/out.py", "generated")
+        self._write("README.md", "readme")
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+
+    def test_inputs_minus_outputs_are_watched(self):
+        self.assertEqual(task_watch.watched_files(["src"], ["src/gen/**"], self.cache),
+                         ["src/a.py"])
+
+    def test_git_listing_skips_ignored_files(self):
+        subprocess.run(["git", "init", "-q"], check=True)
+        self._write(".gitignore", "src/gen/\n")
+        self.assertEqual(task_watch.watched_files([], [], self.cache),
+                         [".gitignore", "README.md", "src/a.py"])
+
+    def test_changed_paths_reports_edits_additions_and_removals(self):
+        files = ["README.md", "src/a.py", "src/new.py"]
+        before = task_watch.snapshot(files)
+        self.assertEqual(task_watch.changed_paths(before, task_watch.snapshot(files)), [])
+        self._write("src/a.py", "edited")
+        self._write("src/new.py", "new")
+        os.remove("README.md")
+        self.assertEqual(task_watch.changed_paths(before, task_watch.snapshot(files)),
+                         ["README.md", "src/a.py", "src/new.py"])
+
+    def test_poll_watcher_only_wakes_on_a_real_change(self):
+        watcher = task_watch.PollWatcher()
+        watcher.sync(["src/a.py"])
+        self.assertFalse(watcher.wait(0.01))
+        os.utime("src/a.py", ns=(1, 1))
+        self.assertTrue(watcher.wait(0.01))
+        self.assertFalse(watcher.wait(0.01))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_wakes_on_write_below_a_watched_directory(self):
+        watcher = task_watch.InotifyWatcher()
+        self.addCleanup(watcher.close)
+        watcher.sync(["src/a.py"])
+        self.assertEqual(watcher.watched, {".", "src"})
+        self.assertFalse(watcher.wait(0.05))
+        self._write("src/a.py", "edited")
+        self.assertTrue(watcher.wait(1))
+        # The burst is drained in one go.
+        self.assertFalse(watcher.wait(0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from modules import validate_reuse
+
+
+class TestValidateReuse(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        self.cache = os.path.join(".wgx", "cache", "tasks")
+        subprocess.run(["git", "init", "-q"], check=True)
+        self._write("src/a.py", "a")
+        self._write("docs/readme.md", "docs")
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+
+    def test_blob_digest_follows_input_content_only(self):
+        before = validate_reuse.blob_digest(["src/**"], self.cache)
+        self._write("docs/readme.md", "more docs")
+        self.assertEqual(validate_reuse.blob_digest(["src/**"], self.cache), before)
+        self._write("src/a.py", "edited, not committed")
+        self.assertNotEqual(validate_reuse.blob_digest(["src/**"], self.cache), before)
+        self._write("src/b.py", "b")
+        self.assertNotEqual(validate_reuse.blob_digest(["src/a.py"], self.cache),
+                            validate_reuse.blob_digest(["src/**"], self.cache))
+
+    def test_blob_digest_is_none_when_no_file_matches(self):
+        os.makedirs("generated")
+        self.assertIsNone(validate_reuse.blob_digest(["missing/**"], self.cache))
+        self.assertIsNone(validate_reuse.blob_digest(["generated/**"], self.cache))
+
+    def test_key_covers_repository_manifest_command_env_limits_and_identity(self):
+        base = dict(repository="/src/one", manifest_sha256="m1", task="lint",
+                    command="ruff check .", envs=["A=1", "B=2"],
+                    limits="timeout=60", identity_sha256="id", inputs="tree")
+        key = validate_reuse.reuse_key(**base)
+        self.assertEqual(validate_reuse.reuse_key(**{**base, "envs": ["B=2", "A=1"]}), key)
+        for field, value in (("repository", "/src/two"), ("manifest_sha256", "m2"),
+                             ("task", "test"), ("command", "ruff check src"),
+                             ("envs", ["A=2", "B=2"]), ("limits", ""),
+                             ("identity_sha256", "other"), ("inputs", "tree2")):
+            self.assertNotEqual(validate_reuse.reuse_key(**{**base, field: value}), key, field)
+
+    def test_remember_lookup_and_prune(self):
+        store = os.path.join(self.tmp.name, "store")
+        self.assertIsNone(validate_reuse.lookup(store, "k1"))
+        with patch.dict(os.environ, {"WGX_VALIDATE_REUSE_MAX": "2"}):
+            validate_reuse.remember(store, [("k1", "lint")], "r1")
+            os.utime(os.path.join(store, "k1.json"), ns=(1, 1))
+            validate_reuse.remember(store, [("k2", "test"), ("k3", "docs")], "r2")
+        self.assertIsNone(validate_reuse.lookup(store, "k1"))
+        self.assertEqual(validate_reuse.lookup(store, "k2"), "r2")
+        self.assertEqual(sorted(os.listdir(store)), ["k2.json", "k3.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
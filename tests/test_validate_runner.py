@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from modules import validate_runner
+
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.base = os.path.join(self.tmp.name, "logs", "lint")
+
+    def _capture(self, **env):
+        with patch.dict(os.environ, env):
+            return validate_runner.Capture(self.base)
+
+    def test_tail_keeps_the_last_bytes_from_a_line_start(self):
+        capture = self._capture(WGX_VALIDATE_TAIL_KB="1")
+        for number in range(1000):
+            capture.feed(f"line {number}\n".encode())
+        capture.close()
+        tail = capture.tail_text()
+        self.assertLessEqual(len(tail), 1024)
+        self.assertTrue(tail.startswith("line "))
+        self.assertTrue(tail.endswith("line 999\n"))
+
+    def test_one_large_chunk_replaces_the_tail(self):
+        capture = self._capture(WGX_VALIDATE_TAIL_KB="1")
+        capture.feed(b"x" * 5000 + b"\nend\n")
+        self.assertEqual(capture.tail_text(), "end\n")
+
+    def test_log_is_capped_and_described_by_the_sidecar(self):
+        capture = self._capture(WGX_VALIDATE_LOG_MAX_MB="1")
+        chunk = b"y" * 65536
+        for _ in range(20):
+            capture.feed(chunk)
+        capture.close()
+        capture.write_sidecar()
+        capture.file.close()
+
+        with open(self.base + ".json", encoding="utf-8") as handle:
+            described = json.load(handle)
+        self.assertEqual(described["output_bytes"], 20 * 65536)
+        self.assertEqual(described["log_bytes"], 1024 * 1024)
+        self.assertTrue(described["truncated"])
+        self.assertEqual(os.path.getsize(described["log"]), 1024 * 1024)
+        self.assertEqual(capture.read_log(), b"y" * 1024 * 1024)
+
+    def test_gzip_log_hashes_the_stored_file(self):
+        capture = self._capture(WGX_VALIDATE_LOG_GZIP="1")
+        capture.feed(b"hello\n" * 1000)
+        capture.close()
+        described = capture.describe()
+        capture.file.close()
+        self.assertTrue(described["log"].endswith("lint.log.gz"))
+        with open(described["log"], "rb") as handle:
+            self.assertEqual(hashlib.sha256(handle.read()).hexdigest(), described["log_sha256"])
+        self.assertEqual(capture.read_log(), b"hello\n" * 1000)
+
+    def test_write_error_drops_the_partial_log_but_keeps_the_tail(self):
+        capture = self._capture(WGX_VALIDATE_LOG_GZIP="1")
+        capture.feed(b"before\n")
+        full = OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        with patch.object(capture.sink, "write", side_effect=full):
+            capture.feed(b"after\n")
+        capture.feed(b"last\n")
+        capture.close()
+        described = capture.describe()
+        self.assertIsNone(described["log"])
+        self.assertIsNone(described["log_sha256"])
+        self.assertTrue(described["truncated"])
+        self.assertEqual(described["error"], "log not written: No space left on device")
+        self.assertEqual(described["tail"], "before\nafter\nlast\n")
+        self.assertFalse(os.path.exists(self.base + ".log.gz"))
+        self.assertEqual(capture.read_log(), b"")
+
+
+class TestResourceUsage(unittest.TestCase):
+
+    @staticmethod
+    def _usage(**values):
+        fields = ("ru_utime", "ru_stime", "ru_maxrss", "ru_majflt", "ru_minflt",
+                  "ru_nvcsw", "ru_nivcsw", "ru_inblock", "ru_oublock")
+        return SimpleNamespace(**{name: values.get(name, 0) for name in fields})
+
+    def test_counters_are_deltas_but_peak_rss_is_taken_as_is(self):
+        before = self._usage(ru_utime=1.0, ru_stime=0.5, ru_maxrss=900, ru_majflt=2,
+                             ru_nvcsw=10, ru_inblock=8)
+        after = self._usage(ru_utime=1.75, ru_stime=0.75, ru_maxrss=4096, ru_majflt=5,
+                            ru_nvcsw=30, ru_inblock=72)
+        with patch.object(validate_runner.sys, "platform", "linux"):
+            usage = validate_runner.resource_usage(before, after, 2000)
+        self.assertEqual(usage["user_cpu_ms"], 750)
+        self.assertEqual(usage["sys_cpu_ms"], 250)
+        self.assertEqual(usage["cpu_ratio"], 0.5)
+        self.assertEqual(usage["max_rss_kb"], 4096)
+        self.assertEqual(usage["major_faults"], 3)
+        self.assertEqual(usage["voluntary_context_switches"], 20)
+        self.assertEqual(usage["block_input_ops"], 64)
+        self.assertEqual(validate_runner.resource_usage(before, after, 0)["cpu_ratio"], 0.0)
+
+
+class TestLimits(unittest.TestCase):
+
+    def test_parse_limits_rejects_unknown_and_non_positive_values(self):
+        self.assertEqual(validate_runner.parse_limits("memory_mb=512 timeout=60"),
+                         {"memory_mb": 512, "timeout": 60})
+        self.assertEqual(validate_runner.parse_limits(""), {})
+        for spec in ("memory=1", "cpu_seconds=0", "open_files=x", "timeout"):
+            with self.assertRaises(ValueError, msg=spec):
+                validate_runner.parse_limits(spec)
+
+    def test_exceeded_limit_needs_status_notice_or_usage(self):
+        limits = {"memory_mb": 256, "cpu_seconds": 5, "open_files": 64, "timeout": 30}
+        exceeded = validate_runner.exceeded_limit
+        self.assertEqual(exceeded(limits, 124, True, b""), "timeout")
+        self.assertIsNone(exceeded(limits, 0, False, b"MemoryError"))
+        self.assertIsNone(exceeded(limits, 152, False, b""))
+        self.assertEqual(exceeded(limits, 152, False, b"", cpu_ms=5000), "cpu_seconds")
+        self.assertEqual(exceeded(limits, 137, False, b"", cpu_ms=4800), "cpu_seconds")
+        # SIGKILL without the CPU time: timeout --kill-after, or the OOM killer.
+        self.assertEqual(exceeded(limits, 137, False, b"", cpu_ms=100, duration_ms=31000), "timeout")
+        self.assertIsNone(exceeded(limits, 137, False, b"", cpu_ms=100, duration_ms=2000))
+        self.assertEqual(exceeded(limits, 1, False, b"wgx: task t exceeded limits.timeout (30)\n"),
+                         "timeout")
+        # Error messages in the output are no evidence: a failing test may print them.
+        self.assertIsNone(exceeded(limits, 1, False, b"Traceback ...\nMemoryError\n"))
+        self.assertIsNone(exceeded(limits, 1, False, b"OSError: [Errno 24] Too many open files"))
+        self.assertIsNone(exceeded(limits, 1, False, b"AssertionError"))
+        self.assertIsNone(exceeded(limits, 1, False, b"MemoryError", max_rss_kb=255 * 1024))
+        self.assertEqual(exceeded(limits, 137, False, b"", max_rss_kb=256 * 1024), "memory_mb")
+        self.assertIsNone(exceeded({"timeout": 30}, 1, False, b"", max_rss_kb=1 << 30))
+
+
+
+STUB_WGX = """#!/bin/sh
+# wgx task NAME: records start and end, so overlap is visible.
+echo "start $2" >>events
+case "$2" in
+slow) sleep 0.4 ;;
+burn) i=0; while [ $i -lt 200000 ]; do i=$((i + 1)); done ;;
+fail) echo "broken: $2"; echo "end $2" >>events; exit 3 ;;
+esac
+echo "end $2" >>events
+"""
+
+
+class TestSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.executable = self.root / "wgx"
+        self.executable.write_text(STUB_WGX, encoding="utf-8")
+        self.executable.chmod(0o755)
+
+    def _supervisor(self, entries, jobs):
+        records = [
+            ["profile", "quick", "", "", "", ""],
+            ["repository", "project", "", "false", "", ""],
+            ["manifest", "true", "", "", "", ""],
+            ["logs", str(self.root / "logs"), "", "", "", ""],
+        ] + entries
+        return validate_runner.Supervisor(records, jobs, 30, self.root, self.executable, quiet=True)
+
+    def _events(self):
+        return (self.root / "events").read_text(encoding="utf-8").split("\n")[:-1]
+
+    def test_records_follow_the_plan_not_completion_order(self):
+        supervisor = self._supervisor([
+            ["run", "slow", "sleep", "", "0", ""],
+            ["skip", "bench", "unsupported", "no harness", "", ""],
+            ["run", "fail", "false", "", "0", ""],
+        ], jobs=2)
+        supervisor.run()
+        self.assertEqual(self._events()[-1], "end slow")
+        records = supervisor.records()
+        self.assertEqual([(r[0], r[1], r[2]) for r in records if r[0] != "output"], [
+            ("check", "slow", "passed"),
+            ("skip", "bench", "unsupported"),
+            ("check", "fail", "failed"),
+        ])
+        self.assertEqual(records[1][:4], ["output", "slow", str(self.root / "logs" / "slow.json"), ""])
+        with open(records[-1][2], encoding="utf-8") as handle:
+            self.assertIn("broken: fail", json.load(handle)["tail"])
+
+    def test_serial_check_runs_alone(self):
+        supervisor = self._supervisor([
+            ["run", "slow", "sleep", "", "0", ""],
+            ["run", "lone", "true", "", "1", ""],
+            ["run", "fast", "true", "", "0", ""],
+        ], jobs=3)
+        supervisor.run()
+        self.assertEqual(self._events(),
+                         ["start slow", "end slow", "start lone", "end lone", "start fast", "end fast"])
+
+    def test_parallel_checks_get_their_own_rusage(self):
+        supervisor = self._supervisor([
+            ["run", "burn", "loop", "", "0", ""],
+            ["run", "slow", "sleep", "", "0", ""],
+        ], jobs=2)
+        supervisor.run()
+        usage = {}
+        for name in ("burn", "slow"):
+            with open(self.root / "logs" / f"{name}.json", encoding="utf-8") as handle:
+                resources = json.load(handle)["resources"]
+            usage[name] = resources["user_cpu_ms"] + resources["sys_cpu_ms"]
+        self.assertGreater(usage["burn"], 50)
+        self.assertLess(usage["slow"], usage["burn"] / 2)
+
+    def test_a_failing_log_write_still_records_the_check(self):
+        supervisor = self._supervisor([
+            ["run", "fail", "false", "", "0", ""],
+            ["run", "fast", "true", "", "0", ""],
+        ], jobs=1)
+        broken_pipe = OSError(errno.EPIPE, os.strerror(errno.EPIPE))
+        with patch.object(validate_runner._HashingFile, "write", side_effect=broken_pipe):
+            supervisor.run()
+        records = supervisor.records()
+        self.assertEqual([(r[0], r[1], r[2]) for r in records if r[0] == "check"],
+                         [("check", "fail", "failed"), ("check", "fast", "passed")])
+        self.assertEqual(records[0][3], "3")
+        with open(self.root / "logs" / "fail.json", encoding="utf-8") as handle:
+            described = json.load(handle)
+        self.assertIsNone(described["log"])
+        self.assertTrue(described["truncated"])
+        self.assertIn("Broken pipe", described["error"])
+        self.assertIn("broken: fail", described["tail"])
+        self.assertFalse((self.root / "logs" / "fail.log").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
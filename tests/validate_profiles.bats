@@ -297,3 +297,193 @@ YAML
   sleep 2
   [ ! -e "$WORKDIR/escaped-marker" ]
 }
+
+@test "Receipt und WGX_DEBUG nennen das Parser-Backend" {
+  standard_profile
+  cd "$WORKDIR"
+  WGX_PROFILE_BACKEND=builtin WGX_PROFILE_CACHE=0 run wgx validate --profile quick --json
+  assert_success
+  backend="$(printf '%s' "$output" | python3 -c 'import json,sys;print(json.load(sys.stdin)["manifest"]["parser_backend"])')"
+  [ "$backend" = "builtin" ]
+
+  WGX_DEBUG=1 WGX_PROFILE_BACKEND=builtin WGX_PROFILE_CACHE=0 run wgx tasks
+  assert_success
+  assert_output --partial 'WGX: profile parser backend: builtin'
+}
+
+@test "unbekanntes WGX_PROFILE_BACKEND bricht das Laden ab" {
+  standard_profile
+  cd "$WORKDIR"
+  WGX_PROFILE_BACKEND=turbo run wgx tasks
+  assert_failure
+  assert_output --partial "unknown WGX_PROFILE_BACKEND 'turbo'"
+}
+
+@test "Receipt nennt Log samt sha256 und das redigierte Ende fehlschlagender Checks" {
+  write_profile <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - lint
+      - test
+  tasks:
+    lint: "echo linting"
+    test: ["sh", "-c", "seq 1 2000; echo 'API_TOKEN=hunter2 rejected' >&2; exit 3"]
+YAML
+  cd "$WORKDIR"
+  WGX_VALIDATE_TAIL_KB=1 run wgx validate --profile quick --json --log-dir "$BATS_TEST_TMPDIR/logs" \
+    --output "$BATS_TEST_TMPDIR/receipt.json"
+  [ "$status" -ne 0 ]
+  assert_not_output 'hunter2'
+  run python3 - "$BATS_TEST_TMPDIR/receipt.json" <<'PY'
+import hashlib, json, sys
+with open(sys.argv[1], encoding="utf-8") as handle:
+    lint, test = json.load(handle)["checks"]
+assert "tail" not in lint["output"], lint
+with open(test["output"]["log"]["path"], "rb") as handle:
+    log = handle.read()
+assert hashlib.sha256(log).hexdigest() == test["output"]["log"]["sha256"]
+assert b"API_TOKEN=hunter2" in log
+tail = test["output"]["tail"]
+# About 1 KiB, cut at a line start; redaction may lengthen it slightly.
+assert len(tail) < 1100 and int(tail.split("\n")[0]) > 1800, tail[:40]
+print(tail.splitlines()[-2:])
+PY
+  assert_success
+  assert_output "['2000', 'API_TOKEN=[REDACTED] rejected']"
+}
+
+@test "Check-Logs werden begrenzt und optional komprimiert" {
+  write_profile <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - chatty
+  tasks:
+    chatty: ["sh", "-c", "yes 0123456789abcdef | head -c 3000000; echo done"]
+YAML
+  cd "$WORKDIR"
+  WGX_VALIDATE_LOG_MAX_MB=1 WGX_VALIDATE_LOG_GZIP=1 \
+    run wgx validate --profile quick --log-dir "$BATS_TEST_TMPDIR/logs" \
+    --output "$BATS_TEST_TMPDIR/receipt.json"
+  assert_success
+  run python3 - "$BATS_TEST_TMPDIR/receipt.json" <<'PY'
+import gzip, json, sys
+with open(sys.argv[1], encoding="utf-8") as handle:
+    output = json.load(handle)["checks"][0]["output"]
+with gzip.open(output["log"]["path"]) as handle:
+    logged = len(handle.read())
+print(output["bytes"], output["log"]["bytes"], logged, output["log"]["truncated"])
+PY
+  assert_output "3000005 1048576 1048576 True"
+}
+
+@test "Receipt trennt CPU-gebundene von wartenden Checks über rusage" {
+  write_profile <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - compute
+      - wait
+  tasks:
+    compute: ["python3", "-c", "b = bytearray(100 * 1024 * 1024); sum(i * i for i in range(2_000_000))"]
+    wait: ["sleep", "1"]
+YAML
+  cd "$WORKDIR"
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/receipt.json"
+  assert_success
+  run python3 - "$BATS_TEST_TMPDIR/receipt.json" <<'PY'
+import json, sys
+with open(sys.argv[1], encoding="utf-8") as handle:
+    compute, wait = (check["resources"] for check in json.load(handle)["checks"])
+print(compute["cpu_ratio"] > 0.5, compute["max_rss_kb"] > 100 * 1024, compute["user_cpu_ms"] > 0)
+print(wait["cpu_ratio"] < 0.5, wait["max_rss_kb"] < 100 * 1024)
+PY
+  assert_line --index 0 "True True True"
+  assert_line --index 1 "True True"
+}
+
+@test "parallele Checks landen in Plan-Reihenfolge im Receipt, serial läuft allein" {
+  write_profile <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      jobs: 3
+      checks:
+        - slow
+        - fast
+    full:
+      - slow
+      - task: lone
+        serial: true
+      - fast
+  tasks:
+    slow: ["sh", "-c", "sleep 1; echo slow >>order"]
+    lone: ["sh", "-c", "echo lone >>order"]
+    fast: ["sh", "-c", "echo fast >>order"]
+YAML
+  cd "$WORKDIR"
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/quick.json"
+  assert_success
+  run python3 -c 'import json, sys; print(*[c["name"] for c in json.load(open(sys.argv[1]))["checks"]])' \
+    "$BATS_TEST_TMPDIR/quick.json"
+  assert_output "slow fast"
+  run cat order
+  assert_output $'fast\nslow'
+
+  rm -f order
+  run wgx validate --profile full --jobs 3 --output "$BATS_TEST_TMPDIR/full.json"
+  assert_success
+  run cat order
+  assert_output $'slow\nlone\nfast'
+
+  run wgx validate --profile full --jobs x
+  assert_failure 2
+  assert_output --partial "--jobs erwartet"
+}
+
+@test "bestandene Checks mit unveränderten Inputs werden wiederverwendet" {
+  export WGX_CACHE_DIR="$BATS_TEST_TMPDIR/cache"
+  # Runs must reach the task, not the task result cache.
+  export WGX_TASK_CACHE=0
+  write_profile <<'YAML'
+wgx:
+  apiVersion: v1
+  validate:
+    quick:
+      - lint
+  tasks:
+    lint:
+      cmd: ["sh", "-c", "echo run >>\"$BATS_TEST_TMPDIR/runs.log\""]
+      inputs: ["src/**"]
+YAML
+  mkdir -p "$WORKDIR/src" "$WORKDIR/docs"
+  printf 'one\n' >"$WORKDIR/src/a.txt"
+  cd "$WORKDIR"
+  git init -q .
+
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/first.json"
+  assert_success
+  first="$(receipt_field receipt_sha256 <"$BATS_TEST_TMPDIR/first.json")"
+
+  printf 'docs\n' >docs/readme.md
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/second.json"
+  assert_success
+  assert_output --partial "reused"
+  run python3 -c 'import json, sys; print(json.load(open(sys.argv[1]))["checks"][0]["reused_from"])' \
+    "$BATS_TEST_TMPDIR/second.json"
+  assert_output "$first"
+  [ "$(wc -l <"$BATS_TEST_TMPDIR/runs.log" | tr -d ' ')" -eq 1 ]
+
+  run wgx validate --profile quick --no-reuse
+  assert_success
+  printf 'two\n' >src/a.txt
+  run wgx validate --profile quick --output "$BATS_TEST_TMPDIR/third.json"
+  assert_success
+  [[ "$(cat "$BATS_TEST_TMPDIR/third.json")" != *reused_from* ]]
+  [ "$(wc -l <"$BATS_TEST_TMPDIR/runs.log" | tr -d ' ')" -eq 3 ]
+}